@@ -0,0 +1,163 @@
+"""
+Structured agent trace - what each agent thought, called and answered
+
+An AgentTrace belongs to one analysis run. crewai feeds it through per-agent
+step callbacks and the run's TaskTracker (see analysis_events); consumers
+subscribe with bounded queues. Nothing is read back from stdout, so concurrent
+runs each get their own clean trace.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+import re
+import threading
+import uuid
+
+from analysis_events import current_task_index
+
+_THOUGHT = re.compile(r"^\s*(?:Thought:)?\s*(.*?)\s*(?:\n\s*(?:Action|Final Answer)\s*:|$)", re.S)
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """One step of an agent's work
+
+    kind is one of task_started, thought, tool_call, tool_result, output,
+    task_finished or run_finished.
+    """
+    run_id: str
+    kind: str
+    agent: str = None
+    task_index: int = None
+    text: str = ""
+    tool: str = None
+    tool_input: str = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+def _thought(log: str) -> str:
+    """The reasoning an agent wrote before its Action / Final Answer"""
+    match = _THOUGHT.match(log or "")
+    return match.group(1) if match else ""
+
+
+class Subscription:
+    """A consumer's bounded queue; when it is full the oldest event is dropped"""
+
+    def __init__(self, trace, maxsize: int):
+        self._trace = trace
+        self._events = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, event: TraceEvent):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def get(self, timeout: float = None):
+        """Next event, or None once the trace has ended (or on timeout)"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._events or self._closed, timeout):
+                return None
+            return self._events.popleft() if self._events else None
+
+    def __iter__(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def unsubscribe(self):
+        self._trace.unsubscribe(self)
+        self.close()
+
+
+class AgentTrace:
+    """Publishes the TraceEvents of one run to its subscribers and listeners
+
+    Listeners are called synchronously with every event (e.g. a TraceStore
+    writer); subscribers consume them from their own bounded queues.
+    """
+
+    def __init__(self, run_id: str = None):
+        self.run_id = run_id or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self._subscribers = []
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def subscribe(self, maxsize: int = 1000) -> Subscription:
+        subscription = Subscription(self, maxsize)
+        with self._lock:
+            if self._closed:
+                subscription.close()
+            else:
+                self._subscribers.append(subscription)
+        return subscription
+
+    def add_listener(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, kind: str, agent: str = None, text: str = "", **details):
+        event = TraceEvent(self.run_id, kind, agent, current_task_index(), text, **details)
+        with self._lock:
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"⚠️ Trace listener failed: {e}")
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def close(self):
+        """End the run: publish run_finished and let subscribers drain"""
+        self.publish("run_finished")
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+            self._closed = True
+        for subscription in subscribers:
+            subscription.close()
+
+    def step_callback(self, agent: str):
+        """crewai step_callback that records the steps of `agent`"""
+        def on_step(step_output):
+            if isinstance(step_output, list):
+                # Tool calls: (AgentAction, observation) pairs
+                for action, observation in step_output:
+                    thought = _thought(action.log)
+                    if thought:
+                        self.publish("thought", agent, thought)
+                    self.publish("tool_call", agent, tool=action.tool, tool_input=str(action.tool_input))
+                    self.publish("tool_result", agent, str(observation), tool=action.tool)
+            else:
+                thought = _thought(step_output.log)
+                if thought:
+                    self.publish("thought", agent, thought)
+                self.publish("output", agent, str(step_output.return_values.get("output", "")))
+        return on_step
+
+    # TaskTracker observer
+
+    def task_started(self, index: int, agent: str, task):
+        self.publish("task_started", agent, task.description)
+
+    def task_finished(self, index: int, agent: str, output):
+        self.publish("task_finished", agent, str(output.raw_output))
@@ -0,0 +1,170 @@
+"""
+Typed events emitted while an analysis runs (see FinancialAnalysisCrew.analyze_stream)
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+import contextvars
+import queue
+import threading
+
+_current_stream = contextvars.ContextVar("analysis_event_stream", default=None)
+_task_scope = contextvars.ContextVar("analysis_task_index", default=None)
+_current_tracker = contextvars.ContextVar("analysis_task_tracker", default=None)
+
+
+@dataclass(frozen=True)
+class TaskStarted:
+    task_index: int
+    agent: str
+    description: str
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+@dataclass(frozen=True)
+class TokenChunk:
+    task_index: int
+    agent: str
+    text: str
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+@dataclass(frozen=True)
+class TaskFinished:
+    task_index: int
+    agent: str
+    output: str
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+@dataclass(frozen=True)
+class AnalysisFinished:
+    result: dict
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+def current_stream():
+    """The EventStream of the analysis running in this context, if any"""
+    return _current_stream.get()
+
+
+def current_task_index():
+    """Index of the task whose LLM calls are running in this context, if known"""
+    index = _task_scope.get()
+    if index is None:
+        tracker = _current_tracker.get()
+        if tracker is not None:
+            index = tracker.current
+    return index
+
+
+class TaskTracker:
+    """Follows the tasks of one run and tells its observers as they start and finish
+
+    Observers implement task_started(index, agent, task) and
+    task_finished(index, agent, output). Sequential crews pass task_finished as
+    the Crew task_callback and tasks advance in order; other processes call
+    start_task/finish_task and run each task inside task_scope so LLM calls are
+    attributed to the right task.
+    """
+
+    def __init__(self, tasks, observers=(), sequential: bool = True):
+        self.tasks = list(tasks)
+        self.observers = [observer for observer in observers if observer is not None]
+        self.sequential = sequential
+        self.current = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """Start the run (task 0 first if sequential) and make it current in this context"""
+        token = _current_tracker.set(self)
+        try:
+            if self.sequential:
+                self.start_task(0)
+            yield self
+        finally:
+            _current_tracker.reset(token)
+
+    def task_finished(self, output):
+        """Crew task_callback: the current task is done and the next one starts"""
+        with self._lock:
+            index = self.current
+        if index is None:
+            return
+        self.finish_task(index, output)
+        self.start_task(index + 1)
+
+    def start_task(self, index: int):
+        with self._lock:
+            if index >= len(self.tasks):
+                self.current = None
+                return
+            self.current = index
+        for observer in self.observers:
+            observer.task_started(index, self.agent(index), self.tasks[index])
+
+    def finish_task(self, index: int, output):
+        for observer in self.observers:
+            observer.task_finished(index, self.agent(index), output)
+
+    @contextmanager
+    def task_scope(self, index: int):
+        """Attribute LLM calls made in this context to task `index`"""
+        token = _task_scope.set(index)
+        try:
+            yield
+        finally:
+            _task_scope.reset(token)
+
+    def agent(self, index: int) -> str:
+        agent = self.tasks[index].agent
+        return agent.role if agent is not None else "Agent"
+
+
+class EventStream:
+    """Thread-safe channel from a running crew to the consumer iterating over it
+
+    Pass it as a TaskTracker observer to receive task events.
+    """
+
+    _DONE = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._agents = {}
+
+    @contextmanager
+    def activate(self):
+        """Route events from LLM callbacks in this context to the stream"""
+        token = _current_stream.set(self)
+        try:
+            yield self
+        finally:
+            _current_stream.reset(token)
+
+    def emit(self, event):
+        self._queue.put(event)
+
+    def close(self):
+        self._queue.put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            event = self._queue.get()
+            if event is self._DONE:
+                return
+            yield event
+
+    def task_started(self, index: int, agent: str, task):
+        self._agents[index] = agent
+        self.emit(TaskStarted(index, agent, task.description))
+
+    def task_finished(self, index: int, agent: str, output):
+        self.emit(TaskFinished(index, agent, str(output.raw_output)))
+
+    def token(self, text: str):
+        """Called for every streamed LLM token of the running task"""
+        index = current_task_index()
+        if index in self._agents and text:
+            self.emit(TokenChunk(index, self._agents[index], text))
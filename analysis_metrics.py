@@ -0,0 +1,190 @@
+"""
+Per-task latency, LLM-call and token metrics for analysis runs
+
+A MetricsRecorder observes the tasks of one run (see analysis_events.TaskTracker)
+and is told about every LLM call made in its context. Its summary goes into the
+analysis result under 'metrics' and to the metrics sink configured in
+config.yaml `metrics`.
+"""
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+import contextvars
+import json
+import threading
+import time
+
+from analysis_events import current_task_index
+from config_loader import get_setting
+
+_current_recorder = contextvars.ContextVar("analysis_metrics", default=None)
+
+
+def current_metrics():
+    """The MetricsRecorder of the analysis running in this context, if any"""
+    return _current_recorder.get()
+
+
+@dataclass
+class TaskMetrics:
+    task_index: int
+    agent: str
+    wall_seconds: float = 0.0
+    llm_calls: int = 0
+    cached_calls: int = 0
+    failed_calls: int = 0  # LLM calls that raised (after the client's own retries)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    rate_limit_wait_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['wall_seconds'] = round(self.wall_seconds, 3)
+        data['rate_limit_wait_seconds'] = round(self.rate_limit_wait_seconds, 3)
+        return data
+
+
+class MetricsRecorder:
+    """Collects TaskMetrics for one analysis run"""
+
+    def __init__(self, company_name: str, user_query: str = None, process: str = None):
+        self.company_name = company_name
+        self.user_query = user_query
+        self.process = process
+        self.tasks = {}
+        self._started = {}
+        self._lock = threading.Lock()
+        self._run_started = time.perf_counter()
+        self._total_seconds = None
+
+    @contextmanager
+    def activate(self):
+        """Record LLM calls made in this context; the run ends with the block"""
+        token = _current_recorder.set(self)
+        try:
+            yield self
+        finally:
+            _current_recorder.reset(token)
+            self._total_seconds = time.perf_counter() - self._run_started
+
+    # TaskTracker observer
+
+    def task_started(self, index: int, agent: str, task):
+        with self._lock:
+            self.tasks[index] = TaskMetrics(index, agent)
+            self._started[index] = time.perf_counter()
+
+    def task_finished(self, index: int, agent: str, output):
+        with self._lock:
+            started = self._started.pop(index, None)
+            if started is not None:
+                self.tasks[index].wall_seconds = time.perf_counter() - started
+
+    # LLM call reports (attributed to the task running in the caller's context)
+
+    def _update(self, **increments):
+        with self._lock:
+            metrics = self.tasks.get(current_task_index())
+            if metrics is None:
+                return
+            for name, amount in increments.items():
+                setattr(metrics, name, getattr(metrics, name) + amount)
+
+    def record_llm_call(self, prompt_tokens: int, completion_tokens: int):
+        self._update(llm_calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def record_cache_hit(self):
+        self._update(cached_calls=1)
+
+    def record_llm_error(self):
+        self._update(failed_calls=1)
+
+    def record_wait(self, seconds: float):
+        self._update(rate_limit_wait_seconds=seconds)
+
+    def summary(self) -> dict:
+        """Run totals plus one entry per task, in task order"""
+        with self._lock:
+            tasks = [self.tasks[index].to_dict() for index in sorted(self.tasks)]
+        total = self._total_seconds
+        if total is None:
+            total = time.perf_counter() - self._run_started
+        summary = {
+            'company': self.company_name,
+            'query': self.user_query,
+            'process': self.process,
+            'timestamp': datetime.now().isoformat(),
+            'total_seconds': round(total, 3),
+        }
+        for name in ('llm_calls', 'cached_calls', 'failed_calls', 'prompt_tokens', 'completion_tokens'):
+            summary[name] = sum(task[name] for task in tasks)
+        summary['rate_limit_wait_seconds'] = round(
+            sum(task['rate_limit_wait_seconds'] for task in tasks), 3)
+        summary['tasks'] = tasks
+        return summary
+
+
+class MetricsSink:
+    """Receives the metrics summary of every completed analysis (default: drops it)"""
+
+    def record(self, metrics: dict):
+        pass
+
+
+class JsonlMetricsSink(MetricsSink):
+    """Appends one JSON line per analysis to a file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: dict):
+        line = json.dumps(metrics, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+class PrintMetricsSink(MetricsSink):
+    """Prints a per-task breakdown to stdout"""
+
+    def record(self, metrics: dict):
+        print(f"📏 {metrics['company']}: {metrics['total_seconds']:.1f}s, "
+              f"{metrics['llm_calls']} LLM calls, "
+              f"{metrics['prompt_tokens'] + metrics['completion_tokens']} tokens")
+        for task in metrics['tasks']:
+            print(f"   {task['agent']:<32} {task['wall_seconds']:6.1f}s  "
+                  f"calls={task['llm_calls']} failed={task['failed_calls']} "
+                  f"tokens={task['prompt_tokens']}+{task['completion_tokens']} "
+                  f"wait={task['rate_limit_wait_seconds']:.1f}s")
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def set_metrics_sink(sink: MetricsSink):
+    """Send the metrics of every analysis in this process to `sink`"""
+    global _sink
+    with _sink_lock:
+        _sink = sink
+
+
+def get_metrics_sink() -> MetricsSink:
+    """The process-wide sink, built from config.yaml `metrics` on first use"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            kind = get_setting("metrics.sink", "jsonl")
+            if kind == "jsonl":
+                path = Path(get_setting("metrics.file", ".cache/analysis_metrics.jsonl"))
+                if not path.is_absolute():
+                    path = Path(__file__).parent / path
+                _sink = JsonlMetricsSink(path)
+            elif kind == "print":
+                _sink = PrintMetricsSink()
+            else:
+                _sink = MetricsSink()
+        return _sink
@@ -16,6 +16,8 @@ sys.path.append(str(Path(__file__).parent))
 
 # Import the crew
 from crew import FinancialAnalysisCrew
+from analysis_events import AnalysisFinished, TaskFinished, TaskStarted, TokenChunk
+from chat_history import ChatHistory, prune_spill_files
 
 # Page configuration
 st.set_page_config(
@@ -315,11 +317,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# One analysis engine shared by every session (it keeps no per-call state)
+@st.cache_resource
+def get_crew():
+    return FinancialAnalysisCrew()
+
 # Initialize session state
 if 'messages' not in st.session_state:
-    st.session_state.messages = []
-if 'crew' not in st.session_state:
-    st.session_state.crew = FinancialAnalysisCrew()
+    # Bounded by ui.max_chat_history / ui.max_history_mb; older messages spill to disk
+    prune_spill_files()
+    st.session_state.messages = ChatHistory()
 if 'analyzing' not in st.session_state:
     st.session_state.analyzing = False
 if 'total_analyses' not in st.session_state:
@@ -327,6 +334,15 @@ if 'total_analyses' not in st.session_state:
 if 'current_analysis_stages' not in st.session_state:
     st.session_state.current_analysis_stages = []
 
+def format_cache_age(seconds):
+    """Human-readable age of a cached analysis"""
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    return f"{minutes // 60}h {minutes % 60}m ago"
+
 # Helper function to capture and parse agent outputs
 def capture_agent_outputs():
     """Simulate agent outputs for demonstration"""
@@ -420,7 +436,7 @@ with metrics_cols[1]:
 with metrics_cols[2]:
     st.markdown(f"""
     <div class="metric-card">
-        <p class="metric-value">{len(st.session_state.messages)}</p>
+        <p class="metric-value">{len(st.session_state.messages) + st.session_state.messages.spilled}</p>
         <p class="metric-label">Conversations</p>
     </div>
     """, unsafe_allow_html=True)
@@ -484,7 +500,20 @@ with col_main:
             Choose a template above or ask your own question!
             """)
         else:
-            for msg_idx, message in enumerate(st.session_state.messages):
+            # Messages evicted from memory are only read back when asked for
+            archived = st.session_state.messages.spilled
+            if archived:
+                with st.expander(f"🗄️ {archived} earlier messages archived"):
+                    if st.button("Load earlier messages", key="load_archived"):
+                        for old in st.session_state.messages.load_spilled(limit=20):
+                            who = "You" if old['role'] == "user" else "Assistant"
+                            st.markdown(f"**{who}** • {old['timestamp'].strftime('%I:%M %p')}")
+                            st.markdown(old.get('content', ''))
+                            st.markdown("---")
+            
+            retained = list(st.session_state.messages)
+            for msg_idx, message in enumerate(retained):
+                msg_key = archived + msg_idx
                 if message["role"] == "user":
                     st.markdown(f"""
                     <div class="chat-message user-message">
@@ -561,14 +590,14 @@ with col_main:
                     # Action buttons
                     col1, col2, col3 = st.columns([1, 1, 8])
                     with col1:
-                        if st.button("📋 Copy", key=f"copy_{msg_idx}"):
+                        if st.button("📋 Copy", key=f"copy_{msg_key}"):
                             st.toast("Analysis copied!", icon="✅")
                     with col2:
-                        if st.button("💾 Save", key=f"save_{msg_idx}"):
+                        if st.button("💾 Save", key=f"save_{msg_key}"):
                             filename = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                             with open(filename, 'w') as f:
                                 json.dump({
-                                    'query': st.session_state.messages[msg_idx-1]['content'] if msg_idx > 0 else '',
+                                    'query': retained[msg_idx-1]['content'] if msg_idx > 0 else '',
                                     'analysis': message.get('content', ''),
                                     'agent_outputs': message.get('agent_outputs', []),
                                     'timestamp': message.get('timestamp', datetime.now()).isoformat()
@@ -626,9 +655,9 @@ with col_main:
                     break
         
         if company_found:
-            # Show progress
-            progress_container = st.container()
-            with progress_container:
+            # Live view: each agent's text streams in while the crew works
+            progress_container = st.empty()
+            with progress_container.container():
                 st.markdown(f"""
                 <div class="agent-output-container">
                     <div class="agent-sequence-header">
@@ -642,30 +671,81 @@ with col_main:
                 
                 # Progress bar
                 progress_bar = st.progress(0)
-                
-                # Simulate agent stages
-                agent_stages = [
-                    "🔍 Research Analyst gathering information...",
-                    "📊 Financial Analyst evaluating metrics...",
-                    "💡 Investment Advisor forming recommendations..."
-                ]
-                
-                for i, stage in enumerate(agent_stages):
-                    st.info(stage)
-                    progress_bar.progress((i + 1) / len(agent_stages))
-                    time.sleep(0.5)
+                stage_area = st.container()
             
             try:
-                # Run analysis
+                # Run analysis, rendering events as they arrive
                 start_time = time.time()
-                result = st.session_state.crew.analyze(company_found, last_message)
+                result = None
+                agent_outputs = []
+                live_text = {}
+                live_views = {}
+                last_render = 0.0
+                
+                for event in get_crew().analyze_stream(company_found, last_message):
+                    if isinstance(event, TaskStarted):
+                        icon = '🔍' if 'Research' in event.agent else '📊' if 'Financial' in event.agent else '💡'
+                        with stage_area:
+                            st.info(f"{icon} {event.agent} working...")
+                            live_views[event.task_index] = st.empty()
+                        live_text[event.task_index] = ""
+                    elif isinstance(event, TokenChunk):
+                        live_text[event.task_index] += event.text
+                        # Throttle redraws; tokens arrive much faster than the UI needs
+                        if time.time() - last_render > 0.1:
+                            live_views[event.task_index].markdown(live_text[event.task_index])
+                            last_render = time.time()
+                    elif isinstance(event, TaskFinished):
+                        live_views[event.task_index].markdown(event.output)
+                        progress_bar.progress(min(1.0, (event.task_index + 1) / 3))
+                        agent_outputs.append({
+                            'agent': event.agent,
+                            'timestamp': event.timestamp,
+                            'status': 'complete',
+                            'output': event.output
+                        })
+                    elif isinstance(event, AnalysisFinished):
+                        result = event.result
+                
                 analysis_time = time.time() - start_time
                 
                 # Clear progress
                 progress_container.empty()
                 
-                # Get simulated agent outputs
-                agent_outputs = capture_agent_outputs()
+                # Cached results carry the agent outputs of the original run
+                if not agent_outputs and result.get('task_outputs'):
+                    finished_at = datetime.fromisoformat(result['timestamp'])
+                    agent_outputs = [
+                        {'agent': item['agent'], 'timestamp': finished_at,
+                         'status': 'complete', 'output': item['output']}
+                        for item in result['task_outputs']
+                    ]
+                if not agent_outputs:
+                    agent_outputs = capture_agent_outputs()
+                
+                # Report whether the crew actually ran
+                if result.get('cached'):
+                    source = f"⚡ Cached result ({format_cache_age(result['cache_age_seconds'])})"
+                else:
+                    source = "🔄 Live analysis"
+                
+                # Per-agent breakdown (a cached result shows its original run)
+                metrics = result.get('metrics') or {}
+                breakdown = ""
+                if metrics.get('tasks'):
+                    rows = "\n".join(
+                        f"| {task['agent']} | {task['wall_seconds']:.1f}s | {task['llm_calls']} "
+                        f"| {task.get('failed_calls', 0)} | {task['prompt_tokens']:,} / {task['completion_tokens']:,} "
+                        f"| {task['rate_limit_wait_seconds']:.1f}s |"
+                        for task in metrics['tasks']
+                    )
+                    breakdown = f"""
+#### ⏱️ Agent Breakdown
+
+| Agent | Time | LLM Calls | Failed Calls | Tokens (prompt / completion) | Rate-Limit Wait |
+|-------|------|-----------|---------|------------------------------|-----------------|
+{rows}
+"""
                 
                 # Create response
                 response = f"""
@@ -682,8 +762,9 @@ with col_main:
 | **Company** | {company_found} |
 | **Date** | {datetime.now().strftime('%B %d, %Y')} |
 | **Time** | {analysis_time:.1f} seconds |
+| **Source** | {source} |
 | **Agents** | 3 specialists |
-
+{breakdown}
 ---
 
 ### ⚠️ Disclaimer
@@ -777,12 +858,13 @@ with col_sidebar:
     st.markdown("### ⚙️ Controls")
     
     if st.button("🗑️ Clear Chat", use_container_width=True):
-        st.session_state.messages = []
+        st.session_state.messages.clear()
         st.session_state.total_analyses = 0
         st.rerun()
     
     if st.button("🔄 Reset System", use_container_width=True):
-        st.session_state.crew = FinancialAnalysisCrew()
+        st.session_state.analyzing = False
+        st.session_state.current_analysis_stages = []
         st.toast("System reset!", icon="✅")
     
     # Status
@@ -0,0 +1,182 @@
+"""
+Disk-backed key/value store shared by the LLM response and analysis result caches
+"""
+from collections import OrderedDict
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from config_loader import get_setting
+
+
+def cache_directory() -> Path:
+    """Directory for on-disk caches (config: llm_cache.directory, relative to the repo)"""
+    return Path(__file__).parent / get_setting("llm_cache.directory", ".cache")
+
+
+class ResponseCache:
+    """SQLite-backed key/value store with an in-memory LRU front
+
+    - TTL expiry: entries older than `ttl_seconds` are treated as misses and dropped
+    - Size-bounded: least recently used entries are evicted beyond `max_entries`/`max_bytes`
+    - Thread-safe: one connection guarded by a lock; WAL mode lets processes share the file
+    """
+
+    def __init__(self, path, ttl_seconds: float = None, max_entries: int = 5000,
+                 max_bytes: int = 256 * 1024 * 1024, memory_entries: int = 256, clock=time.time):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._touched = {}  # key -> last memory hit, written to accessed_at before evicting
+        self._stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0,
+                       'misses': 0, 'expired': 0, 'evictions': 0}
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str):
+        """Return the cached value for `key`, or None on a miss"""
+        return self._lookup(key)[0]
+
+    def get_with_age(self, key: str):
+        """Return (value, age_seconds) for `key`, or (None, None) on a miss"""
+        value, created_at = self._lookup(key)
+        if value is None:
+            return None, None
+        return value, self.clock() - created_at
+
+    def _lookup(self, key: str):
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    self._stats['hits'] += 1
+                    self._stats['memory_hits'] += 1
+                    return value, created_at
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None, None
+
+            value, created_at = row
+            if self._expired(created_at, now):
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None, None
+
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, value, created_at)
+            self._stats['hits'] += 1
+            self._stats['disk_hits'] += 1
+            return value, created_at
+
+    def set(self, key: str, value: str):
+        """Store `value` under `key` and evict old entries if over budget"""
+        now = self.clock()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)", (key, value, size, now, now))
+            self._touched.pop(key, None)
+            self._evict()
+            self._conn.commit()
+            self._remember(key, value, now)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters plus current disk usage"""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'bytes': total_bytes,
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0,
+        })
+        return stats
+
+    def _remember(self, key: str, value: str, created_at: float):
+        # Caller holds the lock
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        # Caller holds the lock; drop expired rows first, then least recently used
+        if self._touched:
+            self._conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?",
+                                   [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE created_at < ?", (self.clock() - self.ttl_seconds,))
+            self._stats['expired'] += cursor.rowcount
+
+        entries, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            entries -= 1
+            total_bytes -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        for (key,) in evicted:
+            self._memory.pop(key, None)
+        self._stats['evictions'] += len(evicted)
@@ -0,0 +1,133 @@
+"""
+Bounded chat history for long-lived UI sessions
+
+ChatHistory keeps the newest messages in memory, up to `ui.max_chat_history`
+entries and `ui.max_history_mb` megabytes. Older messages are appended to a
+per-session spill file under the cache directory and can be loaded back on demand.
+"""
+from array import array
+from collections import deque
+from datetime import datetime
+import json
+import threading
+import time
+import uuid
+
+from cache_store import cache_directory
+from config_loader import get_setting
+
+
+def _restore(entry: dict) -> dict:
+    """Turn the timestamps JSON stored as text back into datetimes"""
+    def parse(value):
+        try:
+            return datetime.fromisoformat(value) if isinstance(value, str) else value
+        except ValueError:
+            return value
+    if 'timestamp' in entry:
+        entry['timestamp'] = parse(entry['timestamp'])
+    for output in entry.get('agent_outputs') or []:
+        if 'timestamp' in output:
+            output['timestamp'] = parse(output['timestamp'])
+    return entry
+
+
+class ChatHistory:
+    """Ring buffer of chat messages that spills evicted ones to disk
+
+    Behaves like the list it replaces for appending, iterating, indexing and len();
+    indexes and len() cover only the messages still held in memory.
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, spill: bool = None,
+                 directory=None, session_id: str = None):
+        self.max_entries = max_entries or get_setting("ui.max_chat_history", 50)
+        max_mb = get_setting("ui.max_history_mb", 20)
+        self.max_bytes = max_bytes or (max_mb * 1024 * 1024 if max_mb else None)
+        spill = get_setting("ui.spill_history", True) if spill is None else spill
+        self.session_id = session_id or uuid.uuid4().hex
+        self.spill_path = None
+        if spill:
+            directory = directory or cache_directory() / "chat_history"
+            directory.mkdir(parents=True, exist_ok=True)
+            self.spill_path = directory / f"{self.session_id}.jsonl"
+
+        self._entries = deque()   # (message, size)
+        self._bytes = 0
+        self._spilled = array("q")  # offset of every spilled message
+        self._lock = threading.Lock()
+
+    def append(self, message: dict):
+        size = len(json.dumps(message, default=str))
+        with self._lock:
+            self._entries.append((message, size))
+            self._bytes += size
+            # Always keep the newest message, even if it alone is over budget
+            while len(self._entries) > 1 and (
+                    len(self._entries) > self.max_entries
+                    or (self.max_bytes and self._bytes > self.max_bytes)):
+                evicted, evicted_size = self._entries.popleft()
+                self._bytes -= evicted_size
+                self._spill(evicted)
+
+    def _spill(self, message: dict):
+        # Caller holds the lock
+        if self.spill_path is None:
+            return
+        line = (json.dumps(message, default=str) + "\n").encode("utf-8")
+        with open(self.spill_path, "ab") as f:
+            self._spilled.append(f.tell())
+            f.write(line)
+
+    @property
+    def spilled(self) -> int:
+        """Number of messages moved out of memory"""
+        return len(self._spilled)
+
+    def load_spilled(self, limit: int = 20, before: int = None) -> list:
+        """Up to `limit` spilled messages ending just before spilled index `before`, oldest first"""
+        with self._lock:
+            end = len(self._spilled) if before is None else min(before, len(self._spilled))
+            start = max(0, end - limit)
+            if start >= end:
+                return []
+            with open(self.spill_path, "rb") as f:
+                f.seek(self._spilled[start])
+                lines = [f.readline() for _ in range(end - start)]
+        return [_restore(json.loads(line)) for line in lines]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._spilled = array("q")
+            if self.spill_path is not None and self.spill_path.exists():
+                self.spill_path.unlink()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes,
+                    'spilled': len(self._spilled)}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        with self._lock:
+            messages = [message for message, _ in self._entries]
+        return iter(messages)
+
+    def __getitem__(self, index: int) -> dict:
+        return self._entries[index][0]
+
+
+def prune_spill_files(max_age_days: float = None):
+    """Delete spill files of sessions untouched for `ui.history_spill_days`"""
+    max_age_days = max_age_days or get_setting("ui.history_spill_days", 7)
+    directory = cache_directory() / "chat_history"
+    if not directory.exists():
+        return
+    cutoff = time.time() - max_age_days * 86400
+    for path in directory.glob("*.jsonl"):
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
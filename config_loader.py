@@ -0,0 +1,31 @@
+"""
+Shared access to config.yaml settings
+"""
+from functools import lru_cache
+from pathlib import Path
+import os
+
+import yaml
+
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+
+
+@lru_cache(maxsize=None)
+def load_config(path: str = None) -> dict:
+    """Load config.yaml once per process (FINANCE_CREW_CONFIG overrides the path)"""
+    config_path = Path(path or os.getenv("FINANCE_CREW_CONFIG") or CONFIG_PATH)
+    try:
+        with open(config_path) as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def get_setting(dotted_key: str, default=None):
+    """Look up a nested setting such as 'llm_cache.ttl_hours'"""
+    value = load_config()
+    for part in dotted_key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
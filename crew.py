@@ -1,155 +1,270 @@
 """
 Fixed Financial Analysis Crew - Works with current AI knowledge
+
+crewai, LangChain and the OpenAI client are heavy to import and build, so nothing
+is constructed until the first analyze() call (see utils/bench_import_time.py).
 """
-from crewai import Agent, Crew, Task, Process
-from langchain_openai import ChatOpenAI
 import os
+import asyncio
+import threading
+from dataclasses import dataclass
 from datetime import datetime
 import json
 from dotenv import load_dotenv
 
+from analysis_events import AnalysisFinished, EventStream, TaskTracker, current_stream
+from analysis_metrics import MetricsRecorder, get_metrics_sink
+from config_loader import get_setting
+from rate_limiter import get_scheduler
+from result_cache import get_result_cache, prompt_version
+
 # Load environment variables
 load_dotenv()
 
-# Initialize LLM
-try:
-    llm = ChatOpenAI(
-        model="gpt-3.5-turbo",
-        temperature=0.1,
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
-    print("✅ LLM initialized successfully")
-except Exception as e:
-    print(f"❌ Error initializing LLM: {e}")
-    llm = None
+_llm = None
+_llm_lock = threading.Lock()
 
-class FinancialAnalysisCrew:
-    def __init__(self):
-        self.agents = self._create_agents()
-        self.tasks = []
-        self.crew = None
-        self.intermediate_results = []
+
+def get_llm():
+    """Build the shared LLM client on first use (None if it can't be created)"""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            from llm_client import create_llm
+            
+            try:
+                _llm = create_llm(
+                    model="gpt-3.5-turbo",
+                    temperature=0.1,
+                    api_key=os.getenv("OPENAI_API_KEY")
+                )
+                print("✅ LLM initialized successfully")
+            except Exception as e:
+                print(f"❌ Error initializing LLM: {e}")
+                return None
+        return _llm
+
+
+@dataclass(frozen=True)
+class AgentTemplate:
+    """Immutable description of one agent; crewai Agents are built from it per run"""
+    key: str
+    role: str
+    goal: str
+    backstory: str
+    max_iter: int = 2
     
-    def _create_agents(self):
-        """Create the financial analysis agents without external tools"""
-        
-        # Financial Analyst Agent
-        financial_analyst = Agent(
-            role='Senior Financial Analyst',
-            goal='Analyze financial data and market trends to provide investment insights',
-            backstory="""You are an experienced financial analyst with expertise in evaluating 
-            companies based on available information. You provide balanced, thoughtful analysis 
-            based on your training knowledge up to your cutoff date.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=llm,
-            max_iter=2
-        )
+    def build(self, llm):
+        from crewai import Agent
         
-        # Research Analyst Agent
-        research_analyst = Agent(
-            role='Investment Research Analyst',
-            goal='Provide comprehensive information about companies based on general knowledge',
-            backstory="""You are a knowledgeable research analyst who understands company 
-            fundamentals, market dynamics, and industry trends based on your training data.""",
+        return Agent(
+            role=self.role,
+            goal=self.goal,
+            backstory=self.backstory,
             verbose=True,
             allow_delegation=False,
             llm=llm,
-            max_iter=2
+            max_iter=self.max_iter
         )
+
+
+@dataclass(frozen=True)
+class TaskTemplate:
+    """Immutable description of one task; {company_name} and {consideration} are filled per run"""
+    key: str
+    agent: str
+    description: str
+    expected_output: str
+    context: tuple = ()  # keys of earlier tasks whose output this task receives
+
+
+AGENT_TEMPLATES = (
+    # Financial Analyst Agent
+    AgentTemplate(
+        key='financial_analyst',
+        role='Senior Financial Analyst',
+        goal='Analyze financial data and market trends to provide investment insights',
+        backstory="""You are an experienced financial analyst with expertise in evaluating 
+        companies based on available information. You provide balanced, thoughtful analysis 
+        based on your training knowledge up to your cutoff date."""
+    ),
+    # Research Analyst Agent
+    AgentTemplate(
+        key='research_analyst',
+        role='Investment Research Analyst',
+        goal='Provide comprehensive information about companies based on general knowledge',
+        backstory="""You are a knowledgeable research analyst who understands company 
+        fundamentals, market dynamics, and industry trends based on your training data."""
+    ),
+    # Investment Advisor Agent
+    AgentTemplate(
+        key='investment_advisor',
+        role='Senior Investment Advisor',
+        goal='Provide actionable investment recommendations based on analysis',
+        backstory="""You are a seasoned investment advisor who provides clear, 
+        balanced recommendations. You always remind clients that this is educational 
+        content and not personalized financial advice."""
+    ),
+)
+
+TASK_TEMPLATES = (
+    # Task 1: Company Research
+    TaskTemplate(
+        key='research',
+        agent='research_analyst',
+        description="""Based on your training knowledge, provide information about {company_name}:
+        1. Company overview and main business segments
+        2. Key products, services, and revenue sources
+        3. Market position and main competitors
+        4. General trends in their industry
+        5. Notable strengths and challenges
         
-        # Investment Advisor Agent
-        investment_advisor = Agent(
-            role='Senior Investment Advisor',
-            goal='Provide actionable investment recommendations based on analysis',
-            backstory="""You are a seasoned investment advisor who provides clear, 
-            balanced recommendations. You always remind clients that this is educational 
-            content and not personalized financial advice.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=llm,
-            max_iter=2
-        )
+        Note: Use your general knowledge about the company. Be clear about what information 
+        you're confident about versus what might have changed since your training cutoff.""",
+        expected_output="A comprehensive overview of the company based on general knowledge"
+    ),
+    # Task 2: Financial Analysis
+    TaskTemplate(
+        key='analysis',
+        agent='financial_analyst',
+        description="""Analyze the investment potential of {company_name} based on general principles:
+        1. Evaluate the company's business model and competitive advantages
+        2. Discuss growth prospects and market opportunities
+        3. Identify key risks and challenges
+        4. Consider industry trends and market position
+        5. Provide a balanced view of the investment case
         
-        return {
-            'financial_analyst': financial_analyst,
-            'research_analyst': research_analyst,
-            'investment_advisor': investment_advisor
-        }
+        Base your analysis on fundamental investment principles and the company information provided.""",
+        expected_output="A balanced financial analysis highlighting opportunities and risks"
+    ),
+    # Task 3: Investment Recommendation
+    TaskTemplate(
+        key='recommendation',
+        agent='investment_advisor',
+        description="""Based on the research and analysis of {company_name}, provide:
+        1. A general investment perspective (bullish/neutral/bearish)
+        2. Key factors supporting this view
+        3. Main risks investors should consider
+        4. Type of investor this might suit (growth, value, income, etc.)
+        5. Important considerations and caveats
+        
+        {consideration}
+        
+        Remember to note that this is educational content and not personalized investment advice.""",
+        expected_output="A thoughtful investment perspective with appropriate disclaimers",
+        # Waits on both earlier tasks; they don't depend on each other, so the
+        # dag process runs them in parallel
+        context=('research', 'analysis')
+    ),
+)
+
+
+@dataclass
+class RunContext:
+    """Everything that belongs to a single analyze() call"""
+    company_name: str
+    user_query: str
+    agents: dict
+    tasks: list
+    crew: object = None
+    tracker: TaskTracker = None
+    metrics: MetricsRecorder = None
+
+
+class FinancialAnalysisCrew:
+    """Reentrant analysis engine
     
-    def create_tasks(self, company_name: str, user_query: str = None):
-        """Create tasks for analyzing a specific company"""
-        
-        # Task 1: Company Research
-        research_task = Task(
-            description=f"""Based on your training knowledge, provide information about {company_name}:
-            1. Company overview and main business segments
-            2. Key products, services, and revenue sources
-            3. Market position and main competitors
-            4. General trends in their industry
-            5. Notable strengths and challenges
-            
-            Note: Use your general knowledge about the company. Be clear about what information 
-            you're confident about versus what might have changed since your training cutoff.""",
-            expected_output="A comprehensive overview of the company based on general knowledge",
-            agent=self.agents['research_analyst']
-        )
+    The instance only holds immutable templates and shared services, so one
+    instance can serve any number of threads or sessions at once. Each analyze()
+    call builds its own crewai agents, tasks and Crew in a RunContext.
+    """
+    
+    def __init__(self, llm=None, process: str = None, metrics_sink=None):
+        # llm defaults to the shared client; process is 'sequential' or 'dag';
+        # metrics_sink defaults to the one configured in config.yaml `metrics`
+        self.llm = llm
+        self.process = process or get_setting("crew.process", "sequential")
+        self.metrics_sink = metrics_sink
+        self.agent_templates = AGENT_TEMPLATES
+        self.task_templates = TASK_TEMPLATES
+        self.result_cache = get_result_cache()
+        # Any edit to the agent/task prompts changes this and invalidates cached results
+        self.prompt_version = prompt_version(self.agent_templates, self.task_templates)
+        self.prompt_version += f"-{self.process}"
+    
+    def _run_llm(self):
+        """A per-run copy of the LLM that reports its calls to the run's MetricsRecorder"""
+        from llm_client import MetricsForwarder, copy_for_run
         
-        # Task 2: Financial Analysis
-        analysis_task = Task(
-            description=f"""Analyze the investment potential of {company_name} based on general principles:
-            1. Evaluate the company's business model and competitive advantages
-            2. Discuss growth prospects and market opportunities
-            3. Identify key risks and challenges
-            4. Consider industry trends and market position
-            5. Provide a balanced view of the investment case
-            
-            Base your analysis on fundamental investment principles and the company information provided.""",
-            expected_output="A balanced financial analysis highlighting opportunities and risks",
-            agent=self.agents['financial_analyst']
-        )
+        llm = self.llm or get_llm()
+        if llm is None:
+            return None  # crewai falls back to its default LLM
+        return copy_for_run(llm, MetricsForwarder())
+    
+    def create_run(self, company_name: str, user_query: str = None) -> RunContext:
+        """Build fresh agents and tasks for analyzing a specific company"""
+        from crewai import Task
         
-        # Task 3: Investment Recommendation
-        recommendation_task = Task(
-            description=f"""Based on the research and analysis of {company_name}, provide:
-            1. A general investment perspective (bullish/neutral/bearish)
-            2. Key factors supporting this view
-            3. Main risks investors should consider
-            4. Type of investor this might suit (growth, value, income, etc.)
-            5. Important considerations and caveats
-            
-            {"Additional consideration: " + user_query if user_query else ""}
-            
-            Remember to note that this is educational content and not personalized investment advice.""",
-            expected_output="A thoughtful investment perspective with appropriate disclaimers",
-            agent=self.agents['investment_advisor']
-        )
+        llm = self._run_llm()
+        agents = {template.key: template.build(llm) for template in self.agent_templates}
         
-        self.tasks = [research_task, analysis_task, recommendation_task]
-        return self.tasks
+        consideration = "Additional consideration: " + user_query if user_query else ""
+        tasks = {}
+        for template in self.task_templates:
+            tasks[template.key] = Task(
+                description=template.description.format(
+                    company_name=company_name, consideration=consideration),
+                expected_output=template.expected_output,
+                agent=agents[template.agent],
+                context=[tasks[key] for key in template.context] or None
+            )
+        
+        return RunContext(company_name, user_query, agents, list(tasks.values()))
     
-    def analyze(self, company_name: str, user_query: str = None):
-        """Run the financial analysis crew"""
+    def analyze(self, company_name: str, user_query: str = None, use_cache: bool = True):
+        """Run the financial analysis crew (or return a fresh cached result)
+        
+        With use_cache=False the result cache is neither read nor written, so
+        benchmark and forced runs leave cached analyses alone.
+        """
         try:
-            # Clear previous results
-            self.intermediate_results = []
+            # Serve a cached analysis if one is still within its TTL
+            if use_cache and self.result_cache:
+                cached, age = self.result_cache.get(company_name, user_query, self.prompt_version)
+                if cached is not None:
+                    print(f"⚡ Using cached analysis of {company_name} ({age:.0f}s old)")
+                    cached.update({'cached': True, 'cache_age_seconds': age})
+                    return cached
+            
+            from crewai import Crew, Process
             
-            # Create tasks
-            self.create_tasks(company_name, user_query)
+            run = self.create_run(company_name, user_query)
+            
+            # Task progress goes to the metrics and, under analyze_stream(), the event stream
+            sequential = self.process != "dag"
+            run.metrics = MetricsRecorder(company_name, user_query, self.process)
+            run.tracker = TaskTracker(run.tasks, observers=[run.metrics, current_stream()],
+                                      sequential=sequential)
             
             # Create and run crew
-            self.crew = Crew(
-                agents=list(self.agents.values()),
-                tasks=self.tasks,
+            run.crew = Crew(
+                agents=list(run.agents.values()),
+                tasks=run.tasks,
                 process=Process.sequential,
                 verbose=True,
                 memory=False,  # Disable memory to avoid errors
                 cache=False,    # Disable cache to avoid errors
-                max_rpm=10
+                task_callback=run.tracker.task_finished if sequential else None
             )
             
+            # Rate limits are enforced process-wide by the shared LLM scheduler
             print(f"\n🚀 Starting analysis of {company_name}...")
-            result = self.crew.kickoff()
+            with get_scheduler().flow(company_name), run.metrics.activate(), run.tracker.activate():
+                if sequential:
+                    result = run.crew.kickoff()
+                else:
+                    from dag_process import run_dag
+                    result = run_dag(run.crew, listener=run.tracker)
             
             # Return final result
             final_result = {
@@ -157,20 +272,100 @@ class FinancialAnalysisCrew:
                 'query': user_query,
                 'timestamp': datetime.now().isoformat(),
                 'analysis': str(result),
+                'task_outputs': [
+                    {'agent': task.agent.role, 'output': task.output.raw_output}
+                    for task in run.tasks if task.output is not None
+                ],
+                'metrics': run.metrics.summary(),
                 'status': 'success'
             }
             
+            self._record_metrics(final_result['metrics'])
+            
+            if use_cache and self.result_cache:
+                self.result_cache.put(company_name, user_query, self.prompt_version, final_result)
+            
+            final_result.update({'cached': False, 'cache_age_seconds': None})
             return final_result
             
         except Exception as e:
             print(f"❌ Error during analysis: {e}")
-            return {
-                'company': company_name,
-                'query': user_query,
-                'timestamp': datetime.now().isoformat(),
-                'analysis': f"Error occurred: {str(e)}",
-                'status': 'error'
-            }
+            return self._error_result(company_name, user_query, e)
+    
+    def analyze_stream(self, company_name: str, user_query: str = None, use_cache: bool = True):
+        """Run the analysis in the background and yield events as they happen
+        
+        Yields TaskStarted, TokenChunk and TaskFinished events (see analysis_events)
+        while the crew works, then a single AnalysisFinished carrying the same
+        result dict analyze() returns. A cached result yields only AnalysisFinished.
+        """
+        stream = EventStream()
+        
+        def run():
+            result = None
+            try:
+                with stream.activate():
+                    result = self.analyze(company_name, user_query, use_cache)
+            except BaseException as e:
+                result = self._error_result(company_name, user_query, e)
+            finally:
+                stream.emit(AnalysisFinished(result=result))
+                stream.close()
+        
+        threading.Thread(target=run, name=f"analysis-{company_name}", daemon=True).start()
+        yield from stream
+    
+    async def analyze_async(self, company_name: str, user_query: str = None):
+        """Run the analysis in a worker thread without blocking the event loop"""
+        return await asyncio.to_thread(self.analyze, company_name, user_query)
+    
+    async def analyze_many_async(self, companies, user_query: str = None, concurrency: int = 4):
+        """Analyze several companies at once, at most `concurrency` at a time
+        
+        Results come back in the same order as `companies` and have the same
+        shape as analyze(); failures become 'error' results.
+        """
+        companies = list(companies)
+        slots = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run_one(company_name):
+            async with slots:
+                return await self.analyze_async(company_name, user_query)
+        
+        results = await asyncio.gather(
+            *(run_one(company) for company in companies),
+            return_exceptions=True
+        )
+        
+        return [
+            self._error_result(company, user_query, result)
+            if isinstance(result, BaseException) else result
+            for company, result in zip(companies, results)
+        ]
+    
+    def analyze_many(self, companies, user_query: str = None, concurrency: int = 4):
+        """Blocking wrapper around analyze_many_async() for scripts and batch jobs"""
+        return asyncio.run(self.analyze_many_async(companies, user_query, concurrency))
+    
+    def _record_metrics(self, metrics: dict):
+        """Hand a run's metrics to the sink; a failing sink never fails the analysis"""
+        try:
+            (self.metrics_sink or get_metrics_sink()).record(metrics)
+        except Exception as e:
+            print(f"⚠️ Could not record metrics: {e}")
+    
+    @staticmethod
+    def _error_result(company_name: str, user_query: str, error: BaseException):
+        """Build the result dict returned when an analysis fails"""
+        return {
+            'company': company_name,
+            'query': user_query,
+            'timestamp': datetime.now().isoformat(),
+            'analysis': f"Error occurred: {str(error)}",
+            'status': 'error',
+            'cached': False,
+            'cache_age_seconds': None
+        }
 
 # Test the crew if run directly
 if __name__ == "__main__":
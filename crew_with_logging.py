@@ -2,20 +2,24 @@
 Enhanced Financial Analysis Crew with Agent Communication Visibility
 """
 from crewai import Agent, Crew, Task, Process
-from langchain_openai import ChatOpenAI
 import os
 from datetime import datetime
 import json
 from dotenv import load_dotenv
-import sys
-from io import StringIO
+
+from agent_trace import AgentTrace
+from analysis_events import TaskTracker
+from llm_client import copy_for_run, create_llm
+from rate_limiter import get_scheduler
+from trace_store import get_trace_store
+from transcript_parser import iter_messages
 
 # Load environment variables
 load_dotenv()
 
 # Initialize LLM
 try:
-    llm = ChatOpenAI(
+    llm = create_llm(
         model="gpt-3.5-turbo",
         temperature=0.1,
         api_key=os.getenv("OPENAI_API_KEY")
@@ -26,13 +30,18 @@ except Exception as e:
     llm = None
 
 class FinancialAnalysisCrewWithLogging:
-    def __init__(self):
-        self.agents = self._create_agents()
-        self.agent_logs = []
-        self.captured_output = []
-        
-    def _create_agents(self):
+    """Crew whose agents report every step to a per-run AgentTrace
+    
+    Agents are built per analyze() call, so one instance can run several
+    analyses at once and each gets its own trace.
+    """
+    
+    def _create_agents(self, trace: AgentTrace = None):
         """Create the financial analysis agents with enhanced visibility"""
+        run_llm = copy_for_run(llm) if llm is not None else None
+        
+        def step_callback(role):
+            return trace.step_callback(role) if trace is not None else None
         
         # Financial Analyst Agent
         financial_analyst = Agent(
@@ -43,8 +52,9 @@ class FinancialAnalysisCrewWithLogging:
             based on your training knowledge up to your cutoff date. Always explain your reasoning.""",
             verbose=True,
             allow_delegation=False,
-            llm=llm,
-            max_iter=2
+            llm=run_llm,
+            max_iter=2,
+            step_callback=step_callback('Senior Financial Analyst')
         )
         
         # Research Analyst Agent
@@ -56,8 +66,9 @@ class FinancialAnalysisCrewWithLogging:
             Always start by acknowledging what you're researching and your approach.""",
             verbose=True,
             allow_delegation=False,
-            llm=llm,
-            max_iter=2
+            llm=run_llm,
+            max_iter=2,
+            step_callback=step_callback('Investment Research Analyst')
         )
         
         # Investment Advisor Agent
@@ -69,8 +80,9 @@ class FinancialAnalysisCrewWithLogging:
             that this is educational content and not personalized financial advice.""",
             verbose=True,
             allow_delegation=False,
-            llm=llm,
-            max_iter=2
+            llm=run_llm,
+            max_iter=2,
+            step_callback=step_callback('Senior Investment Advisor')
         )
         
         return {
@@ -79,8 +91,9 @@ class FinancialAnalysisCrewWithLogging:
             'investment_advisor': investment_advisor
         }
     
-    def create_tasks(self, company_name: str, user_query: str = None):
+    def create_tasks(self, company_name: str, user_query: str = None, agents: dict = None):
         """Create tasks for analyzing a specific company"""
+        agents = agents or self._create_agents()
         
         # Task 1: Company Research
         research_task = Task(
@@ -94,7 +107,7 @@ class FinancialAnalysisCrewWithLogging:
 Start your response with: "🔍 Research Analyst here. I'm researching {company_name}..."
 Explain your findings clearly and note any limitations in your knowledge.""",
             expected_output="A comprehensive research report with clear explanations",
-            agent=self.agents['research_analyst']
+            agent=agents['research_analyst']
         )
         
         # Task 2: Financial Analysis
@@ -109,7 +122,7 @@ Explain your findings clearly and note any limitations in your knowledge.""",
 Start your response with: "📊 Financial Analyst here. Based on the research..."
 Explain your analytical process and reasoning.""",
             expected_output="A detailed financial analysis with clear reasoning",
-            agent=self.agents['financial_analyst']
+            agent=agents['financial_analyst']
         )
         
         # Task 3: Investment Recommendation
@@ -127,108 +140,63 @@ Start with: "💡 Investment Advisor here. After reviewing the analysis..."
 
 Remember to note this is educational content only.""",
             expected_output="Clear investment recommendations with rationale",
-            agent=self.agents['investment_advisor']
+            agent=agents['investment_advisor']
         )
         
         return [research_task, analysis_task, recommendation_task]
     
     def capture_agent_output(self, output_stream):
-        """Capture and parse agent outputs"""
-        output = output_stream.getvalue()
-        lines = output.split('\n')
-        
-        agent_messages = []
-        current_agent = None
-        current_message = []
-        
-        for line in lines:
-            # Detect agent headers
-            if "Research Analyst here" in line:
-                if current_agent and current_message:
-                    agent_messages.append({
-                        'agent': current_agent,
-                        'message': '\n'.join(current_message)
-                    })
-                current_agent = "Research Analyst"
-                current_message = [line]
-            elif "Financial Analyst here" in line:
-                if current_agent and current_message:
-                    agent_messages.append({
-                        'agent': current_agent,
-                        'message': '\n'.join(current_message)
-                    })
-                current_agent = "Financial Analyst"
-                current_message = [line]
-            elif "Investment Advisor here" in line:
-                if current_agent and current_message:
-                    agent_messages.append({
-                        'agent': current_agent,
-                        'message': '\n'.join(current_message)
-                    })
-                current_agent = "Investment Advisor"
-                current_message = [line]
-            elif current_agent and line.strip():
-                current_message.append(line)
-        
-        # Add final message
-        if current_agent and current_message:
-            agent_messages.append({
-                'agent': current_agent,
-                'message': '\n'.join(current_message)
-            })
-        
-        return agent_messages
+        """Parse agent messages out of a verbose transcript (a text file object)"""
+        return list(iter_messages(output_stream))
     
-    def analyze(self, company_name: str, user_query: str = None):
-        """Run the financial analysis crew with output capture"""
+    def analyze(self, company_name: str, user_query: str = None, trace: AgentTrace = None):
+        """Run the financial analysis crew, recording each agent step in `trace`
+        
+        Subscribe to the trace before calling (trace.subscribe()) to follow the
+        run as it happens; the trace is closed when the run ends. The trace is
+        also written to the trace store, where trace_store.replay(run_id) reads it back.
+        """
+        trace = trace or AgentTrace()
+        store = get_trace_store()
+        if store is not None:
+            trace.add_listener(store.listener(trace.run_id, company_name, user_query))
         try:
-            # Clear previous logs
-            self.agent_logs = []
-            
-            # Create tasks
-            tasks = self.create_tasks(company_name, user_query)
+            agents = self._create_agents(trace)
+            tasks = self.create_tasks(company_name, user_query, agents)
+            tracker = TaskTracker(tasks, observers=[trace])
             
             # Create crew
             crew = Crew(
-                agents=list(self.agents.values()),
+                agents=list(agents.values()),
                 tasks=tasks,
                 process=Process.sequential,
                 verbose=True,
                 memory=False,
                 cache=False,
-                max_rpm=10
+                task_callback=tracker.task_finished
             )
             
             print(f"\n🚀 Starting analysis of {company_name}...")
             
-            # Capture stdout to get agent outputs
-            old_stdout = sys.stdout
-            sys.stdout = captured_output = StringIO()
-            
-            try:
+            with get_scheduler().flow(company_name), tracker.activate():
                 result = crew.kickoff()
-                
-                # Restore stdout
-                sys.stdout = old_stdout
-                
-                # Parse captured output
-                agent_messages = self.capture_agent_output(captured_output)
-                
-                # Structure the result with agent communications
-                final_result = {
-                    'company': company_name,
-                    'query': user_query,
-                    'timestamp': datetime.now().isoformat(),
-                    'analysis': str(result),
-                    'agent_communications': agent_messages,
-                    'status': 'success'
-                }
-                
-                return final_result
-                
-            finally:
-                # Always restore stdout
-                sys.stdout = old_stdout
+            
+            # Each task's output is one agent message
+            agent_messages = [
+                {'agent': task.agent.role, 'message': task.output.raw_output}
+                for task in tasks if task.output is not None
+            ]
+            
+            # Structure the result with agent communications
+            return {
+                'company': company_name,
+                'query': user_query,
+                'timestamp': datetime.now().isoformat(),
+                'analysis': str(result),
+                'agent_communications': agent_messages,
+                'run_id': trace.run_id,
+                'status': 'success'
+            }
                 
         except Exception as e:
             print(f"❌ Error during analysis: {e}")
@@ -238,5 +206,8 @@ Remember to note this is educational content only.""",
                 'timestamp': datetime.now().isoformat(),
                 'analysis': f"Error occurred: {str(e)}",
                 'agent_communications': [],
+                'run_id': trace.run_id,
                 'status': 'error'
             }
+        finally:
+            trace.close()
@@ -0,0 +1,82 @@
+"""
+DAG task process - independent tasks run concurrently
+
+A task's dependencies are the tasks in its crewai `context` list. Tasks without
+pending dependencies run in parallel; each task starts as soon as every task it
+depends on has finished. Select it with `crew.process: dag` in config.yaml.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+import contextvars
+import threading
+
+from crewai.utilities import I18N
+
+
+def _prepare_agents(crew):
+    """The per-agent setup Crew.kickoff() does before running any task"""
+    i18n = I18N(language=crew.language, language_file=crew.language_file)
+    for agent in crew.agents:
+        agent.i18n = i18n
+        agent.crew = crew
+        if not agent.function_calling_llm:
+            agent.function_calling_llm = crew.function_calling_llm
+        if not agent.step_callback:
+            agent.step_callback = crew.step_callback
+        agent.create_agent_executor()
+
+
+def run_dag(crew, max_workers: int = None, listener=None) -> str:
+    """Run crew.tasks as a dependency graph and return the last task's output
+
+    `listener` (e.g. an analysis_events.TaskTracker) may provide start_task(index),
+    finish_task(index, output) and task_scope(index) to observe progress.
+    """
+    tasks = list(crew.tasks)
+    index_of = {id(task): index for index, task in enumerate(tasks)}
+    depends_on = {}
+    for index, task in enumerate(tasks):
+        deps = [index_of[id(dep)] for dep in (task.context or []) if id(dep) in index_of]
+        depends_on[index] = set(deps)
+
+    _prepare_agents(crew)
+
+    # An agent's executor is rebuilt per task, so one agent runs one task at a time
+    agent_locks = {id(agent): threading.Lock() for agent in crew.agents}
+
+    def execute(index):
+        task = tasks[index]
+        lock = agent_locks.get(id(task.agent)) or threading.Lock()
+        scope = listener.task_scope(index) if listener is not None else nullcontext()
+        with lock, scope:
+            if listener is not None:
+                listener.start_task(index)
+            output = task.execute()
+            if listener is not None:
+                listener.finish_task(index, task.output)
+            return output
+
+    finished = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1,
+                            thread_name_prefix="dag-task") as pool:
+        while len(finished) < len(tasks):
+            for index in range(len(tasks)):
+                if (index not in finished and index not in running.values()
+                        and depends_on[index] <= finished):
+                    # Each task gets its own copy of the caller's context
+                    # (rate-limiter flow, event stream)
+                    context = contextvars.copy_context()
+                    running[pool.submit(context.run, execute, index)] = index
+
+            if not running:
+                pending = sorted(set(range(len(tasks))) - finished)
+                raise ValueError(f"Task dependencies contain a cycle: tasks {pending}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                future.result()  # Re-raise task failures
+                finished.add(index)
+
+    return tasks[-1].output.exported_output
@@ -0,0 +1,102 @@
+"""
+Persistent LLM response cache - repeat prompts are answered from disk instead of the API
+
+Entries are content-addressed: the key is a hash of the model settings (model name,
+temperature, ...) plus the full serialized message list, so any prompt change is a miss.
+"""
+import hashlib
+import json
+import threading
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from cache_store import ResponseCache, cache_directory
+from config_loader import get_setting
+
+# Model settings that change the completion; everything else in the llm string
+# (callbacks, the cache object itself, API keys) is ignored when building keys
+KEY_PARAMS = (
+    "model_name", "model", "temperature", "top_p", "max_tokens", "n",
+    "presence_penalty", "frequency_penalty", "seed", "stop", "response_format",
+)
+
+# generation_info flag on generations answered from the cache, so callbacks can
+# tell them from API calls (LangChain reports both to on_llm_end)
+CACHE_HIT = "response_cache_hit"
+
+
+def _model_key(llm_string: str) -> str:
+    """Reduce LangChain's llm string to the settings that affect the completion"""
+    head, _, call_params = llm_string.rpartition("---")
+    try:
+        kwargs = json.loads(head).get("kwargs", {})
+    except (ValueError, AttributeError):
+        # Not a serialized model - the llm string is already a param listing
+        return llm_string
+    settings = {k: kwargs[k] for k in KEY_PARAMS if k in kwargs}
+    return json.dumps(settings, sort_keys=True) + "---" + call_params
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain cache adapter: pass as `ChatOpenAI(cache=...)`"""
+
+    def __init__(self, store: ResponseCache):
+        self.store = store
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(_model_key(llm_string).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        value = self.store.get(self.make_key(prompt, llm_string))
+        if value is None:
+            return None
+        try:
+            generations = [loads(generation) for generation in json.loads(value)]
+        except Exception:
+            # Written by an incompatible LangChain version - treat as a miss
+            return None
+        for generation in generations:
+            generation.generation_info = {**(generation.generation_info or {}), CACHE_HIT: True}
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        value = json.dumps([dumps(generation) for generation in return_val])
+        self.store.set(self.make_key(prompt, llm_string), value)
+
+    def clear(self, **kwargs):
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+    def __repr__(self):
+        return f"LLMResponseCache(path='{self.store.path}')"
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide LLM response cache, or None when disabled in config.yaml"""
+    global _response_cache
+    if not get_setting("llm_cache.enabled", True):
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            ttl_hours = get_setting("llm_cache.ttl_hours", 168)
+            store = ResponseCache(
+                cache_directory() / "llm_responses.sqlite",
+                ttl_seconds=ttl_hours * 3600 if ttl_hours else None,
+                max_entries=get_setting("llm_cache.max_entries", 5000),
+                max_bytes=get_setting("llm_cache.max_mb", 256) * 1024 * 1024,
+                memory_entries=get_setting("llm_cache.memory_entries", 256),
+            )
+            _response_cache = LLMResponseCache(store)
+        return _response_cache
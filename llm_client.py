@@ -0,0 +1,177 @@
+"""
+Shared ChatOpenAI construction - response cache plus process-wide rate limiting
+"""
+import asyncio
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessageChunk, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk
+from langchain_openai import ChatOpenAI
+
+from analysis_events import current_stream
+from analysis_metrics import current_metrics
+from config_loader import get_setting
+from llm_cache import CACHE_HIT, get_response_cache
+from rate_limiter import estimate_tokens, get_scheduler
+
+
+def _prompt_tokens(messages) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+def _from_cache(result) -> bool:
+    return any((generation.generation_info or {}).get(CACHE_HIT)
+               for generations in result.generations for generation in generations)
+
+
+def _used_tokens(result):
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    return usage.get("total_tokens")
+
+
+class TokenForwarder(BaseCallbackHandler):
+    """Forwards streamed tokens to the EventStream of the analysis making the call"""
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        stream = current_stream()
+        if stream is not None:
+            stream.token(token)
+
+
+class MetricsForwarder(BaseCallbackHandler):
+    """Reports every LLM call to the MetricsRecorder of the analysis making it
+
+    Token counts come from the API's usage report when there is one; streamed
+    responses carry none, so those are estimated from the text. Answers from
+    the response cache (streamed or not) are counted as cache hits, not as calls.
+    """
+
+    def __init__(self):
+        self._prompts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._prompts[run_id] = sum(_prompt_tokens(batch) for batch in messages)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._prompts[run_id] = sum(estimate_tokens(prompt) for prompt in prompts)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = self._prompts.pop(run_id, 0)
+        recorder = current_metrics()
+        if recorder is None:
+            return
+        if _from_cache(response):
+            recorder.record_cache_hit()
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            recorder.record_llm_call(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+        else:
+            completion = sum(estimate_tokens(generation.text)
+                             for generations in response.generations for generation in generations)
+            recorder.record_llm_call(prompt_tokens, completion)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._prompts.pop(run_id, None)
+        recorder = current_metrics()
+        if recorder is not None:
+            recorder.record_llm_error()
+
+
+def _record_wait(reservation):
+    recorder = current_metrics()
+    if recorder is not None:
+        recorder.record_wait(reservation.wait_seconds)
+
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose API calls wait for the shared LLMScheduler
+
+    Only real API calls are scheduled: cache hits never consume rate-limit capacity.
+    """
+
+    def _reservation_size(self, messages) -> int:
+        completion = self.max_tokens or get_setting("rate_limits.estimated_completion_tokens", 500)
+        return _prompt_tokens(messages) + completion
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        scheduler = get_scheduler()
+        reservation = scheduler.acquire(self._reservation_size(messages))
+        _record_wait(reservation)
+        result = None
+        try:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return result
+        finally:
+            scheduler.settle(reservation, _used_tokens(result) if result else None)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        scheduler = get_scheduler()
+        reservation = await asyncio.to_thread(scheduler.acquire, self._reservation_size(messages))
+        _record_wait(reservation)
+        result = None
+        try:
+            result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return result
+        finally:
+            scheduler.settle(reservation, _used_tokens(result) if result else None)
+
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        # crewai's agent executor calls llm.stream(), which LangChain sends straight
+        # to _stream - past both the response cache and _generate - so both are
+        # applied here as well
+        cache = self.cache if isinstance(self.cache, BaseCache) else None
+        if cache is not None:
+            llm_string = self._get_llm_string(stop=stop, **kwargs)
+            prompt = dumps(messages)
+            cached = cache.lookup(prompt, llm_string)
+            if cached:
+                # The CACHE_HIT flag in generation_info reaches the callbacks
+                for generation in cached:
+                    yield ChatGenerationChunk(
+                        message=AIMessageChunk(content=generation.text),
+                        generation_info=generation.generation_info
+                    )
+                return
+
+        scheduler = get_scheduler()
+        reservation = scheduler.acquire(self._reservation_size(messages))
+        _record_wait(reservation)
+        streamed = None
+        try:
+            for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                streamed = chunk if streamed is None else streamed + chunk
+                yield chunk
+        finally:
+            completion = estimate_tokens(streamed.text) if streamed else 0
+            scheduler.settle(reservation, _prompt_tokens(messages) + completion)
+
+        if cache is not None and streamed is not None:
+            cache.update(prompt, llm_string, [ChatGeneration(
+                message=message_chunk_to_message(streamed.message),
+                generation_info=streamed.generation_info
+            )])
+
+
+def copy_for_run(llm, *callbacks):
+    """A copy of `llm` with its own callback list (plus `callbacks`) for one run
+
+    crewai appends a token counter to llm.callbacks for every Agent it builds;
+    building agents on a copy keeps the shared client from collecting one per run.
+    The copy shares the HTTP client and the response cache.
+    """
+    # copy() drops fields declared with exclude=True (callbacks, tags, metadata),
+    # so every field is passed explicitly
+    fields = {name: getattr(llm, name) for name in llm.__fields__}
+    fields['callbacks'] = list(llm.callbacks or []) + list(callbacks)
+    return llm.copy(update=fields)
+
+
+def create_llm(**kwargs) -> ChatOpenAI:
+    """Build a rate-limited, response-cached ChatOpenAI client that streams tokens"""
+    kwargs.setdefault("cache", get_response_cache())
+    kwargs.setdefault("callbacks", [TokenForwarder()])
+    return ScheduledChatOpenAI(**kwargs)
@@ -0,0 +1,88 @@
+"""
+Embedding cache benchmark
+
+Chunks synthetic filings (which share boilerplate the way real 10-Ks do) and
+embeds them through CachedEmbeddings backed by a counting stand-in embedder with
+a fixed per-request latency. It reports, per filing, the cache hit rate and the
+embedding requests saved: a second filing reuses the shared text, and
+re-chunking the first one with a different overlap mostly hits.
+
+Usage (from multi-agent-example/): python benchmarks/bench_embedding_cache.py
+"""
+import hashlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from testing.local_sec_server import synthetic_filing
+from tools.embedding_cache import CachedEmbeddings, EmbeddingStore
+
+DIM = 1536
+
+
+class CountingEmbedder(Embeddings):
+  """Deterministic pseudo-embeddings; sleeps `latency` per request like a remote API"""
+  model = "counting-stand-in"
+
+  def __init__(self, latency=0.05):
+    self.latency = latency
+    self.requests = 0
+    self.texts = 0
+
+  def embed_documents(self, texts):
+    time.sleep(self.latency)
+    self.requests += 1
+    self.texts += len(texts)
+    return [self._vector(text) for text in texts]
+
+  def embed_query(self, text):
+    return self._vector(text)
+
+  @staticmethod
+  def _vector(text):
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(DIM, dtype=np.float32).tolist()
+
+
+def chunks(text, chunk_size=1200, overlap=200):
+  return CharacterTextSplitter(separator="\n", chunk_size=chunk_size, chunk_overlap=overlap,
+                               length_function=len, is_separator_regex=False).split_text(text)
+
+
+def main():
+  filing_a = synthetic_filing(1, 3 * 1024 * 1024)
+  filing_b = synthetic_filing(2, 3 * 1024 * 1024)
+  runs = [
+    ("filing A", chunks(filing_a)),
+    ("filing A again", chunks(filing_a)),
+    ("filing B (shared boilerplate)", chunks(filing_b)),
+    ("filing A, overlap 300", chunks(filing_a, overlap=300)),
+  ]
+
+  for dtype in ("float32", "float16"):
+    with tempfile.TemporaryDirectory() as tmp:
+      inner = CountingEmbedder()
+      embeddings = CachedEmbeddings(inner, store=EmbeddingStore(tmp, dtype=dtype), max_batch_items=256)
+      print(f"🧮 {dtype} store")
+      print(f"  {'run':<30} {'chunks':>7} {'hit rate':>9} {'requests':>9} {'saved':>6} {'time':>9}")
+      for label, texts in runs:
+        start = time.perf_counter()
+        embeddings.embed_documents(texts)
+        report = embeddings.last_report
+        print(f"  {label:<30} {report['chunks']:>7} {report['hit_rate']:>9.0%} {report['requests']:>9} "
+              f"{report['requests_saved']:>6} {time.perf_counter() - start:>7.2f} s")
+      stats = embeddings.stats()
+      print(f"  store: {stats['store']['entries']} vectors, {stats['store']['bytes'] / 1024 / 1024:.1f} MB; "
+            f"stand-in saw {inner.requests} requests for {inner.texts} texts\n")
+
+
+if __name__ == "__main__":
+  main()
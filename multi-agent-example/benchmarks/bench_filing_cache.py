@@ -0,0 +1,59 @@
+"""
+Filing cache benchmark against a local HTTP stand-in
+
+Fetches the same synthetic filing the way repeated search_10k calls would:
+cold, again in the same process, from a fresh process-level cache (a new run),
+with forced revalidation, and past the size bound. It prints the request counts
+the local server saw, which show that a filing is downloaded once.
+
+Usage (from multi-agent-example/): python benchmarks/bench_filing_cache.py
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from testing.local_sec_server import LocalSECServer
+from tools.filing_cache import FilingCache
+
+
+def timed(label, fn):
+  start = time.perf_counter()
+  result = fn()
+  print(f"  {label:<38} {(time.perf_counter() - start) * 1000:8.1f} ms")
+  return result
+
+
+def main():
+  with LocalSECServer(filing_bytes=4 * 1024 * 1024) as server, tempfile.TemporaryDirectory() as tmp:
+    url = f"{server.url}/filing/1.htm"
+    path = Path(tmp) / "filings.sqlite"
+
+    print("📥 Filing cache (4 MB synthetic filing)")
+    cache = FilingCache(path)
+    text = timed("cold download", lambda: cache.get(url))
+    timed("same run, second tool call", lambda: cache.get(url))
+    next_run = FilingCache(path)
+    assert timed("next run (disk, decompress)", lambda: next_run.get(url)) == text
+    timed("revalidate (max_age=0, 304)", lambda: next_run.get(url, max_age=0))
+
+    stats = next_run.stats()
+    print(f"\n  server requests: {server.requests} "
+          f"(full responses {server.full_responses}, 304s {server.not_modified})")
+    print(f"  stored {stats['bytes'] / 1024:.0f} KB compressed for {stats['raw_bytes'] / 1024:.0f} KB of HTML "
+          f"({stats['raw_bytes'] / max(stats['bytes'], 1):.1f}x)")
+
+    print("\n🧹 Size bound: 5 filings into a cache that holds about 3")
+    bounded = FilingCache(Path(tmp) / "bounded.sqlite", max_bytes=int(stats['bytes'] * 3.5))
+    for number in range(2, 7):
+      bounded.get(f"{server.url}/filing/{number}.htm")
+    stats = bounded.stats()
+    print(f"  entries {stats['entries']}, evictions {stats['evictions']}, "
+          f"{stats['bytes'] / 1024:.0f} KB <= {bounded.max_bytes / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+  main()
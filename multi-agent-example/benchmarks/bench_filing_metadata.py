@@ -0,0 +1,105 @@
+"""
+Latest-filing resolution: per-call searches vs the metadata cache
+
+Resolves the latest 10-K and 10-Q of the configured tickers (plus two unknown
+ones) the way repeated tool calls do, against the local stand-in for the
+sec-api.io query API. It compares searches and time per lookup for a bare
+SECQueryClient, FilingMetadataCache on its own, and after a bulk refresh(). It
+also shows the TTLs that filing age gives and that expired and unknown
+entries behave as intended.
+
+Usage (from multi-agent-example/): python benchmarks/bench_filing_metadata.py [--calls 5]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from testing.local_sec_server import LocalSECServer
+from tools.filing_metadata import DAY, HOUR, FilingMetadataCache
+from tools.http_client import PooledSession, SECQueryClient
+from tools.warmer import load_warmer_config
+
+FORMS = ("10-K", "10-Q")
+UNKNOWN = ("ZZZQ", "NOPEX")
+
+
+class Clock():
+  def __init__(self):
+    self.now = time.time()
+
+  def __call__(self):
+    return self.now
+
+
+def lookups(resolve, tickers, calls):
+  """Time per lookup of `calls` rounds over every (ticker, form)"""
+  start = time.perf_counter()
+  for _ in range(calls):
+    for ticker in tickers:
+      for form in FORMS:
+        resolve(ticker, form)
+  return (time.perf_counter() - start) / (calls * len(tickers) * len(FORMS))
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--calls", type=int, default=5, help="tool calls per (ticker, form)")
+  args = parser.parse_args()
+
+  tickers = load_warmer_config()['tickers'] + list(UNKNOWN)
+  filed = datetime.now(timezone.utc) - timedelta(days=10)
+  with LocalSECServer(filing_bytes=1024, unknown_tickers=UNKNOWN, filed_at=filed.isoformat()) as server, \
+       tempfile.TemporaryDirectory() as tmp:
+    client = SECQueryClient("local", PooledSession(), endpoint=server.url)
+    lookups_total = args.calls * len(tickers) * len(FORMS)
+    print(f"🔍 {len(tickers)} tickers x {len(FORMS)} forms x {args.calls} calls = {lookups_total} lookups")
+
+    per_lookup = lookups(client.latest_filing, tickers, args.calls)
+    print(f"  uncached:        {server.searches:>4} searches, {per_lookup * 1000:.2f} ms/lookup")
+
+    server.searches = 0
+    cache = FilingMetadataCache(Path(tmp) / "lazy.sqlite", client)
+    per_lookup = lookups(cache.latest, tickers, args.calls)
+    print(f"  cached:          {server.searches:>4} searches, {per_lookup * 1000:.2f} ms/lookup "
+          f"({cache.stats()['negative_hits']} negative hits)")
+
+    server.searches = 0
+    cache = FilingMetadataCache(Path(tmp) / "bulk.sqlite", client)
+    start = time.perf_counter()
+    for form in FORMS:
+      cache.refresh(tickers, form)
+    refresh = time.perf_counter() - start
+    refreshed = server.searches
+    per_lookup = lookups(cache.latest, tickers, args.calls)
+    print(f"  bulk refresh:    {refreshed:>4} searches in {refresh * 1000:.0f} ms, then "
+          f"{server.searches - refreshed} searches, {per_lookup * 1000:.2f} ms/lookup")
+
+    clock = Clock()
+    cache = FilingMetadataCache(Path(tmp) / "ttl.sqlite", client, clock=clock)
+    for days in (10, 60, 85, 300, 400):
+      filing = {'filedAt': (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()}
+      ttls = ", ".join(f"{form} {cache.ttl(form, filing, clock.now) / HOUR:.0f} h" for form in FORMS)
+      print(f"  ttl, filed {days:>3} days ago: {ttls}")
+
+    server.searches = 0
+    cache.latest("AAPL", "10-Q")
+    cache.latest(UNKNOWN[0], "10-Q")
+    clock.now += DAY - 60
+    cache.latest("AAPL", "10-Q")
+    cache.latest(UNKNOWN[0], "10-Q")
+    before = server.searches
+    clock.now += 7 * DAY
+    cache.latest("AAPL", "10-Q")
+    cache.latest(UNKNOWN[0], "10-Q")
+    print(f"  expiry: {before} searches within a day, {server.searches - before} more after a week "
+          f"(10-Q filed 10 days ago, unknown ticker)")
+
+
+if __name__ == "__main__":
+  main()
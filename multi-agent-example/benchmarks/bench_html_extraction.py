@@ -0,0 +1,124 @@
+"""
+HTML extraction benchmark: streaming pipeline vs whole-document
+
+Runs each pipeline on large filings stored locally, in a fresh subprocess, and
+reports throughput and peak RSS growth:
+
+  stream  64 KB byte chunks -> iter_text_blocks -> iter_chunks
+  whole   read + decode the file, parse it in one go, join every block into one
+          string, then CharacterTextSplitter (the copies the old
+          partition_html path made; unstructured itself isn't needed)
+
+Pass real filings with --files; otherwise synthetic inline-XBRL filings of
+--sizes MB are generated in a temporary directory.
+
+Usage (from multi-agent-example/): python benchmarks/bench_html_extraction.py [--sizes 10,50] [--files a.htm,b.htm]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CHUNK = 1 << 16
+
+
+def rss_kb(field):
+  with open("/proc/self/status") as f:
+    for line in f:
+      if line.startswith(field):
+        return int(line.split()[1])
+  return 0
+
+
+def write_synthetic_filing(path, size_bytes):
+  """Inline-XBRL style 10-K: a hidden ix:header of facts, Item sections, tagged tables"""
+  with open(path, "w", encoding="utf-8") as f:
+    f.write('<html xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"><head><title>10-K</title>'
+            '<style>td{padding:0}</style></head><body>')
+    f.write('<div style="display:none"><ix:header><ix:hidden>')
+    f.write("".join(f'<ix:nonNumeric name="dei:Fact{i}" contextRef="c-{i}">fact {i}</ix:nonNumeric>'
+                    for i in range(2000)))
+    f.write("</ix:hidden></ix:header></div>")
+    written, item, row = 0, 1, 0
+    while written < size_bytes:
+      parts = [f'<div><span style="font-weight:700">Item {item}.&#160;Section {item}</span></div>']
+      for i in range(25):
+        parts.append(f'<div><span style="font-family:Times New Roman;font-size:10pt">Revenue increased '
+                     f'{(i + item) % 17}% driven by growth in cloud services. We face intense competition '
+                     f'and regulatory scrutiny in paragraph {row + i}.</span></div>')
+      parts.append('<table style="border-collapse:collapse">' + "".join(
+        f'<tr><td style="padding:2px"><span>Line item {row + r}</span></td><td><span>$</span></td>'
+        f'<td><ix:nonFraction name="us-gaap:Revenues" contextRef="c-{r}" unitRef="usd" decimals="-6" '
+        f'scale="6">{(row + r) * 1013 % 99991:,}</ix:nonFraction></td></tr>' for r in range(30)) + "</table>")
+      text = "".join(parts)
+      f.write(text)
+      written += len(text)
+      row += 30
+      item = item % 15 + 1
+    f.write("</body></html>")
+
+
+def worker(mode, path):
+  from tools.html_text import BlockExtractor, iter_chunks, iter_text_blocks
+  base = rss_kb("VmRSS:")
+  start = time.perf_counter()
+  if mode == "stream":
+    def chunks():
+      with open(path, "rb") as f:
+        while True:
+          data = f.read(CHUNK)
+          if not data:
+            return
+          yield data
+    count = sum(1 for _ in iter_chunks(iter_text_blocks(chunks())))
+  else:
+    import logging
+    from langchain.text_splitter import CharacterTextSplitter
+    logging.disable(logging.WARNING)
+    html = Path(path).read_bytes().decode("utf-8")
+    parser = BlockExtractor()
+    parser.feed(html)
+    parser.close()
+    content = "\n".join(parser.blocks)
+    splitter = CharacterTextSplitter(separator="\n", chunk_size=3025, chunk_overlap=300,
+                                     length_function=len, is_separator_regex=False)
+    count = len(splitter.create_documents([content]))
+  elapsed = time.perf_counter() - start
+  print(json.dumps({'elapsed': elapsed, 'rss_kb': rss_kb("VmHWM:") - base, 'chunks': count}))
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--sizes", default="10,50", help="synthetic filing sizes in MB")
+  parser.add_argument("--files", default="", help="comma-separated local filings to use instead")
+  parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+  args = parser.parse_args()
+  if args.worker:
+    return worker(*args.worker)
+
+  with tempfile.TemporaryDirectory() as tmp:
+    files = [Path(name) for name in args.files.split(",") if name]
+    if not files:
+      for size in args.sizes.split(","):
+        path = Path(tmp) / f"synthetic-{size}mb.htm"
+        write_synthetic_filing(path, int(size) << 20)
+        files.append(path)
+
+    print(f"{'filing':<22} {'pipeline':<8} {'time':>8} {'MB/s':>7} {'peak RSS +':>11} {'chunks':>7}")
+    for path in files:
+      size_mb = path.stat().st_size / (1 << 20)
+      for mode in ("stream", "whole"):
+        out = subprocess.run([sys.executable, __file__, "--worker", mode, str(path)],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{path.name[:22]:<22} {mode:<8} {result['elapsed']:>7.2f}s {size_mb / result['elapsed']:>7.1f} "
+              f"{result['rss_kb'] / 1024:>8.1f} MB {result['chunks']:>7}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,74 @@
+"""
+Pooled HTTP client benchmark against a local HTTP stand-in
+
+Each simulated tool call does what search_10k does over the network: one filing
+search (POST) and one small page fetch (GET). Every new connection to the local
+server costs a simulated handshake (--handshake-ms), standing in for TCP/TLS
+setup to sec-api.io and sec.gov. The previous per-call clients (bare
+requests.post / requests.get) open two connections per call; the shared pooled
+session opens them once per pool slot.
+
+Usage (from multi-agent-example/): python benchmarks/bench_http_client.py [--calls 50] [--handshake-ms 30]
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from testing.local_sec_server import LocalSECServer
+from tools.http_client import PooledSession, SECQueryClient
+
+
+def bare_call(server, ticker):
+  query = {"query": {"query_string": {"query": f"ticker:{ticker} AND formType:\"10-K\""}}}
+  link = requests.post(server.url, params={'token': "x"}, json=query).json()['filings'][0]['linkToFilingDetails']
+  return requests.get(link).text
+
+
+def pooled_call(client, ticker):
+  link = client.latest_filing(ticker, "10-K")['linkToFilingDetails']
+  return client.session.get(link).text
+
+
+def measure(server, label, call, calls, workers):
+  server.connections = 0
+  latencies = []
+
+  def timed(i):
+    start = time.perf_counter()
+    call(["MSFT", "AAPL", "NVDA"][i % 3])
+    latencies.append(time.perf_counter() - start)
+
+  start = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=workers) as pool:
+    list(pool.map(timed, range(calls)))
+  total = time.perf_counter() - start
+  print(f"  {label:<28} {statistics.mean(latencies) * 1000:8.1f} ms {statistics.median(latencies) * 1000:8.1f} ms "
+        f"{total:7.2f} s {server.connections:>6}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--calls", type=int, default=50)
+  parser.add_argument("--handshake-ms", type=float, default=30)
+  args = parser.parse_args()
+
+  with LocalSECServer(filing_bytes=64 * 1024, handshake_delay=args.handshake_ms / 1000) as server:
+    client = SECQueryClient("x", session=PooledSession(pool_size=8), endpoint=server.url)
+    for workers in (1, 8):
+      print(f"🌐 {args.calls} tool calls, {workers} thread(s), {args.handshake_ms:.0f} ms per new connection")
+      print(f"  {'client':<28} {'mean':>11} {'median':>11} {'total':>9} {'conns':>6}")
+      measure(server, "per-call requests", lambda ticker: bare_call(server, ticker), args.calls, workers)
+      measure(server, "shared pooled session", lambda ticker: pooled_call(client, ticker), args.calls, workers)
+      print()
+
+
+if __name__ == "__main__":
+  main()
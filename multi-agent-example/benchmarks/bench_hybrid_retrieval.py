@@ -0,0 +1,100 @@
+"""
+Hybrid retrieval benchmark: BM25, vectors and their fusion
+
+Plants distinctive facts in a synthetic filing, chunks it, and asks for each
+fact with a keyword lookup and with a natural-language question. It reports
+how often the fact's chunk is in the top 4 for BM25 alone, vectors alone and
+FilingIndex (fusion with the lexical fast path), plus index size, build time,
+query latency and how many queries needed an embedding.
+
+The vector side uses the local hashing embedder and the tools' NumPy flat
+index, so it runs offline.
+
+Usage (from multi-agent-example/): python benchmarks/bench_hybrid_retrieval.py [--size 10]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_local_embeddings import planted_filing
+from tools.bm25 import BM25Index
+from tools.embeddings import HashingEmbeddings
+from tools.html_text import iter_text_blocks
+from tools.retrieval import FilingIndex, VectorStore
+from tools.text_splitter import TokenSplitter
+
+# (fact, keyword lookup, question)
+CASES = [
+  ("Total net revenue for fiscal year 2023 was $211,915 million, up 7 percent.",
+   "total net revenue", "what was total net revenue in fiscal 2023"),
+  ("Operating income increased to $88,523 million driven by Intelligent Cloud.",
+   "operating income Intelligent Cloud", "how much did operating income increase"),
+  ("A cybersecurity incident by a nation-state actor accessed senior leadership email accounts.",
+   "cybersecurity incident", "was there a cybersecurity incident affecting leadership email"),
+  ("The Board declared a quarterly dividend of $0.75 per share payable in December.",
+   "quarterly dividend", "what quarterly dividend per share did the board declare"),
+  ("Headcount was approximately 221,000 full-time employees as of June 30.",
+   "full-time employees headcount", "how many full-time employees are there"),
+]
+
+
+class CountingEmbeddings(HashingEmbeddings):
+  """Counts embedded questions; FilingIndex embeds them in batches via embed_documents"""
+  queries = 0
+
+  def embed_query(self, text):
+    self.queries += 1
+    return super().embed_query(text)
+
+  def embed_documents(self, texts):
+    self.queries += len(texts)
+    return super().embed_documents(texts)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--size", type=int, default=10, help="filing size in MB")
+  args = parser.parse_args()
+
+  html = planted_filing(args.size)
+  # planted_filing plants bench_local_embeddings.FACTS, which CASES mirrors
+  chunks = list(TokenSplitter().iter_chunks(iter_text_blocks([html])))
+
+  start = time.perf_counter()
+  lexical = BM25Index.build(chunks)
+  build = time.perf_counter() - start
+  postings = lexical.doc_ids.nbytes + lexical.tfs.nbytes + lexical.offsets.nbytes
+  embeddings = CountingEmbeddings()
+  index = FilingIndex(chunks, lexical, lambda texts: VectorStore.from_texts(texts, embeddings))
+  print(f"📚 {args.size} MB filing, {len(chunks)} chunks: BM25 built in {build * 1000:.0f} ms, "
+        f"{len(lexical.vocab)} terms, postings {postings / 1024:.0f} KB")
+
+  def found(fact, docs):
+    return any(fact in chunks[doc] for doc in docs[:4])
+
+  for label, column in (("keyword lookups", 1), ("questions", 2)):
+    hits = {'bm25': 0, 'vectors': 0, 'hybrid': 0}
+    latencies = []
+    before = embeddings.queries
+    for case in CASES:
+      fact, query = case[0], case[column]
+      hits['bm25'] += found(fact, [doc for doc, _ in lexical.search(query, 4)])
+      start = time.perf_counter()
+      results = index.search(query, k=4)
+      latencies.append(time.perf_counter() - start)
+      hits['hybrid'] += any(fact in chunk for chunk in results)
+    embedded = embeddings.queries - before
+    for case in CASES:
+      hits['vectors'] += found(case[0], index.vector_search(case[column], 4))
+    print(f"  {label:<16} top-4 hits: BM25 {hits['bm25']}/5, vectors {hits['vectors']}/5, "
+          f"hybrid {hits['hybrid']}/5; {statistics.mean(latencies) * 1000:.1f} ms/query, "
+          f"{embedded} of {len(CASES)} queries embedded")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,112 @@
+"""
+Section-scoped search benchmark
+
+Plants facts in specific Item sections of a synthetic 10-K (with look-alike
+decoys in other sections), indexes it flat and sectioned, and asks a question
+about each fact, scoped explicitly ("Item 1A: ...") or by keyword routing. It
+reports how many chunks each layout embeds, the chunks a scoped question
+searches, top-4 hits and query latency.
+
+Like bench_hybrid_retrieval it uses the local hashing embedder and the tools'
+NumPy flat index, so it runs offline.
+
+Usage (from multi-agent-example/): python benchmarks/bench_section_search.py [--size 10]
+"""
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from testing.local_sec_server import synthetic_filing
+from tools.bm25 import BM25Index
+from tools.embeddings import HashingEmbeddings
+from tools.html_text import iter_text_blocks
+from tools.retrieval import FilingIndex, VectorStore
+from tools.sections import iter_section_chunks, scope_question
+from tools.text_splitter import TokenSplitter
+
+# (heading the fact goes under, fact, question, heading of the decoy, decoy)
+CASES = [
+  ("Item 1A. Risk Factors",
+   "Disruption at our single supplier of advanced packaging in Taiwan could halt production of our accelerators.",
+   "what supply risks could halt production of accelerators",
+   "Item 7. Management's",
+   "Production of accelerators did not halt this year; our supplier of advanced packaging in Taiwan added capacity."),
+  ("Item 7A. Quantitative",
+   "A 100 basis point increase in interest rates would decrease the fair value of our fixed-income portfolio by $2.1 billion.",
+   "how exposed is the fixed-income portfolio to interest rate risk",
+   "Item 15. Exhibits",
+   "Exhibit 4.2: Indenture for the fixed-income notes; interest rates are reset quarterly on the portfolio."),
+  ("Item 7. Management's",
+   "Gross margin expanded to 45.2 percent on a favorable product mix and lower component costs.",
+   "MD&A: how did gross margin change",
+   "Item 1A. Risk Factors",
+   "Our gross margin could contract if the product mix shifts or component costs rise."),
+  ("Item 3. Legal Proceedings",
+   "The European Commission fined the Company EUR 1.8 billion in an antitrust proceeding on music streaming.",
+   "what litigation or antitrust fines does the company face",
+   "Item 1. Business",
+   "Our music streaming service competes with European providers; antitrust rules shape the market."),
+  ("Item 1A. Risk Factors",
+   "Cyberattacks on our cloud platform could expose customer data and lead to regulatory penalties.",
+   "Item 1A: could cyberattacks expose customer data",
+   "Item 9A. Controls",
+   "Management concluded that controls over customer data access in the cloud platform were effective."),
+]
+
+
+def planted_filing(size_mb):
+  html = synthetic_filing(11, size_mb << 20)
+  for heading, fact, _, decoy_heading, decoy in CASES:
+    for where, text in ((heading, fact), (decoy_heading, decoy)):
+      at = html.index("</h2>", html.index(f"<h2>{where}")) + len("</h2>")
+      html = html[:at] + f"<p>{text}</p>" + html[at:]
+  return html.encode("utf-8")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--size", type=int, default=10, help="filing size in MB")
+  args = parser.parse_args()
+
+  html = planted_filing(args.size)
+  pairs = list(iter_section_chunks(iter_text_blocks([html]), TokenSplitter()))
+  sections = [section for section, _ in pairs]
+  chunks = [chunk for _, chunk in pairs]
+  lexical = BM25Index.build(chunks)
+  embeddings = HashingEmbeddings()
+  counts = Counter(sections)
+  print(f"📑 {args.size} MB filing, {len(chunks)} chunks in {len(counts)} sections: "
+        + ", ".join(f"{key} {n}" for key, n in counts.most_common()))
+
+  layouts = {}
+  for label, index in (("flat", FilingIndex(chunks, lexical, lambda texts: VectorStore.from_texts(texts, embeddings))),
+                       ("sectioned", FilingIndex(chunks, lexical, lambda texts: VectorStore.from_texts(texts, embeddings),
+                                                 sections))):
+    start = time.perf_counter()
+    index.vectors
+    layouts[label] = index
+    print(f"  {label:<9} embedded {len(index.embedded)}/{len(chunks)} chunks in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+  for label, index in layouts.items():
+    hits, latencies, searched = 0, [], []
+    for _, fact, question, _, _ in CASES:
+      scope, query = scope_question(question) if label == "sectioned" else (None, question)
+      mask = index.scope(scope)
+      searched.append(len(chunks) if mask is None else int(mask.sum()))
+      start = time.perf_counter()
+      found = index.search(query, k=4, sections=scope)
+      latencies.append(time.perf_counter() - start)
+      hits += any(fact in chunk for chunk in found)
+    print(f"  {label:<9} top-4 hits {hits}/{len(CASES)}, {statistics.mean(searched):,.0f} chunks searched "
+          f"per question, {statistics.mean(latencies) * 1000:.1f} ms/query")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,92 @@
+"""
+Splitter benchmark: TokenSplitter vs the previous CharacterTextSplitter
+
+Extracts the text of a 10-K (a local file given with --file, otherwise a
+synthetic inline-XBRL filing of --size MB) and splits it with the previous
+character splitter (3025 / 300 characters) and with TokenSplitter (750 / 75
+tokens). For a like-for-like token-aware baseline it also times
+CharacterTextSplitter with a token length function (what from_tiktoken_encoder
+does). It reports time, chunk counts, chunk sizes in tokens, the share of
+chunks over the 750 token budget and the share that run across an Item
+heading. Token counts use tiktoken's cl100k_base when it is available,
+otherwise the same regex estimate the splitter falls back to.
+
+Usage (from multi-agent-example/): python benchmarks/bench_text_splitter.py [--size 20] [--file 10k.htm]
+"""
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain.text_splitter import CharacterTextSplitter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_html_extraction import write_synthetic_filing
+from tools.html_text import iter_text_blocks
+from tools.text_splitter import SECTION, TokenSplitter, token_counter
+
+
+def read_blocks(path):
+  with open(path, "rb") as f:
+    return list(iter_text_blocks(iter(lambda: f.read(1 << 16), b"")))
+
+
+def report(label, elapsed, chunks, count_tokens, budget=None):
+  sizes = count_tokens(chunks)
+  # A heading anywhere but at the start means the chunk mixes two sections
+  mixed = sum(1 for chunk in chunks
+              if any(SECTION.match(line) for line in chunk.split("\n")[1:])) / len(chunks)
+  over = f"{sum(1 for size in sizes if size > budget) / len(sizes):>6.1%}" if budget else f"{'-':>6}"
+  print(f"  {label:<26} {elapsed:>7.2f}s {len(chunks):>7} {statistics.mean(sizes):>7.0f} {max(sizes):>6} "
+        f"{over} {mixed:>8.0%}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--size", type=int, default=20, help="synthetic filing size in MB")
+  parser.add_argument("--file", help="a local 10-K HTML file")
+  args = parser.parse_args()
+  logging.disable(logging.WARNING)  # CharacterTextSplitter warns about every oversized chunk
+
+  with tempfile.TemporaryDirectory() as tmp:
+    path = Path(args.file) if args.file else Path(tmp) / "synthetic.htm"
+    if not args.file:
+      write_synthetic_filing(path, args.size << 20)
+    blocks = read_blocks(path)
+  text = "\n".join(blocks)
+  count_tokens = token_counter()
+  print(f"📄 {path.name}: {len(text) / (1 << 20):.1f} MB of text, {len(blocks)} blocks")
+  print(f"  {'splitter':<26} {'time':>8} {'chunks':>7} {'mean tk':>7} {'max tk':>6} {'>750':>6} {'mixed':>8}")
+
+  start = time.perf_counter()
+  chunks = CharacterTextSplitter(separator="\n", chunk_size=3025, chunk_overlap=300,
+                                 length_function=len, is_separator_regex=False).split_text(text)
+  report("CharacterTextSplitter", time.perf_counter() - start, chunks, count_tokens, 750)
+
+  start = time.perf_counter()
+  chunks = CharacterTextSplitter(separator="\n", chunk_size=750, chunk_overlap=75,
+                                 length_function=lambda chunk: count_tokens([chunk])[0],
+                                 is_separator_regex=False).split_text(text)
+  report("CharacterTextSplitter (tk)", time.perf_counter() - start, chunks, count_tokens, 750)
+
+  start = time.perf_counter()
+  count_tokens(blocks)
+  print(f"  {'(tokenizing alone)':<26} {time.perf_counter() - start:>7.2f}s")
+
+  splitter = TokenSplitter(count_tokens=count_tokens)
+  start = time.perf_counter()
+  chunks = splitter.split_text(text)
+  report("TokenSplitter.split_text", time.perf_counter() - start, chunks, count_tokens, 750)
+
+  start = time.perf_counter()
+  streamed = list(splitter.iter_chunks(blocks))
+  report("TokenSplitter.iter_chunks", time.perf_counter() - start, streamed, count_tokens, 750)
+
+
+if __name__ == "__main__":
+  main()
@@ -4,6 +4,7 @@ warnings.filterwarnings('ignore')
 
 import os
 from crew import FinancialAnalystCrew
+from tools.warmer import warm_in_background
 
 os.environ['OPENAI_API_KEY'] = "REPLACE_THIS_WITH_YOUR_OPENAI_API_KEY"
 os.environ['SEC_API_API_KEY'] = "REPLACE_THIS_WITH_YOUR_SEC_API_API_KEY"
@@ -12,6 +13,8 @@ def run():
     inputs = {
         'company_stock_symbol': 'MSFT',
     }
+    # Pre-index the configured companies while the crew works, if enabled in config.yaml
+    warm_in_background()
     FinancialAnalystCrew().crew().kickoff(inputs=inputs)
 
 if __name__ == "__main__":
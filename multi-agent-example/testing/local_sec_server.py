@@ -0,0 +1,157 @@
+"""
+Local HTTP stand-in for SEC filing pages, used by the benchmarks and tests
+
+Serves synthetic 10-K style HTML at /filing/<n>.htm with a stable ETag and
+Last-Modified, answers conditional requests with 304, and answers sec-api.io
+style filing searches (POST with a JSON query, one `ticker:X` or several
+`ticker:(X OR Y)`) with a link to one of those filings per known ticker. It
+counts requests, searches and connections; `handshake_delay` makes every new
+connection cost that many seconds, standing in for TCP/TLS setup to a remote host.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAST_MODIFIED = "Wed, 31 Jul 2024 20:05:12 GMT"
+FILED_AT = "2024-07-30T16:06:36-04:00"
+
+PARAGRAPHS = [
+  "Revenue increased {n}% driven by growth in cloud services and server products.",
+  "Operating expenses increased primarily due to investments in research and development.",
+  "We face intense competition across all markets for our products and services.",
+  "Forward-looking statements are subject to risks and uncertainties described in Item 1A.",
+  "Net cash from operations increased due to higher cash received from customers.",
+]
+
+
+ITEMS = [
+  ("1", "Business"), ("1A", "Risk Factors"), ("1B", "Unresolved Staff Comments"), ("2", "Properties"),
+  ("3", "Legal Proceedings"), ("5", "Market for Registrant's Common Equity"),
+  ("7", "Management's Discussion and Analysis of Financial Condition and Results of Operations"),
+  ("7A", "Quantitative and Qualitative Disclosures About Market Risk"),
+  ("8", "Financial Statements and Supplementary Data"), ("9A", "Controls and Procedures"),
+  ("10", "Directors, Executive Officers and Corporate Governance"), ("11", "Executive Compensation"),
+  ("15", "Exhibits and Financial Statement Schedules"),
+]
+
+
+def synthetic_filing(number, size_bytes=2 * 1024 * 1024):
+  """An HTML filing of roughly size_bytes with a table of contents, 10-K Item sections and financial tables"""
+  parts = [f"<html><head><title>Form 10-K {number}</title></head><body>",
+           "<table>" + "".join(f"<tr><td>Item {item}.</td><td>{title}</td><td>{page}</td></tr>"
+                               for page, (item, title) in enumerate(ITEMS, start=3)) + "</table>"]
+  size = 0
+  section = 0
+  row = 0
+  while size < size_bytes:
+    item, title = ITEMS[section % len(ITEMS)]
+    block = [f"<h2>Item {item}. {title}</h2>"]
+    for i in range(30):
+      block.append(f"<p>{PARAGRAPHS[(i + section) % len(PARAGRAPHS)].format(n=(i + number) % 17)}</p>")
+    block.append("<table>" + "".join(
+      f"<tr><td>Line item {row + r}</td><td>{(row + r) * 1013 % 99991:,}</td></tr>" for r in range(20)) + "</table>")
+    row += 20
+    text = "\n".join(block)
+    parts.append(text)
+    size += len(text)
+    section += 1
+  parts.append("</body></html>")
+  return "\n".join(parts)
+
+
+class LocalSECServer():
+  """Threaded HTTP server on 127.0.0.1 with per-path request counters"""
+
+  def __init__(self, filing_bytes=2 * 1024 * 1024, handshake_delay=0.0, unknown_tickers=(), filed_at=FILED_AT):
+    self.filing_bytes = filing_bytes
+    self.handshake_delay = handshake_delay
+    self.unknown_tickers = set(unknown_tickers)
+    self.filed_at = filed_at
+    self.connections = 0
+    self.requests = 0
+    self.searches = 0
+    self.full_responses = 0
+    self.not_modified = 0
+    self._filings = {}
+    self._lock = threading.Lock()
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+      disable_nagle_algorithm = True
+
+      def setup(self):
+        super().setup()
+        with server._lock:
+          server.connections += 1
+        if server.handshake_delay:
+          time.sleep(server.handshake_delay)
+
+      def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with server._lock:
+          server.requests += 1
+          server.searches += 1
+        text = query.get("query", {}).get("query_string", {}).get("query", "")
+        tickers = re.search(r"ticker:(?:\(([^)]*)\)|(\w+))", text)
+        tickers = re.findall(r"\w+", tickers.group(1) or tickers.group(2)) if tickers else []
+        form = re.search(r'formType:"([^"]+)"', text)
+        filings = [{
+          "ticker": ticker,
+          "formType": form.group(1) if form else "10-K",
+          "filedAt": server.filed_at,
+          "linkToFilingDetails": f"{server.url}/filing/{sum(map(ord, ticker))}.htm",
+        } for ticker in tickers if ticker not in server.unknown_tickers][:int(query.get("size", 50))]
+        body = json.dumps({"total": {"value": len(filings)}, "filings": filings}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def do_GET(self):
+        body = server.filing(self.path).encode("utf-8")
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        with server._lock:
+          server.requests += 1
+        if self.headers.get("If-None-Match") == etag:
+          with server._lock:
+            server.not_modified += 1
+          self.send_response(304)
+          self.send_header("ETag", etag)
+          self.send_header("Content-Length", "0")
+          self.end_headers()
+          return
+        with server._lock:
+          server.full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+  def filing(self, path):
+    with self._lock:
+      if path not in self._filings:
+        number = int("".join(ch for ch in path if ch.isdigit()) or 0)
+        self._filings[path] = synthetic_filing(number, self.filing_bytes)
+      return self._filings[path]
+
+  def __enter__(self):
+    threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    return self
+
+  def __exit__(self, *exc):
+    self.httpd.shutdown()
+    self.httpd.server_close()
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Before tools.filing_cache reads it, so process-wide caches stay out of .cache/
+os.environ.setdefault("SEC_TOOLS_CACHE_DIR", tempfile.mkdtemp(prefix="sec-tools-tests-"))
+
+from testing.local_sec_server import LocalSECServer
+
+
+@pytest.fixture
+def sec_server():
+  """The local SEC stand-in with small filings"""
+  with LocalSECServer(filing_bytes=64 * 1024) as server:
+    yield server
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from tools.embedding_cache import EmbeddingStore
+
+
+def test_put_many_skips_stored_digests(tmp_path):
+  store = EmbeddingStore(tmp_path)
+  a, b = store.digest("a"), store.digest("b")
+  store.put_many([a], np.ones((1, 4)))
+  store.put_many([a, b, b], np.stack([np.full(4, 9.0), np.full(4, 2.0), np.full(4, 3.0)]))
+  assert store.stats()['bytes'] == 2 * 4 * 4
+  found = store.get_many([a, b])
+  assert found[a].tolist() == [1.0] * 4
+  assert found[b].tolist() == [2.0] * 4
+
+
+def test_partial_row_from_an_interrupted_write_is_dropped(tmp_path):
+  store = EmbeddingStore(tmp_path)
+  a, b = store.digest("a"), store.digest("b")
+  store.put_many([a], np.ones((1, 4)))
+  with open(store.matrix_path, "ab") as f:
+    f.write(b"\0" * 6)
+  store.put_many([b], np.full((1, 4), 5.0))
+  reopened = EmbeddingStore(tmp_path)
+  found = reopened.get_many([a, b])
+  assert found[a].tolist() == [1.0] * 4
+  assert found[b].tolist() == [5.0] * 4
+
+
+def test_reopening_with_another_dtype_converts_the_matrix(tmp_path):
+  store = EmbeddingStore(tmp_path, dtype="float32")
+  digests = [store.digest(text) for text in "abc"]
+  vectors = np.arange(12, dtype=np.float32).reshape(3, 4) / 8
+  store.put_many(digests, vectors)
+
+  half = EmbeddingStore(tmp_path, dtype="float16")
+  assert half.stats()['bytes'] == 3 * 4 * 2 and not (tmp_path / "vectors.float32").exists()
+  found = half.get_many(digests)
+  assert [found[digest].tolist() for digest in digests] == vectors.tolist()
+  d = half.digest("d")
+  half.put_many([d], np.full((1, 4), 0.5))
+
+  full = EmbeddingStore(tmp_path, dtype="float32")
+  assert full.get_many([digests[2], d])[d].tolist() == [0.5] * 4
+  assert full.stats()['entries'] == 4
+
+
+def test_store_without_a_recorded_dtype_is_converted(tmp_path):
+  store = EmbeddingStore(tmp_path, dtype="float16")
+  a = store.digest("a")
+  store.put_many([a], np.full((1, 4), 0.25))
+  # As written before the dtype was recorded
+  store._conn.execute("DELETE FROM meta WHERE key = 'dtype'")
+  store._conn.commit()
+  assert EmbeddingStore(tmp_path).get_many([a])[a].tolist() == [0.25] * 4
+
+
+def test_vectors_of_another_dimension_are_rejected(tmp_path):
+  store = EmbeddingStore(tmp_path)
+  store.put_many([store.digest("a")], np.ones((1, 4)))
+  with pytest.raises(ValueError):
+    store.put_many([store.digest("b")], np.ones((1, 8)))
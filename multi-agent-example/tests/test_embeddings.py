@@ -0,0 +1,62 @@
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from testing.local_sec_server import synthetic_filing
+from tools import embeddings as backends
+from tools.bm25 import BM25Index
+from tools.embedding_cache import CachedEmbeddings
+from tools.embeddings import HashingEmbeddings, get_embeddings, register_embedding_backend
+from tools.html_text import iter_text_blocks
+from tools.retrieval import FilingIndex, VectorStore
+from tools.sections import iter_section_chunks
+from tools.text_splitter import TokenSplitter
+
+FACT = "Headcount was approximately 221,000 full-time employees as of June 30."
+
+
+def planted_index(embeddings):
+  html = synthetic_filing(3, 256 * 1024).replace("</h2>", f"</h2><p>{FACT}</p>", 3)
+  # Word counts stand in for tiktoken, whose encoding may not be downloadable here
+  splitter = TokenSplitter(count_tokens=lambda texts: [len(text.split()) for text in texts])
+  pairs = list(iter_section_chunks(iter_text_blocks([html.encode("utf-8")]), splitter))
+  chunks = [chunk for _, chunk in pairs]
+  return FilingIndex(chunks, BM25Index.build(chunks), lambda texts: VectorStore.from_texts(texts, embeddings),
+                     [section for section, _ in pairs])
+
+
+def test_local_backend_retrieves_a_planted_fact(monkeypatch):
+  monkeypatch.setenv("SEC_EMBEDDINGS", "local")
+  embeddings = get_embeddings()
+  assert isinstance(embeddings, HashingEmbeddings)
+  index = planted_index(embeddings)
+  question = "how many full-time employees are there"
+  assert any(FACT in index.chunks[doc] for doc in index.vector_search(question, 4))
+  assert any(FACT in chunk for chunk in index.search(question))
+  assert index.stats['hybrid'] == 1
+
+
+class ConstantEmbeddings(Embeddings):
+  model = "constant"
+
+  def embed_documents(self, texts):
+    return [[1.0, 0.0] for _ in texts]
+
+  def embed_query(self, text):
+    return [1.0, 0.0]
+
+
+def test_registered_backend_is_selected_by_name_and_env(monkeypatch):
+  monkeypatch.setitem(backends.EMBEDDING_BACKENDS, "constant", None)
+  register_embedding_backend("constant", ConstantEmbeddings)
+  # Backends that don't opt out of caching are wrapped in the chunk cache
+  wrapped = get_embeddings("constant")
+  assert isinstance(wrapped, CachedEmbeddings) and isinstance(wrapped.inner, ConstantEmbeddings)
+  monkeypatch.setenv("SEC_EMBEDDINGS", "constant")
+  assert isinstance(get_embeddings().inner, ConstantEmbeddings)
+  assert isinstance(get_embeddings("local"), HashingEmbeddings)
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+  monkeypatch.setenv("SEC_EMBEDDINGS", "nope")
+  with pytest.raises(ValueError, match="nope"):
+    get_embeddings()
@@ -0,0 +1,69 @@
+import zlib
+
+import requests
+
+from tools.filing_cache import FilingCache
+
+
+def cache_for(tmp_path, **options):
+  return FilingCache(tmp_path / "filings.sqlite", session=requests.Session(), **options)
+
+
+def test_miss_then_hit(tmp_path, sec_server):
+  cache = cache_for(tmp_path)
+  url = f"{sec_server.url}/filing/1.htm"
+  first = cache.get(url)
+  assert first == sec_server.filing("/filing/1.htm")
+  assert cache.get(url) == first
+  # A new instance over the same file is served from disk, not the network
+  assert cache_for(tmp_path).get(url) == first
+  assert sec_server.full_responses == 1
+  assert cache.stats()['downloads'] == 1 and cache.stats()['hits'] == 1
+
+
+def test_stale_entry_is_revalidated_with_etag(tmp_path, sec_server):
+  cache = cache_for(tmp_path)
+  url = f"{sec_server.url}/filing/2.htm"
+  text = cache.get(url, max_age=0)
+  assert cache_for(tmp_path).get(url, max_age=0) == text
+  assert sec_server.full_responses == 1
+  assert sec_server.not_modified == 1
+  stats = cache.stats()
+  assert stats['entries'] == 1
+
+
+def test_least_recently_used_filings_are_evicted_beyond_the_byte_budget(tmp_path, sec_server):
+  probe = cache_for(tmp_path / "probe")
+  probe.prefetch(f"{sec_server.url}/filing/1.htm")
+  size = probe.stats()['bytes']
+
+  cache = cache_for(tmp_path, max_bytes=int(size * 2.5), memory_entries=0)
+  a, b, c = (f"{sec_server.url}/filing/{n}.htm" for n in (1, 2, 3))
+  cache.prefetch(a)
+  cache.prefetch(b)
+  cache.prefetch(a)  # a is now more recent than b
+  cache.prefetch(c)
+  stats = cache.stats()
+  assert stats['evictions'] == 1 and stats['entries'] == 2
+  assert stats['bytes'] <= cache.max_bytes
+
+  before = sec_server.full_responses
+  cache.prefetch(a)
+  cache.prefetch(c)
+  assert sec_server.full_responses == before
+  cache.prefetch(b)
+  assert sec_server.full_responses == before + 1
+
+
+def test_bodies_round_trip_through_zlib(tmp_path, sec_server):
+  cache = cache_for(tmp_path)
+  url = f"{sec_server.url}/filing/4.htm"
+  original = sec_server.filing("/filing/4.htm")
+  assert cache.get(url) == original
+  assert b"".join(cache.iter_bytes(url, chunk_size=1000)).decode("utf-8") == original
+
+  body, = cache._conn.execute("SELECT body FROM filings").fetchone()
+  assert zlib.decompress(body).decode("utf-8") == original
+  stats = cache.stats()
+  assert stats['raw_bytes'] == len(original.encode("utf-8"))
+  assert stats['bytes'] < stats['raw_bytes']
@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from testing.local_sec_server import LocalSECServer
+from tools.filing_metadata import BULK_TICKERS, DAY, HOUR, FilingMetadataCache
+from tools.http_client import SECQueryClient
+
+
+class Clock():
+  def __init__(self):
+    self.now = datetime(2024, 8, 9, tzinfo=timezone.utc).timestamp()
+
+  def __call__(self):
+    return self.now
+
+
+def filed(clock, days_ago):
+  return datetime.fromtimestamp(clock.now - days_ago * DAY, timezone.utc).isoformat()
+
+
+@pytest.fixture
+def clock():
+  return Clock()
+
+
+@pytest.fixture
+def server(clock):
+  with LocalSECServer(filing_bytes=1024, unknown_tickers={"NOPE"}, filed_at=filed(clock, 10)) as server:
+    yield server
+
+
+@pytest.fixture
+def client(server):
+  return SECQueryClient("test", requests.Session(), endpoint=server.url)
+
+
+def test_latest_filings_parses_one_filing_per_ticker(server, client):
+  found = client.latest_filings(["AAPL", "MSFT", "NOPE"], "10-Q")
+  assert sorted(found) == ["AAPL", "MSFT"]
+  assert found["MSFT"]['formType'] == "10-Q"
+  assert found["MSFT"]['linkToFilingDetails'].endswith(f"/filing/{sum(map(ord, 'MSFT'))}.htm")
+  assert server.searches == 1
+
+
+def test_ttl_follows_filing_cadence(tmp_path, clock):
+  cache = FilingMetadataCache(tmp_path / "meta.sqlite", client=object(), clock=clock)
+  for form, days_ago, ttl in (("10-Q", 10, 7 * DAY), ("10-Q", 70, 2.8 * DAY), ("10-Q", 85, 6 * HOUR),
+                              ("10-K", 250, 7 * DAY), ("10-K", 300, 6 * HOUR), ("8-K", 1, 6 * HOUR)):
+    assert cache.ttl(form, {'filedAt': filed(clock, days_ago)}, clock.now) == pytest.approx(ttl, abs=60)
+  assert cache.ttl("10-K", None, clock.now) == DAY
+
+
+def test_entries_expire_by_cadence(tmp_path, server, client, clock):
+  cache = FilingMetadataCache(tmp_path / "meta.sqlite", client, clock=clock)
+  filing = cache.latest("aapl", "10-Q")
+  assert filing['ticker'] == "AAPL"
+  clock.now += 7 * DAY - 60
+  assert cache.latest("AAPL", "10-Q") == filing
+  assert server.searches == 1
+  clock.now += 120
+  cache.latest("AAPL", "10-Q")
+  assert server.searches == 2
+
+
+def test_unknown_tickers_are_cached_negatively(tmp_path, server, client, clock):
+  cache = FilingMetadataCache(tmp_path / "meta.sqlite", client, clock=clock)
+  assert cache.latest("NOPE", "10-K") is None
+  assert cache.latest("NOPE", "10-K") is None
+  assert server.searches == 1 and cache.stats()['negative_hits'] == 1
+  clock.now += DAY + 1
+  assert cache.latest("NOPE", "10-K") is None
+  assert server.searches == 2
+
+
+class PagedClient():
+  """Delegates to `client`, but bulk queries leave out `dropped` (as if beyond the newest page)"""
+
+  def __init__(self, client, dropped):
+    self.client = client
+    self.dropped = dropped
+    self.bulk_sizes = []
+    self.single = []
+
+  def latest_filings(self, tickers, form_type):
+    self.bulk_sizes.append(len(tickers))
+    found = self.client.latest_filings(tickers, form_type)
+    return {ticker: filing for ticker, filing in found.items() if ticker not in self.dropped}
+
+  def latest_filing(self, ticker, form_type):
+    self.single.append(ticker)
+    return self.client.latest_filing(ticker, form_type)
+
+
+def test_refresh_batches_tickers_and_falls_back_per_ticker(tmp_path, server, client, clock):
+  paged = PagedClient(client, dropped={"T3"})
+  cache = FilingMetadataCache(tmp_path / "meta.sqlite", paged, clock=clock)
+  tickers = [f"T{i}" for i in range(BULK_TICKERS + 2)] + ["NOPE"]
+  result = cache.refresh(tickers, "10-K")
+  assert paged.bulk_sizes == [BULK_TICKERS, 3]
+  assert sorted(paged.single) == ["NOPE", "T3"]
+  assert result["NOPE"] is None and result["T3"]['ticker'] == "T3"
+  assert all(result[ticker] is not None for ticker in tickers if ticker != "NOPE")
+
+  # Fresh entries aren't queried again, and lookups are served from the cache
+  before = server.searches
+  assert cache.refresh(tickers, "10-K") == result
+  assert cache.latest("T3", "10-K") == result["T3"]
+  assert server.searches == before
+  cache.refresh(tickers, "10-K", force=True)
+  assert server.searches > before
+
+
+class FailingClient():
+  def __init__(self, client):
+    self.client = client
+    self.fail = False
+    self.calls = 0
+
+  def latest_filing(self, ticker, form_type):
+    self.calls += 1
+    if self.fail:
+      raise requests.ConnectionError("search API down")
+    return self.client.latest_filing(ticker, form_type)
+
+
+def test_stale_entry_is_served_and_kept_when_the_search_fails(tmp_path, client, clock):
+  failing = FailingClient(client)
+  cache = FilingMetadataCache(tmp_path / "meta.sqlite", failing, clock=clock)
+  filing = cache.latest("MSFT", "10-Q")
+  failing.fail = True
+  clock.now += 8 * DAY
+  assert cache.latest("MSFT", "10-Q") == filing
+  assert cache.stats()['stale_served'] == 1
+  # Kept for min_ttl, so the outage doesn't cost every call a request
+  clock.now += cache.min_ttl - 60
+  assert cache.latest("MSFT", "10-Q") == filing
+  assert failing.calls == 2
+  clock.now += 120
+  assert cache.latest("MSFT", "10-Q") == filing
+  assert failing.calls == 3
+
+  # Nothing cached: the failure propagates
+  with pytest.raises(requests.ConnectionError):
+    cache.latest("AAPL", "10-Q")
@@ -0,0 +1,59 @@
+import numpy as np
+
+from tools.embeddings import HashingEmbeddings
+from tools.index_cache import IndexCache
+from tools.retrieval import FlatIndex
+
+CHUNKS = [
+  "Revenue grew 7 percent to $211,915 million.",
+  "Operating income increased in the Intelligent Cloud segment.",
+  "A cybersecurity incident accessed senior leadership email accounts.",
+  "The Board declared a quarterly dividend of $0.75 per share.",
+]
+
+
+class CountingEmbeddings(HashingEmbeddings):
+  documents = 0
+
+  def embed_documents(self, texts):
+    self.documents += len(texts)
+    return super().embed_documents(texts)
+
+
+def build(cache, embeddings):
+  def load_chunks():
+    load_chunks.calls += 1
+    return [(None, chunk) for chunk in CHUNKS]
+  load_chunks.calls = 0
+  return cache.get_or_build("https://www.sec.gov/10k.htm", {'size': 750}, embeddings, load_chunks), load_chunks
+
+
+def test_saved_vectors_are_memory_mapped_on_reload(tmp_path):
+  embeddings = CountingEmbeddings()
+  index, load_chunks = build(IndexCache(tmp_path), embeddings)
+  question = "what dividend did the board declare"
+  assert index.vector_search(question, 1) == [3]
+  assert embeddings.documents == len(CHUNKS) + 1  # the chunks, then the question
+  built = index.vectors.index.matrix
+
+  # A new process: nothing is parsed or embedded again except the question
+  cache = IndexCache(tmp_path)
+  index, load_chunks = build(cache, embeddings)
+  assert load_chunks.calls == 0
+  assert index.vector_search(question, 1) == [3]
+  assert embeddings.documents == len(CHUNKS) + 2
+  matrix = index.vectors.index.matrix
+  assert isinstance(matrix, np.memmap) and matrix.mode == "r"
+  assert np.array_equal(matrix, built)
+  assert cache.stats()['disk_hits'] == 1 and cache.stats()['vector_loads'] == 1
+
+
+def test_flat_index_matches_brute_force_l2():
+  rng = np.random.default_rng(7)
+  matrix = rng.standard_normal((50, 8)).astype(np.float32)
+  queries = rng.standard_normal((3, 8)).astype(np.float32)
+  distances, ids = FlatIndex(matrix).search(queries, 5)
+  expected = ((queries[:, None, :] - matrix[None, :, :]) ** 2).sum(axis=2)
+  assert ids.tolist() == np.argsort(expected, axis=1)[:, :5].tolist()
+  assert np.allclose(distances, np.sort(expected, axis=1)[:, :5], atol=1e-4)
+  assert FlatIndex(matrix).search(queries, 100)[1].shape == (3, 50)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import requests
+
+from tools import filing_metadata, index_cache
+from tools.embeddings import HashingEmbeddings
+from tools.filing_metadata import FilingMetadataCache
+from tools.http_client import SECQueryClient
+from tools.index_cache import IndexCache
+from tools.sec_tools import SECTools
+
+QUESTIONS = ["what drove the revenue growth in cloud services", "Item 1A: what competition do we face"]
+
+
+@pytest.fixture
+def embedded(monkeypatch):
+  """Texts the local embedder is asked to embed"""
+  texts = []
+  embed_documents = HashingEmbeddings.embed_documents
+
+  def counting(self, batch):
+    texts.extend(batch)
+    return embed_documents(self, batch)
+
+  monkeypatch.setattr(HashingEmbeddings, "embed_documents", counting)
+  return texts
+
+
+@pytest.fixture
+def sec_api(monkeypatch, tmp_path, sec_server):
+  """SECTools wired to the local SEC stand-in, with fresh metadata and index caches"""
+  monkeypatch.setenv("SEC_EMBEDDINGS", "local")
+  client = SECQueryClient("test", requests.Session(), endpoint=sec_server.url)
+  monkeypatch.setattr(filing_metadata, "_filing_metadata", FilingMetadataCache(tmp_path / "latest.sqlite", client))
+  monkeypatch.setattr(index_cache, "_index_cache", IndexCache(tmp_path / "indexes"))
+  return sec_server
+
+
+def test_search_many_indexes_once_and_reloads_the_saved_index(monkeypatch, tmp_path, sec_api, embedded):
+  answers = SECTools.search_many("MSFT", "10-K", QUESTIONS)
+  assert "cloud services" in answers[QUESTIONS[0]]
+  assert "competition" in answers[QUESTIONS[1]]
+  assert sec_api.full_responses == 1 and sec_api.searches == 1
+  chunks = len(embedded) - len(QUESTIONS)
+  assert chunks > 0
+  built = index_cache.get_index_cache().stats()
+  assert (built['builds'], built['vector_builds']) == (1, 1)
+
+  # As in a new process: the saved index is reloaded, and only the questions are embedded
+  monkeypatch.setattr(index_cache, "_index_cache", IndexCache(tmp_path / "indexes"))
+  assert SECTools.search_many("MSFT", "10-K", QUESTIONS) == answers
+  assert len(embedded) == chunks + 2 * len(QUESTIONS)
+  assert sec_api.full_responses == 1 and sec_api.searches == 1
+  stats = index_cache.get_index_cache().stats()
+  assert (stats['disk_hits'], stats['builds'], stats['vector_loads'], stats['vector_builds']) == (1, 0, 1, 0)
+  url = filing_metadata.get_filing_metadata().latest("MSFT", "10-K")['linkToFilingDetails']
+  assert isinstance(SECTools.filing_index(url).vectors.index.matrix, np.memmap)
+
+
+def test_tool_input_with_several_questions(sec_api):
+  answer = SECTools.search_10k.run("MSFT|" + "|".join(QUESTIONS))
+  assert answer.count("Question: ") == 2 and "cloud services" in answer
+  assert "add a question" in SECTools.search_10q.run("MSFT|")
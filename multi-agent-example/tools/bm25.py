@@ -0,0 +1,127 @@
+"""
+BM25 over filing chunks with compact postings
+
+Postings are stored CSR-style in flat NumPy arrays: for term t, the chunks that
+contain it are doc_ids[offsets[t]:offsets[t + 1]], with the matching term
+frequencies in tfs. A saved index is a handful of .npy files plus the
+vocabulary, and the arrays are memory-mapped when it is loaded.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from tools.embeddings import WORD
+
+# Dropped from queries only; BM25's idf already discounts them in chunks
+STOPWORDS = frozenset("""
+a about an and are as at be by did do does for from had has have how i in is it its
+last of on or than that the their there this to was were what when where which who
+why with year's
+""".split())
+QUESTION_WORDS = frozenset("how why what when where which who did does do is are was were explain describe compare".split())
+
+
+def terms(text):
+  return WORD.findall(text.lower())
+
+
+def query_terms(query):
+  return list(dict.fromkeys(term for term in terms(query) if term not in STOPWORDS))
+
+
+class BM25Index():
+  """Okapi BM25 over a fixed list of chunks"""
+
+  def __init__(self, vocab, offsets, doc_ids, tfs, doc_len, k1=1.5, b=0.75):
+    self.vocab = vocab
+    self.offsets = offsets
+    self.doc_ids = doc_ids
+    self.tfs = tfs
+    self.doc_len = doc_len
+    self.k1 = k1
+    self.b = b
+    self.size = len(doc_len)
+    self.avgdl = float(np.mean(doc_len)) if self.size else 0.0
+    df = np.diff(offsets).astype(np.float64)
+    self.idf = np.log1p((self.size - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+  @classmethod
+  def build(cls, chunks, **params):
+    words, lengths = [], []
+    for chunk in chunks:
+      found = terms(chunk)
+      words.extend(found)
+      lengths.append(len(found))
+    vocab = {word: i for i, word in enumerate(dict.fromkeys(words))}
+    term_ids = np.fromiter(map(vocab.__getitem__, words), dtype=np.int64, count=len(words))
+    docs = np.repeat(np.arange(len(chunks), dtype=np.int64), lengths)
+    # One (term, chunk) key per occurrence; unique() sorts by term, then chunk
+    keys, counts = np.unique(term_ids * max(len(chunks), 1) + docs, return_counts=True)
+    key_terms = keys // max(len(chunks), 1)
+    offsets = np.searchsorted(key_terms, np.arange(len(vocab) + 1)).astype(np.int64)
+    return cls(
+      vocab, offsets,
+      (keys % max(len(chunks), 1)).astype(np.int32),
+      np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16),
+      np.asarray(lengths, dtype=np.int32),
+      **params,
+    )
+
+  def save(self, directory):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ("offsets", "doc_ids", "tfs", "doc_len"):
+      np.save(directory / f"{name}.npy", getattr(self, name))
+    (directory / "vocab.json").write_text(json.dumps(list(self.vocab)), encoding="utf-8")
+
+  @classmethod
+  def load(cls, directory, **params):
+    directory = Path(directory)
+    arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r")
+              for name in ("offsets", "doc_ids", "tfs", "doc_len")}
+    words = json.loads((directory / "vocab.json").read_text(encoding="utf-8"))
+    return cls({word: i for i, word in enumerate(words)}, **arrays, **params)
+
+  def postings(self, term):
+    t = self.vocab.get(term)
+    if t is None:
+      return self.doc_ids[:0], self.tfs[:0]
+    start, end = self.offsets[t], self.offsets[t + 1]
+    return self.doc_ids[start:end], self.tfs[start:end]
+
+  def search(self, query, k=20, allowed=None):
+    """[(chunk index, score)] of the best k chunks, best first; only `allowed` ones if given (bool mask)"""
+    scores = np.zeros(self.size, dtype=np.float32)
+    for term in query_terms(query):
+      t = self.vocab.get(term)
+      if t is None:
+        continue
+      docs, tfs = self.postings(term)
+      tfs = tfs.astype(np.float32)
+      norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avgdl)
+      scores[docs] += self.idf[t] * tfs * (self.k1 + 1) / (tfs + norm)
+    if allowed is not None:
+      scores[~allowed] = 0
+    hits = np.flatnonzero(scores)
+    if len(hits) > k:
+      hits = hits[np.argpartition(-scores[hits], k)[:k]]
+    hits = hits[np.argsort(-scores[hits], kind="stable")]
+    return [(int(doc), float(scores[doc])) for doc in hits]
+
+  def covers(self, doc, query):
+    """Whether chunk `doc` contains every query term"""
+    for term in query_terms(query):
+      docs, _ = self.postings(term)
+      i = np.searchsorted(docs, doc)
+      if i >= len(docs) or docs[i] != doc:
+        return False
+    return True
+
+
+def is_keyword_query(query, max_terms=5):
+  """Short term lookups ("total revenue", "Item 1A") rather than questions"""
+  words = terms(query)
+  if not words or words[0] in QUESTION_WORDS or query.rstrip().endswith("?"):
+    return False
+  return 0 < len(query_terms(query)) <= max_terms
@@ -0,0 +1,254 @@
+"""
+Chunk-level embedding cache
+
+Filings share a lot of identical text (legal boilerplate, table headers, risk
+factor wording), and re-chunking a filing reproduces most of its chunks. Vectors
+are cached per model by a hash of the chunk text: they are appended to one raw
+float32 (or float16) matrix file, and an SQLite index maps each text hash to its
+row. A store opened with another dtype than it was written with converts its
+matrix first, so the rows stay valid. Only misses go to the embedding backend, in batches bounded by item count
+and estimated tokens.
+
+One process writes a store at a time; readers in other processes are fine.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from tools.filing_cache import CACHE_DIR
+
+
+def embedding_model_name(embeddings):
+  """Best-effort identity of an embedding model, for cache keys"""
+  if isinstance(embeddings, CachedEmbeddings):
+    return embedding_model_name(embeddings.inner)
+  for attr in ("model", "model_name", "deployment"):
+    value = getattr(embeddings, attr, None)
+    if value:
+      return f"{type(embeddings).__name__}:{value}"
+  return type(embeddings).__name__
+
+
+def estimate_tokens(text):
+  return len(text) // 4 + 1
+
+
+def batches(texts, max_items, max_tokens):
+  """Split texts into consecutive batches under both limits (a single oversized text gets its own)"""
+  batch, tokens = [], 0
+  for text in texts:
+    size = estimate_tokens(text)
+    if batch and (len(batch) >= max_items or tokens + size > max_tokens):
+      yield batch
+      batch, tokens = [], 0
+    batch.append(text)
+    tokens += size
+  if batch:
+    yield batch
+
+
+class EmbeddingStore():
+  """text hash -> vector for one embedding model, as a row-major matrix file plus index"""
+
+  def __init__(self, directory, dtype="float32"):
+    self.directory = Path(directory)
+    self.directory.mkdir(parents=True, exist_ok=True)
+    self.dtype = np.dtype(dtype)
+    self.matrix_path = self.directory / f"vectors.{self.dtype.name}"
+    self._matrix = None
+    self._lock = threading.Lock()
+
+    self._conn = sqlite3.connect(str(self.directory / "index.sqlite"), check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript("""
+      CREATE TABLE IF NOT EXISTS vectors (digest BLOB PRIMARY KEY, row INTEGER NOT NULL);
+      CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+    self._conn.commit()
+    row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+    self.dim = int(row[0]) if row else None
+    row = self._conn.execute("SELECT value FROM meta WHERE key = 'dtype'").fetchone()
+    stored = np.dtype(row[0]) if row else self._unrecorded_dtype()
+    if stored != self.dtype:
+      self._convert(stored)
+    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dtype', ?)", (self.dtype.name,))
+    self._conn.commit()
+
+  def _unrecorded_dtype(self):
+    # Stores written before the dtype was recorded: the one matrix file there is
+    if not self.matrix_path.exists():
+      for path in self.directory.glob("vectors.*"):
+        return np.dtype(path.suffix[1:])
+    return self.dtype
+
+  def _convert(self, source):
+    """Rewrite the matrix written as `source` in self.dtype, row for row"""
+    source_path = self.directory / f"vectors.{source.name}"
+    if self.dim is None or not source_path.exists():
+      # No matrix for the rows to point at
+      self._conn.execute("DELETE FROM vectors")
+      return
+    rows = source_path.stat().st_size // (self.dim * source.itemsize)
+    tmp = self.directory / f".vectors.{uuid.uuid4().hex}"
+    with open(source_path, "rb") as src, open(tmp, "wb") as out:
+      for start in range(0, rows, 65536):
+        count = min(65536, rows - start)
+        block = np.fromfile(src, dtype=source, count=count * self.dim)
+        out.write(block.astype(self.dtype).tobytes())
+    os.replace(tmp, self.matrix_path)
+    source_path.unlink()
+
+  @staticmethod
+  def digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+  def _rows(self):
+    if self.dim is None or not self.matrix_path.exists():
+      return 0
+    return self.matrix_path.stat().st_size // (self.dim * self.dtype.itemsize)
+
+  def _view(self, needed_rows):
+    # Caller holds the lock; remap once the file has grown past the current view
+    if self._matrix is None or len(self._matrix) < needed_rows:
+      self._matrix = np.memmap(self.matrix_path, dtype=self.dtype, mode="r",
+                               shape=(self._rows(), self.dim))
+    return self._matrix
+
+  def get_many(self, digests):
+    """{digest: float32 vector} for the digests that are cached"""
+    found = {}
+    with self._lock:
+      if self.dim is None:
+        return found
+      for start in range(0, len(digests), 500):
+        part = digests[start:start + 500]
+        found.update(self._conn.execute(
+          f"SELECT digest, row FROM vectors WHERE digest IN ({','.join('?' * len(part))})",
+          part).fetchall())
+      if not found:
+        return found
+      matrix = self._view(max(found.values()) + 1)
+      return {digest: np.asarray(matrix[row], dtype=np.float32) for digest, row in found.items()}
+
+  def put_many(self, digests, vectors):
+    vectors = np.asarray(vectors, dtype=self.dtype)
+    with self._lock:
+      if self.dim is None:
+        self.dim = vectors.shape[1]
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+      elif vectors.shape[1] != self.dim:
+        raise ValueError(f"{vectors.shape[1]}-dimensional vectors for a store of {self.dim}")
+      # Only digests not stored yet get rows, so no row is left unreferenced
+      stored = set()
+      for start in range(0, len(digests), 500):
+        part = digests[start:start + 500]
+        stored.update(digest for digest, in self._conn.execute(
+          f"SELECT digest FROM vectors WHERE digest IN ({','.join('?' * len(part))})", part))
+      new = {}
+      for i, digest in enumerate(digests):
+        if digest not in stored and digest not in new:
+          new[digest] = i
+      if not new:
+        return
+      first = self._rows()
+      with open(self.matrix_path, "ab") as f:
+        # Drop a partial row left by an interrupted write, so new rows land where the index says
+        f.truncate(first * self.dim * self.dtype.itemsize)
+        f.write(vectors[list(new.values())].tobytes())
+      self._conn.executemany(
+        "INSERT INTO vectors (digest, row) VALUES (?, ?)",
+        [(digest, first + i) for i, digest in enumerate(new)])
+      self._conn.commit()
+
+  def stats(self):
+    with self._lock:
+      entries = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+      size = self.matrix_path.stat().st_size if self.matrix_path.exists() else 0
+    return {'entries': entries, 'dim': self.dim, 'dtype': self.dtype.name, 'bytes': size}
+
+
+class CachedEmbeddings(Embeddings):
+  """Embeddings that serve repeated chunk texts from an EmbeddingStore
+
+  Misses (deduplicated) go to `inner` in batches of at most `max_batch_items`
+  texts and `max_batch_tokens` estimated tokens. `last_report` describes the most
+  recent embed_documents call, i.e. one filing when building an index.
+  """
+
+  def __init__(self, inner, store=None, max_batch_items=512, max_batch_tokens=100_000):
+    self.inner = inner
+    self.store = store or get_embedding_store(embedding_model_name(inner))
+    self.max_batch_items = max_batch_items
+    self.max_batch_tokens = max_batch_tokens
+    self.last_report = None
+    self._lock = threading.Lock()
+    self._totals = {'chunks': 0, 'hits': 0, 'requests': 0, 'requests_saved': 0}
+
+  def embed_documents(self, texts):
+    digests = [self.store.digest(text) for text in texts]
+    vectors = self.store.get_many(list(set(digests)))
+
+    missing = {}
+    for digest, text in zip(digests, texts):
+      if digest not in vectors and digest not in missing:
+        missing[digest] = text
+    requests = 0
+    pending = list(missing.items())
+    for batch in batches([text for _, text in pending], self.max_batch_items, self.max_batch_tokens):
+      batch_digests = [digest for digest, _ in pending[:len(batch)]]
+      pending = pending[len(batch):]
+      embedded = self.inner.embed_documents(batch)
+      requests += 1
+      self.store.put_many(batch_digests, embedded)
+      vectors.update(zip(batch_digests, np.asarray(embedded, dtype=np.float32)))
+
+    hits = len(texts) - len(missing)
+    uncached_requests = sum(1 for _ in batches(texts, self.max_batch_items, self.max_batch_tokens))
+    report = {
+      'chunks': len(texts),
+      'hits': hits,
+      'hit_rate': hits / len(texts) if texts else 0.0,
+      'requests': requests,
+      'requests_saved': uncached_requests - requests,
+    }
+    with self._lock:
+      self.last_report = report
+      for key in self._totals:
+        self._totals[key] += report[key]
+    return [vectors[digest].tolist() for digest in digests]
+
+  def embed_query(self, text):
+    return self.inner.embed_query(text)
+
+  def embed_queries(self, texts):
+    """Several questions in one uncached request"""
+    return self.inner.embed_documents(texts)
+
+  def stats(self):
+    with self._lock:
+      totals = dict(self._totals)
+    totals['hit_rate'] = totals['hits'] / totals['chunks'] if totals['chunks'] else 0.0
+    return {**totals, 'store': self.store.stats()}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(model):
+  """Process-wide store for `model` under CACHE_DIR/embeddings (SEC_EMBEDDING_DTYPE: float32 or float16)"""
+  with _stores_lock:
+    if model not in _stores:
+      slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+      _stores[model] = EmbeddingStore(
+        CACHE_DIR / "embeddings" / slug,
+        dtype=os.environ.get("SEC_EMBEDDING_DTYPE", "float32"),
+      )
+    return _stores[model]
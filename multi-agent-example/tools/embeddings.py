@@ -0,0 +1,93 @@
+"""
+Embedding backends for filing retrieval
+
+SEC_EMBEDDINGS picks the backend: "openai" (the default, OpenAIEmbeddings) or
+"local", a hashing embedder that runs in-process with NumPy and needs no
+network or API key. Other backends can be added with
+register_embedding_backend(name, factory), where factory() returns a langchain
+Embeddings. Remote backends are wrapped in CachedEmbeddings; local ones are
+cheaper to recompute than to look up.
+"""
+import os
+import re
+import zlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from tools.embedding_cache import CachedEmbeddings
+
+WORD = re.compile(r"[a-z0-9]+(?:[.,'][a-z0-9]+)*")
+
+
+class HashingEmbeddings(Embeddings):
+  """Signed feature hashing of words and word bigrams into `dim` buckets
+
+  Term counts are scaled sublinearly (log1p) and rows are L2-normalised, so an
+  inner product is a cosine similarity over a hashed bag of words. Hashes come
+  from crc32, so vectors are stable across processes and can be saved; only
+  the distinct words of a batch are hashed in Python, the rest is NumPy.
+  """
+  cacheable = False
+
+  def __init__(self, dim=1024, bigrams=True):
+    self.dim = dim
+    self.bigrams = bigrams
+    self.model = f"hashing-{dim}{'-bigrams' if bigrams else ''}"
+
+  def embed_matrix(self, texts):
+    """float32 matrix with one normalised row per text"""
+    words, lengths = [], []
+    for text in texts:
+      found = WORD.findall(text.lower())
+      words.extend(found)
+      lengths.append(len(found))
+    table = {word: zlib.crc32(word.encode("utf-8")) for word in dict.fromkeys(words)}
+    hashes = np.fromiter(map(table.__getitem__, words), dtype=np.uint64, count=len(words))
+    rows = np.repeat(np.arange(len(texts)), lengths)
+    if self.bigrams and len(words) > 1:
+      same_text = rows[:-1] == rows[1:]
+      pairs = ((hashes[:-1] * np.uint64(0x9E3779B1)) ^ hashes[1:]) & np.uint64(0xFFFFFFFF)
+      hashes = np.concatenate([hashes, pairs[same_text]])
+      rows = np.concatenate([rows, rows[:-1][same_text]])
+    signs = np.where(hashes & np.uint64(0x80000000), 1.0, -1.0)
+    cells = rows * self.dim + (hashes % np.uint64(self.dim)).astype(np.int64)
+    matrix = np.bincount(cells, weights=signs, minlength=len(texts) * self.dim)
+    matrix = matrix.reshape(len(texts), self.dim).astype(np.float32)
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+  def embed_documents(self, texts):
+    return self.embed_matrix(texts).tolist()
+
+  def embed_query(self, text):
+    return self.embed_matrix([text])[0].tolist()
+
+
+def _openai():
+  from langchain_community.embeddings import OpenAIEmbeddings
+  return OpenAIEmbeddings()
+
+
+EMBEDDING_BACKENDS = {
+  "openai": _openai,
+  "local": HashingEmbeddings,
+}
+
+
+def register_embedding_backend(name, factory):
+  EMBEDDING_BACKENDS[name] = factory
+
+
+def get_embeddings(name=None):
+  """Embeddings for backend `name` (default: SEC_EMBEDDINGS, else "openai")"""
+  name = name or os.environ.get("SEC_EMBEDDINGS", "openai")
+  try:
+    factory = EMBEDDING_BACKENDS[name]
+  except KeyError:
+    raise ValueError(f"Unknown embedding backend {name!r}; choose one of {', '.join(EMBEDDING_BACKENDS)}")
+  embeddings = factory()
+  if getattr(embeddings, "cacheable", True):
+    embeddings = CachedEmbeddings(embeddings)
+  return embeddings
@@ -0,0 +1,264 @@
+"""
+On-disk cache for SEC filing downloads
+
+Filings are immutable, so a cached filing is served without touching the network;
+each one is downloaded at most once across runs. Bodies are stored zlib-compressed
+in SQLite together with their ETag / Last-Modified, and anything fetched with a
+max_age (e.g. index pages that do change) is revalidated with a conditional GET
+once it is older than that. The least recently used filings are evicted beyond
+SEC_FILING_CACHE_MB.
+"""
+import codecs
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+import requests
+
+from tools.http_client import get_session
+
+CACHE_DIR = Path(os.environ.get("SEC_TOOLS_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache"))
+
+# Browser-like headers; SEC pages reject bare clients
+HEADERS = {
+  'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+  'Accept-Encoding': 'gzip, deflate, br',
+  'Accept-Language': 'en-US,en;q=0.9,pt-BR;q=0.8,pt;q=0.7',
+  'Cache-Control': 'max-age=0',
+  'Dnt': '1',
+  'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
+  'Sec-Ch-Ua-Mobile': '?0',
+  'Sec-Ch-Ua-Platform': '"macOS"',
+  'Sec-Fetch-Dest': 'document',
+  'Sec-Fetch-Mode': 'navigate',
+  'Sec-Fetch-Site': 'none',
+  'Sec-Fetch-User': '?1',
+  'Upgrade-Insecure-Requests': '1',
+  'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+
+class FilingCache():
+  """URL -> filing text, compressed in SQLite with a small in-memory LRU front"""
+
+  def __init__(self, path, max_bytes=512 * 1024 * 1024, memory_entries=4, session=None):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self.max_bytes = max_bytes
+    self.memory_entries = memory_entries
+    self.session = session or requests
+    self._memory = OrderedDict()
+    self._downloads = {}
+    self._lock = threading.Lock()
+    self._stats = {'hits': 0, 'downloads': 0, 'revalidated': 0, 'evictions': 0,
+                   'bytes_downloaded': 0, 'bytes_saved': 0}
+
+    self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute("""
+      CREATE TABLE IF NOT EXISTS filings (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        body BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        raw_size INTEGER NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        fetched_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+      )""")
+    self._conn.execute("CREATE INDEX IF NOT EXISTS filings_accessed ON filings (accessed_at)")
+    self._conn.commit()
+
+  @staticmethod
+  def make_key(url):
+    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+  def get(self, url, headers=None, max_age=None):
+    """Filing text for `url`, downloading it only if it isn't cached
+
+    With `max_age` (seconds), an entry older than that is revalidated with
+    If-None-Match / If-Modified-Since before being served again.
+    """
+    key = self.make_key(url)
+    now = time.time()
+    with self._lock:
+      entry = self._memory.get(key)
+      if entry is not None and (max_age is None or now - entry[1] <= max_age):
+        self._memory.move_to_end(key)
+        self._hit(key, len(entry[0]), now)
+        return entry[0]
+    body, fetched_at = self._fetch(url, key, headers, max_age)
+    text = zlib.decompress(body).decode("utf-8")
+    with self._lock:
+      self._remember(key, text, fetched_at)
+    return text
+
+  def iter_bytes(self, url, headers=None, max_age=None, chunk_size=1 << 16):
+    """The filing as UTF-8 byte chunks, decompressed as they are consumed
+
+    Only the compressed body (typically a twentieth of the HTML) is held in
+    memory, never the whole document.
+    """
+    body, _ = self._fetch(url, self.make_key(url), headers, max_age)
+    decompressor = zlib.decompressobj()
+    for start in range(0, len(body), chunk_size):
+      data = decompressor.decompress(body[start:start + chunk_size])
+      if data:
+        yield data
+    tail = decompressor.flush()
+    if tail:
+      yield tail
+
+  def prefetch(self, url, headers=None, max_age=None):
+    """Make sure `url` is cached without loading its text"""
+    self._fetch(url, self.make_key(url), headers, max_age)
+
+  def _fetch(self, url, key, headers, max_age):
+    """(compressed body, fetched_at), downloading or revalidating if needed"""
+    found, stale = self._lookup(key, max_age)
+    if found is not None:
+      return found
+    # One download per URL even when several tool calls miss at once
+    with self._download_lock(key):
+      found, stale = self._lookup(key, max_age)
+      if found is not None:
+        return found
+      if stale is not None:
+        return self._download(url, key, headers, *stale)
+      return self._download(url, key, headers)
+
+  def _download_lock(self, key):
+    with self._lock:
+      lock = self._downloads.get(key)
+      if lock is None:
+        lock = self._downloads[key] = threading.Lock()
+      return lock
+
+  def _lookup(self, key, max_age):
+    """((body, fetched_at), None) on a fresh hit, (None, (etag, last_modified, body)) if stale, else (None, None)"""
+    now = time.time()
+    with self._lock:
+      row = self._conn.execute(
+        "SELECT body, raw_size, etag, last_modified, fetched_at FROM filings WHERE key = ?",
+        (key,)).fetchone()
+      if row is None:
+        return None, None
+      body, raw_size, etag, last_modified, fetched_at = row
+      if max_age is not None and now - fetched_at > max_age:
+        return None, (etag, last_modified, body)
+      self._hit(key, raw_size, now)
+      return (body, fetched_at), None
+
+  def _hit(self, key, size, now):
+    # Caller holds the lock
+    self._stats['hits'] += 1
+    self._stats['bytes_saved'] += size
+    self._conn.execute("UPDATE filings SET accessed_at = ? WHERE key = ?", (now, key))
+    self._conn.commit()
+
+  def _download(self, url, key, headers, etag=None, last_modified=None, cached_body=None):
+    request_headers = dict(headers or HEADERS)
+    if etag:
+      request_headers['If-None-Match'] = etag
+    if last_modified:
+      request_headers['If-Modified-Since'] = last_modified
+
+    with self.session.get(url, headers=request_headers, stream=True) as response:
+      now = time.time()
+      if response.status_code == 304 and cached_body is not None:
+        with self._lock:
+          raw_size = self._conn.execute(
+            "SELECT raw_size FROM filings WHERE key = ?", (key,)).fetchone()[0]
+          self._conn.execute(
+            "UPDATE filings SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+          self._conn.commit()
+          self._stats['revalidated'] += 1
+          self._stats['bytes_saved'] += raw_size
+        return cached_body, now
+
+      response.raise_for_status()
+      # Transcode to UTF-8 and compress as the body arrives, so the raw
+      # document is never held in memory at once
+      decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+      compressor = zlib.compressobj(6)
+      parts, raw_size = [], 0
+      for block in response.iter_content(1 << 16):
+        data = decoder.decode(block).encode("utf-8")
+        raw_size += len(data)
+        parts.append(compressor.compress(data))
+      data = decoder.decode(b"", final=True).encode("utf-8")
+      raw_size += len(data)
+      parts.append(compressor.compress(data))
+      parts.append(compressor.flush())
+      body = b"".join(parts)
+
+    with self._lock:
+      self._conn.execute(
+        "INSERT OR REPLACE INTO filings (key, url, body, size, raw_size, etag, last_modified, "
+        "fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (key, url, body, len(body), raw_size, response.headers.get('ETag'),
+         response.headers.get('Last-Modified'), now, now))
+      self._evict()
+      self._conn.commit()
+      self._memory.pop(key, None)
+      self._stats['downloads'] += 1
+      self._stats['bytes_downloaded'] += raw_size
+    return body, now
+
+  def _remember(self, key, text, fetched_at):
+    # Caller holds the lock
+    self._memory[key] = (text, fetched_at)
+    self._memory.move_to_end(key)
+    while len(self._memory) > self.memory_entries:
+      self._memory.popitem(last=False)
+
+  def _evict(self):
+    # Caller holds the lock
+    total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM filings").fetchone()[0]
+    if total <= self.max_bytes:
+      return
+    for key, size in self._conn.execute(
+        "SELECT key, size FROM filings ORDER BY accessed_at").fetchall():
+      if total <= self.max_bytes:
+        break
+      self._conn.execute("DELETE FROM filings WHERE key = ?", (key,))
+      self._memory.pop(key, None)
+      total -= size
+      self._stats['evictions'] += 1
+
+  def clear(self):
+    with self._lock:
+      self._memory.clear()
+      self._conn.execute("DELETE FROM filings")
+      self._conn.commit()
+
+  def stats(self):
+    with self._lock:
+      stats = dict(self._stats)
+      entries, size, raw_size = self._conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0) FROM filings").fetchone()
+    stats.update({'entries': entries, 'bytes': size, 'raw_bytes': raw_size})
+    return stats
+
+
+_filing_cache = None
+_filing_cache_lock = threading.Lock()
+
+
+def get_filing_cache():
+  """Process-wide filing cache (SEC_FILING_CACHE_MB bounds its size)"""
+  global _filing_cache
+  with _filing_cache_lock:
+    if _filing_cache is None:
+      _filing_cache = FilingCache(
+        CACHE_DIR / "sec_filings.sqlite",
+        max_bytes=int(os.environ.get("SEC_FILING_CACHE_MB", "512")) * 1024 * 1024,
+        session=get_session(),
+      )
+    return _filing_cache
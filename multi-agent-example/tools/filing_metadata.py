@@ -0,0 +1,198 @@
+"""
+Cached resolution of (ticker, form) to its latest filing
+
+Every tool call used to run a sorted filing search just to find the link to
+the latest 10-K or 10-Q. The descriptor the search returns is now kept in
+SQLite until a newer filing could plausibly exist: a form's next filing comes
+about a period (a year for a 10-K, a quarter for a 10-Q) after the last one,
+so entries are trusted for most of that period (at most max_ttl) and checked
+every min_ttl once it is nearly over. Unknown tickers are remembered for
+negative_ttl. refresh() resolves many tickers with one query.
+
+If the search fails, a stale entry is served rather than failing the call,
+and kept for min_ttl so an outage doesn't cost every call a failing request.
+"""
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+from tools.filing_cache import CACHE_DIR
+from tools.http_client import get_query_client
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Typical time between two filings of a form
+CADENCE = {"10-K": 365 * DAY, "10-Q": 91 * DAY}
+# Part of the cadence during which no new filing is expected
+QUIET_SHARE = 0.8
+# Tickers per bulk query, so that the newest filings page covers all of them
+BULK_TICKERS = 10
+
+
+def filed_timestamp(filing):
+  """The filing's filedAt as a Unix timestamp, or None"""
+  try:
+    return datetime.fromisoformat(filing['filedAt']).timestamp()
+  except (KeyError, TypeError, ValueError):
+    return None
+
+
+class FilingMetadataCache():
+  """(ticker, form) -> latest filing descriptor (or None for no filing), with TTLs"""
+
+  def __init__(self, path, client=None, min_ttl=6 * HOUR, max_ttl=7 * DAY, negative_ttl=DAY, clock=time.time):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._client = client
+    self.min_ttl = min_ttl
+    self.max_ttl = max_ttl
+    self.negative_ttl = negative_ttl
+    self.clock = clock
+    self._locks = {}
+    self._lock = threading.Lock()
+    self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'queries': 0, 'stale_served': 0}
+
+    self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute("""
+      CREATE TABLE IF NOT EXISTS latest (
+        ticker TEXT NOT NULL,
+        form TEXT NOT NULL,
+        filing TEXT,
+        fetched_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (ticker, form)
+      )""")
+    self._conn.commit()
+
+  @property
+  def client(self):
+    return self._client or get_query_client()
+
+  def ttl(self, form, filing, now):
+    """Seconds an answer stays fresh: until the form's next filing could be due"""
+    if filing is None:
+      return self.negative_ttl
+    filed = filed_timestamp(filing)
+    if filed is None or form not in CADENCE:
+      return self.min_ttl
+    quiet_until = filed + CADENCE[form] * QUIET_SHARE
+    return min(self.max_ttl, max(self.min_ttl, quiet_until - now))
+
+  def latest(self, ticker, form):
+    """The latest `form` filing of `ticker`, or None if it has none"""
+    ticker = ticker.strip().upper()
+    entry = self._lookup(ticker, form)
+    if self._fresh(entry):
+      return entry[0]
+    with self._key_lock(ticker, form):
+      entry = self._lookup(ticker, form)
+      if self._fresh(entry):
+        return entry[0]
+      self._count('misses')
+      try:
+        self._count('queries')
+        filing = self.client.latest_filing(ticker, form)
+      except requests.RequestException as e:
+        if entry is None:
+          raise
+        print(f"⚠️ Filing search failed ({type(e).__name__}), using the cached {form} of {ticker}")
+        self._count('stale_served')
+        self._store(form, {ticker: entry[0]}, ttl=self.min_ttl)
+        return entry[0]
+      self._store(form, {ticker: filing})
+      return filing
+
+  def refresh(self, tickers, form, force=False):
+    """{ticker: latest filing or None}, querying BULK_TICKERS tickers at a time
+
+    Without `force` only tickers with no fresh entry are queried. Tickers a
+    bulk query doesn't return are looked up one by one, so unknown tickers
+    are told apart from ones that just haven't filed recently.
+    """
+    tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers))
+    result = {}
+    if not force:
+      now = self.clock()
+      for ticker in tickers:
+        entry = self._lookup(ticker, form)
+        if entry is not None and entry[1] > now:
+          result[ticker] = entry[0]
+    stale = [ticker for ticker in tickers if ticker not in result]
+    for start in range(0, len(stale), BULK_TICKERS):
+      batch = stale[start:start + BULK_TICKERS]
+      self._count('queries')
+      found = self.client.latest_filings(batch, form)
+      for ticker in batch:
+        if ticker not in found:
+          self._count('queries')
+          found[ticker] = self.client.latest_filing(ticker, form)
+      self._store(form, found)
+      result.update(found)
+    return {ticker: result[ticker] for ticker in tickers}
+
+  def invalidate(self, ticker=None, form=None):
+    """Forget the entries matching `ticker` and/or `form` (all of them by default)"""
+    with self._lock:
+      self._conn.execute("DELETE FROM latest WHERE (? IS NULL OR ticker = ?) AND (? IS NULL OR form = ?)",
+                         (ticker and ticker.upper(), ticker and ticker.upper(), form, form))
+      self._conn.commit()
+
+  def _fresh(self, entry):
+    if entry is None or entry[1] <= self.clock():
+      return False
+    self._count('negative_hits' if entry[0] is None else 'hits')
+    return True
+
+  def _lookup(self, ticker, form):
+    with self._lock:
+      row = self._conn.execute("SELECT filing, expires_at FROM latest WHERE ticker = ? AND form = ?",
+                               (ticker, form)).fetchone()
+    if row is None:
+      return None
+    return (json.loads(row[0]) if row[0] is not None else None), row[1]
+
+  def _store(self, form, filings, ttl=None):
+    now = self.clock()
+    rows = [(ticker, form, json.dumps(filing) if filing is not None else None, now,
+             now + (ttl if ttl is not None else self.ttl(form, filing, now)))
+            for ticker, filing in filings.items()]
+    with self._lock:
+      self._conn.executemany("INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?, ?)", rows)
+      self._conn.commit()
+
+  def _key_lock(self, ticker, form):
+    with self._lock:
+      lock = self._locks.get((ticker, form))
+      if lock is None:
+        lock = self._locks[(ticker, form)] = threading.Lock()
+      return lock
+
+  def _count(self, name):
+    with self._lock:
+      self._stats[name] += 1
+
+  def stats(self):
+    with self._lock:
+      stats = dict(self._stats)
+      stats['entries'] = self._conn.execute("SELECT COUNT(*) FROM latest").fetchone()[0]
+    return stats
+
+
+_filing_metadata = None
+_filing_metadata_lock = threading.Lock()
+
+
+def get_filing_metadata():
+  """Process-wide latest-filing cache under CACHE_DIR"""
+  global _filing_metadata
+  with _filing_metadata_lock:
+    if _filing_metadata is None:
+      _filing_metadata = FilingMetadataCache(CACHE_DIR / "latest_filings.sqlite")
+    return _filing_metadata
@@ -0,0 +1,131 @@
+"""
+Streaming HTML -> text blocks -> chunks for SEC filings
+
+10-K filings are often tens of megabytes of inline-XBRL HTML. Instead of
+parsing a whole document into elements and joining those into a second
+full-size string, bytes are fed to an incremental HTMLParser as they arrive,
+and every finished block of text (paragraph, heading, table row, list item)
+is yielded at once. iter_chunks then packs blocks into overlapping chunks, so
+each stage only holds a window of the document.
+"""
+import codecs
+from collections import deque
+from html.parser import HTMLParser
+
+# Tags whose start or end ends the current block of text
+BLOCK_TAGS = frozenset({
+  "address", "article", "blockquote", "br", "caption", "dd", "div", "dl", "dt",
+  "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "ol", "p", "pre", "section",
+  "table", "title", "tr", "ul",
+})
+CELL_TAGS = frozenset({"td", "th"})
+# Never text: scripts, styles and the hidden inline-XBRL header with its facts
+SKIP_TAGS = frozenset({"head", "script", "style", "ix:header", "noscript"})
+VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input",
+                       "link", "meta", "source", "track", "wbr"})
+
+
+class BlockExtractor(HTMLParser):
+  """Incremental HTML parser that collects finished text blocks
+
+  Cells of a table row are joined with " | " so rows stay readable.
+  """
+
+  def __init__(self):
+    super().__init__(convert_charrefs=True)
+    self.blocks = []
+    self._parts = []
+    self._row_cells = 0
+    self._skip_tag = None
+    self._skip_depth = 0
+
+  def handle_starttag(self, tag, attrs):
+    if self._skip_tag is not None:
+      if tag == self._skip_tag:
+        self._skip_depth += 1
+      return
+    if tag in SKIP_TAGS or (tag not in VOID_TAGS and _hidden(attrs)):
+      self._flush()
+      self._skip_tag, self._skip_depth = tag, 1
+      return
+    if tag in CELL_TAGS:
+      if self._row_cells and self._parts:
+        self._parts.append(" | ")
+      self._row_cells += 1
+    elif tag in BLOCK_TAGS:
+      self._flush()
+
+  def handle_startendtag(self, tag, attrs):
+    if self._skip_tag is None and tag in BLOCK_TAGS:
+      self._flush()
+
+  def handle_endtag(self, tag):
+    if self._skip_tag is not None:
+      if tag == self._skip_tag:
+        self._skip_depth -= 1
+        if self._skip_depth == 0:
+          self._skip_tag = None
+      return
+    if tag in BLOCK_TAGS:
+      self._flush()
+
+  def handle_data(self, data):
+    if self._skip_tag is None:
+      self._parts.append(data)
+
+  def _flush(self):
+    if self._parts:
+      # split() also folds &nbsp; (U+00A0), which filings use for layout
+      text = " ".join("".join(self._parts).split())
+      self._parts = []
+      if text and text != "|":
+        self.blocks.append(text)
+    self._row_cells = 0
+
+  def close(self):
+    super().close()
+    self._flush()
+
+
+def _hidden(attrs):
+  for name, value in attrs:
+    if name == "style" and value and "display:none" in value.replace(" ", "").lower():
+      return True
+  return False
+
+
+def iter_text_blocks(byte_chunks, encoding="utf-8"):
+  """Text blocks of an HTML document given as an iterable of byte chunks"""
+  decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+  parser = BlockExtractor()
+  for chunk in byte_chunks:
+    parser.feed(decoder.decode(chunk))
+    if parser.blocks:
+      yield from parser.blocks
+      parser.blocks = []
+  parser.feed(decoder.decode(b"", final=True))
+  parser.close()
+  yield from parser.blocks
+
+
+def iter_chunks(blocks, chunk_size=3025, chunk_overlap=300, separator="\n"):
+  """Pack text blocks into chunks of at most chunk_size characters
+
+  Same packing as langchain's CharacterTextSplitter over blocks joined by
+  `separator`: a chunk repeats trailing blocks of the previous one, up to
+  chunk_overlap characters, and a single block longer than chunk_size becomes
+  its own chunk.
+  """
+  window = deque()
+  total = 0
+  step = len(separator)
+  for block in blocks:
+    size = len(block)
+    if window and total + size + step > chunk_size:
+      yield separator.join(window)
+      while total > chunk_overlap or (window and total + size + step > chunk_size):
+        total -= len(window.popleft()) + (step if window else 0)
+    window.append(block)
+    total += size + (step if len(window) > 1 else 0)
+  if window:
+    yield separator.join(window)
@@ -0,0 +1,123 @@
+"""
+Shared HTTP plumbing for the SEC tools
+
+Every tool call used to open fresh connections, via a new QueryApi for the
+filing search and a bare requests.get for the download, and so paid a TCP/TLS
+handshake each time. One process-wide requests.Session now pools keep-alive
+connections per host, applies a default timeout and retries transient failures
+(429 and 5xx) with exponential backoff, honouring Retry-After. It is safe to
+share between threads, so concurrent crews use the same pool.
+
+Tuning: SEC_HTTP_POOL_SIZE (connections kept per host, default 16),
+SEC_HTTP_TIMEOUT (seconds, default 30) and SEC_HTTP_RETRIES (default 3).
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SEC_API_ENDPOINT = os.environ.get("SEC_API_ENDPOINT", "https://api.sec-api.io")
+
+
+class PooledSession(requests.Session):
+  """requests.Session with a default timeout and a retrying, size-limited connection pool"""
+
+  def __init__(self, pool_size=16, timeout=30, retries=3, backoff=0.5):
+    super().__init__()
+    self.timeout = timeout
+    retry = Retry(
+      total=retries,
+      backoff_factor=backoff,
+      status_forcelist=(429, 500, 502, 503, 504),
+      allowed_methods=frozenset({"GET", "HEAD", "POST"}),  # the filing search is a read-only POST
+      respect_retry_after_header=True,
+      raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry, pool_block=True)
+    self.mount("https://", adapter)
+    self.mount("http://", adapter)
+
+  def request(self, method, url, **kwargs):
+    kwargs.setdefault("timeout", self.timeout)
+    return super().request(method, url, **kwargs)
+
+
+class SECQueryClient():
+  """The sec-api.io filing search, over the shared session"""
+
+  def __init__(self, api_key, session=None, endpoint=None):
+    self.api_key = api_key
+    self.session = session or get_session()
+    self.endpoint = endpoint or SEC_API_ENDPOINT
+
+  def get_filings(self, query):
+    response = self.session.post(self.endpoint, params={'token': self.api_key}, json=query)
+    response.raise_for_status()
+    return response.json()
+
+  def latest_filing(self, ticker, form_type):
+    """The most recent filing of `form_type` for `ticker`, or None"""
+    query = {
+      "query": {
+        "query_string": {
+          "query": f"ticker:{ticker} AND formType:\"{form_type}\""
+        }
+      },
+      "from": "0",
+      "size": "1",
+      "sort": [{ "filedAt": { "order": "desc" }}]
+    }
+    filings = self.get_filings(query)['filings']
+    return filings[0] if filings else None
+
+  def latest_filings(self, tickers, form_type, size=50):
+    """{ticker: most recent filing} for several tickers from one query
+
+    Only the newest `size` filings are searched, so a ticker that hasn't
+    filed for a while can be missing even though it exists.
+    """
+    query = {
+      "query": {
+        "query_string": {
+          "query": f"ticker:({' OR '.join(tickers)}) AND formType:\"{form_type}\""
+        }
+      },
+      "from": "0",
+      "size": str(size),
+      "sort": [{ "filedAt": { "order": "desc" }}]
+    }
+    latest = {}
+    for filing in self.get_filings(query)['filings']:
+      latest.setdefault(filing.get('ticker', "").upper(), filing)
+    return {ticker: latest[ticker] for ticker in tickers if ticker in latest}
+
+
+_session = None
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_session():
+  """Process-wide pooled session"""
+  global _session
+  with _lock:
+    if _session is None:
+      _session = PooledSession(
+        pool_size=int(os.environ.get("SEC_HTTP_POOL_SIZE", "16")),
+        timeout=float(os.environ.get("SEC_HTTP_TIMEOUT", "30")),
+        retries=int(os.environ.get("SEC_HTTP_RETRIES", "3")),
+      )
+    return _session
+
+
+def get_query_client(api_key=None):
+  """Shared SECQueryClient for `api_key` (default: SEC_API_API_KEY)"""
+  api_key = api_key or os.environ['SEC_API_API_KEY']
+  session = get_session()
+  with _lock:
+    if api_key not in _clients:
+      _clients[api_key] = SECQueryClient(api_key, session)
+    return _clients[api_key]
@@ -0,0 +1,179 @@
+"""
+On-disk filing indexes, one per (filing, chunking config, embedding model)
+
+Building the vector index for a 10-K embeds every chunk of it. That now happens
+once: later questions about the same filing memory-map the saved vectors and
+only embed the question. Each index directory holds chunks.json (the chunk
+texts, in index order), sections.json (the filing section of each chunk), bm25/
+(the lexical index, see tools.bm25) and, once a query has needed it,
+vectors.npy (the float32 matrix of the embedded chunks), so loading never
+unpickles anything. The matrix is opened with np.load(mmap_mode="r") and
+searched exactly (tools.retrieval.FlatIndex), so its pages come from the OS
+page cache on demand instead of being copied into every process; FAISS's
+IO_FLAG_MMAP would only do that for IVF inverted lists, not for a flat index.
+A change to the chunking settings or the embedding model gives a new key.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from tools.bm25 import BM25Index
+from tools.embedding_cache import embedding_model_name
+from tools.filing_cache import CACHE_DIR
+from tools.retrieval import FilingIndex, FlatIndex, VectorStore
+
+# Bump when the text extraction feeding the splitter or the saved layout changes
+INDEX_FORMAT = 5
+
+
+class IndexCache():
+  """Saved filing indexes keyed by filing URL, chunk config and embedding model"""
+
+  def __init__(self, directory, memory_entries=8):
+    self.directory = Path(directory)
+    self.directory.mkdir(parents=True, exist_ok=True)
+    self.memory_entries = memory_entries
+    self._memory = OrderedDict()
+    self._builds = {}
+    self.reports = {}
+    self._lock = threading.Lock()
+    self._stats = {'memory_hits': 0, 'disk_hits': 0, 'builds': 0, 'vector_builds': 0,
+                   'vector_loads': 0, 'chunks_embedded': 0}
+
+  @staticmethod
+  def make_key(url, chunk_config, model):
+    payload = json.dumps({'url': url.strip(), 'chunks': chunk_config, 'model': model,
+                          'format': INDEX_FORMAT}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+  def get_or_build(self, url, chunk_config, embeddings, load_chunks):
+    """FilingIndex for `url`, building it from `load_chunks()` only on a miss
+
+    `load_chunks` returns (section key, chunk text) pairs; it isn't called (so
+    the filing isn't even parsed) when a saved index exists. Chunks are
+    embedded only when a query first needs the vector index.
+    """
+    key = self.make_key(url, chunk_config, embedding_model_name(embeddings))
+    index = self._cached(key, url, embeddings)
+    if index is not None:
+      return index
+    with self._build_lock(key):
+      index = self._cached(key, url, embeddings)
+      if index is not None:
+        return index
+      sections, chunks = [], []
+      for section, chunk in load_chunks():
+        sections.append(section)
+        chunks.append(chunk)
+      lexical = BM25Index.build(chunks)
+      self._save(key, chunks, sections, lexical)
+      index = self._index(key, url, chunks, sections, lexical, embeddings)
+      with self._lock:
+        self._stats['builds'] += 1
+        self._remember(key, index)
+      return index
+
+  def _build_lock(self, key):
+    with self._lock:
+      lock = self._builds.get(key)
+      if lock is None:
+        lock = self._builds[key] = threading.Lock()
+      return lock
+
+  def _cached(self, key, url, embeddings):
+    with self._lock:
+      index = self._memory.get(key)
+      if index is not None:
+        self._memory.move_to_end(key)
+        self._stats['memory_hits'] += 1
+        return index
+    path = self.directory / key
+    if not (path / "chunks.json").exists():
+      return None
+    chunks = json.loads((path / "chunks.json").read_text(encoding="utf-8"))
+    sections = json.loads((path / "sections.json").read_text(encoding="utf-8"))
+    index = self._index(key, url, chunks, sections, BM25Index.load(path / "bm25"), embeddings)
+    with self._lock:
+      self._stats['disk_hits'] += 1
+      self._remember(key, index)
+    return index
+
+  def _index(self, key, url, chunks, sections, lexical, embeddings):
+    return FilingIndex(chunks, lexical, lambda texts: self._vectors(key, url, texts, embeddings), sections)
+
+  def _vectors(self, key, url, chunks, embeddings):
+    """VectorStore of the filing's embedded `chunks`: memory-mapped if saved, otherwise embedded and saved"""
+    path = self.directory / key / "vectors.npy"
+    with self._build_lock(key):
+      if path.exists():
+        with self._lock:
+          self._stats['vector_loads'] += 1
+        return VectorStore(embeddings, FlatIndex(np.load(path, mmap_mode="r")))
+      store = VectorStore.from_texts(chunks, embeddings)
+      # Write next to the final location, then rename, so readers never see half an index
+      tmp = path.with_name(f".vectors.{uuid.uuid4().hex}.npy")
+      np.save(tmp, store.index.matrix)
+      os.replace(tmp, path)
+
+    report = getattr(embeddings, "last_report", None)
+    with self._lock:
+      self._stats['vector_builds'] += 1
+      self._stats['chunks_embedded'] += report['chunks'] - report['hits'] if report else len(chunks)
+      if report:
+        self.reports[url] = report
+    if report:
+      print(f"🧮 Indexed {len(chunks)} chunks: {report['hit_rate']:.0%} from the embedding cache, "
+            f"{report['requests']} embedding requests ({report['requests_saved']} saved)")
+    return store
+
+  def _save(self, key, chunks, sections, lexical):
+    # Write next to the final location, then rename, so readers never see half an index
+    tmp = self.directory / f".{key}.{uuid.uuid4().hex}"
+    tmp.mkdir()
+    try:
+      (tmp / "chunks.json").write_text(json.dumps(chunks), encoding="utf-8")
+      (tmp / "sections.json").write_text(json.dumps(sections), encoding="utf-8")
+      lexical.save(tmp / "bm25")
+      os.replace(tmp, self.directory / key)
+    except OSError:
+      # Another process saved the same index first
+      shutil.rmtree(tmp, ignore_errors=True)
+
+  def _remember(self, key, index):
+    # Caller holds the lock
+    self._memory[key] = index
+    self._memory.move_to_end(key)
+    while len(self._memory) > self.memory_entries:
+      self._memory.popitem(last=False)
+
+  def clear(self):
+    with self._lock:
+      self._memory.clear()
+      for path in self.directory.iterdir():
+        shutil.rmtree(path, ignore_errors=True)
+
+  def stats(self):
+    with self._lock:
+      stats = dict(self._stats)
+    stats['indexes'] = sum(1 for path in self.directory.iterdir() if not path.name.startswith("."))
+    return stats
+
+
+_index_cache = None
+_index_cache_lock = threading.Lock()
+
+
+def get_index_cache():
+  """Process-wide index cache under CACHE_DIR/indexes"""
+  global _index_cache
+  with _index_cache_lock:
+    if _index_cache is None:
+      _index_cache = IndexCache(CACHE_DIR / "indexes")
+    return _index_cache
@@ -0,0 +1,171 @@
+"""
+Hybrid lexical + vector search over one filing
+
+FilingIndex answers a question from BM25 and the filing's vector index, fused
+with reciprocal rank fusion. Keyword lookups whose best BM25 chunk contains
+every query term are answered from BM25 alone, without embedding anything;
+the vector index is only loaded (or built) the first time a query needs it.
+
+A query can be scoped to filing sections (see tools.sections): both retrievers
+then only return chunks of those sections. Chunks of NOT_EMBEDDED sections
+(cover page, exhibits) are searched lexically but never embedded.
+"""
+import math
+import threading
+
+import numpy as np
+
+from tools.bm25 import is_keyword_query
+from tools.sections import NOT_EMBEDDED
+
+# Candidates taken from each retriever, and the RRF damping constant
+FUSION_DEPTH = 20
+RRF_K = 60
+
+
+class FlatIndex():
+  """Exact L2 nearest neighbours over a float32 matrix (search() as in faiss.IndexFlatL2)
+
+  The matrix may be a read-only memmap: rows are then paged in from the file
+  as a search touches them and shared with other processes, not copied.
+  """
+
+  def __init__(self, matrix):
+    self.matrix = matrix
+    self._norms = None
+
+  @property
+  def ntotal(self):
+    return len(self.matrix)
+
+  def search(self, queries, k):
+    """(squared distances, row ids) of the k nearest rows to each query, nearest first"""
+    if self._norms is None:
+      self._norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+    queries = np.asarray(queries, dtype=np.float32)
+    k = min(k, self.ntotal)
+    distances = (self._norms[None, :] - 2 * (queries @ self.matrix.T)
+                 + np.einsum("ij,ij->i", queries, queries)[:, None])
+    ids = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(distances, ids, axis=1), axis=1, kind="stable")
+    ids = np.take_along_axis(ids, order, axis=1)
+    return np.take_along_axis(distances, ids, axis=1), ids
+
+
+class VectorStore():
+  """The embedded chunks of a filing: their FlatIndex and the model that embeds queries"""
+
+  def __init__(self, embedding_function, index):
+    self.embedding_function = embedding_function
+    self.index = index
+
+  @classmethod
+  def from_texts(cls, texts, embedding):
+    """Embed `texts` and index them in order"""
+    return cls(embedding, FlatIndex(np.asarray(embedding.embed_documents(texts), dtype=np.float32)))
+
+
+def reciprocal_rank_fusion(*rankings, k=RRF_K):
+  """Fuse ranked lists of ids: score(id) = sum of 1 / (k + rank)"""
+  scores = {}
+  for ranking in rankings:
+    for rank, doc in enumerate(ranking, start=1):
+      scores[doc] = scores.get(doc, 0.0) + 1.0 / (k + rank)
+  return sorted(scores, key=scores.get, reverse=True)
+
+
+class FilingIndex():
+  """Chunks of a filing with their BM25 index and a lazily loaded VectorStore
+
+  `sections` holds the section key of every chunk (None for an unsectioned
+  filing). `load_vectors(texts)` returns the VectorStore of the embedded
+  chunk texts, in the order of `embedded`.
+  """
+
+  def __init__(self, chunks, lexical, load_vectors, sections=None):
+    self.chunks = chunks
+    self.lexical = lexical
+    self.sections = sections
+    self._load_vectors = load_vectors
+    self._vectors = None
+    self._lock = threading.Lock()
+    if sections is None:
+      self.embedded = np.arange(len(chunks))
+      self._keys = None
+    else:
+      self._keys = np.asarray(sections, dtype=object)
+      self.embedded = np.flatnonzero(~np.isin(self._keys, list(NOT_EMBEDDED)))
+    self.stats = {'lexical_only': 0, 'hybrid': 0, 'scoped': 0}
+
+  @property
+  def vectors(self):
+    with self._lock:
+      if self._vectors is None:
+        self._vectors = self._load_vectors([self.chunks[i] for i in self.embedded])
+      return self._vectors
+
+  def scope(self, sections):
+    """Bool mask of the chunks in `sections`, or None for no scope (also when none are in this filing)"""
+    if not sections or self._keys is None:
+      return None
+    mask = np.isin(self._keys, list(sections))
+    return mask if mask.any() else None
+
+  def vector_search(self, query, k=FUSION_DEPTH, allowed=None):
+    """Chunk indexes nearest to the query embedding"""
+    return self.vector_search_many([query], k, [allowed])[0]
+
+  def vector_search_many(self, queries, k=FUSION_DEPTH, allowed=None):
+    """vector_search for several queries, embedded in one batch and searched at once
+
+    `allowed` is one bool chunk mask (or None) per query; scoped queries
+    search deeper so that k of their neighbours survive the filter.
+    """
+    allowed = allowed or [None] * len(queries)
+    if not len(self.embedded):
+      return [[] for _ in queries]
+    masks = [None if mask is None else mask[self.embedded] for mask in allowed]
+    depth = k
+    for mask in masks:
+      if mask is not None and mask.any():
+        depth = max(depth, k * math.ceil(len(mask) / mask.sum()))
+    store = self.vectors
+    embed = getattr(store.embedding_function, "embed_queries", store.embedding_function.embed_documents)
+    embeddings = np.asarray(embed(list(queries)), dtype=np.float32)
+    # Vector index positions follow the order of self.embedded
+    _, ids = store.index.search(embeddings, min(depth, len(self.embedded)))
+    results = []
+    for row, mask in zip(ids, masks):
+      positions = [int(i) for i in row if i >= 0 and (mask is None or mask[i])]
+      results.append([int(self.embedded[i]) for i in positions[:k]])
+    return results
+
+  def search(self, query, k=4, sections=None):
+    """The k most relevant chunk texts for `query`, from `sections` if given"""
+    return self.search_many([query], k, [sections])[0]
+
+  def search_many(self, queries, k=4, sections=None):
+    """search() for each query (`sections`: one scope per query); the ones that need vectors share one embedding batch"""
+    sections = sections or [None] * len(queries)
+    results = [None] * len(queries)
+    pending = []
+    for i, (query, scope) in enumerate(zip(queries, sections)):
+      mask = self.scope(scope)
+      if mask is not None:
+        self.stats['scoped'] += 1
+      lexical = [doc for doc, _ in self.lexical.search(query, FUSION_DEPTH, mask)]
+      keyword = lexical and is_keyword_query(query) and self.lexical.covers(lexical[0], query)
+      # A scope of unembedded sections only has nothing to find in the vector index either
+      if keyword or (mask is not None and not mask[self.embedded].any()):
+        self.stats['lexical_only'] += 1
+        results[i] = [self.chunks[doc] for doc in lexical[:k]]
+      else:
+        pending.append((i, lexical, mask))
+    if pending:
+      self.stats['hybrid'] += len(pending)
+      nearest = self.vector_search_many([queries[i] for i, _, _ in pending],
+                                        allowed=[mask for _, _, mask in pending])
+      for (i, lexical, _), vector in zip(pending, nearest):
+        fused = reciprocal_rank_fusion(lexical, vector)
+        results[i] = [self.chunks[doc] for doc in fused[:k]]
+    return results
@@ -1,12 +1,12 @@
-import os
-import requests
 from langchain.tools import tool
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 
-from sec_api import QueryApi
-from unstructured.partition.html import partition_html
+from tools.embeddings import get_embeddings
+from tools.filing_cache import HEADERS, get_filing_cache
+from tools.filing_metadata import get_filing_metadata
+from tools.html_text import iter_text_blocks
+from tools.index_cache import get_index_cache
+from tools.sections import iter_section_chunks, scope_question
+from tools.text_splitter import TokenSplitter
 
 class SECTools():
   @tool("Search 10-Q form")
@@ -15,29 +15,14 @@ class SECTools():
     Useful to search information from the latest 10-Q form for a
     given stock.
     The input to this tool should be a pipe (|) separated text of
-    length two, representing the stock ticker you are interested and what
-    question you have from it.
-    For example, `MSFT|what was last quarter's revenue`.
+    the stock ticker you are interested in followed by one or more
+    questions you have from it.
+    For example, `MSFT|what was last quarter's revenue` or
+    `MSFT|what was last quarter's revenue|what was the operating income`.
+    A question can be limited to one section of the filing by starting
+    it with the section, like `MSFT|MD&A: what drove revenue growth`.
     """
-    stock, ask = data.split("|")
-    queryApi = QueryApi(api_key=os.environ['SEC_API_API_KEY'])
-    query = {
-      "query": {
-        "query_string": {
-          "query": f"ticker:{stock} AND formType:\"10-Q\""
-        }
-      },
-      "from": "0",
-      "size": "1",
-      "sort": [{ "filedAt": { "order": "desc" }}]
-    }
-
-    fillings = queryApi.get_filings(query)['filings']
-    if len(fillings) == 0:
-      return "Sorry, I couldn't find any filling for this stock, check if the ticker is correct."
-    link = fillings[0]['linkToFilingDetails']
-    answer = SECTools.__embedding_search(link, ask)
-    return answer
+    return SECTools.__search(data, "10-Q")
 
   @tool("Search 10-K form")
   def search_10k(data):
@@ -45,67 +30,57 @@ class SECTools():
     Useful to search information from the latest 10-K form for a
     given stock.
     The input to this tool should be a pipe (|) separated text of
-    length two, representing the stock ticker you are interested, what
-    question you have from it.
-    For example, `MSFT|what was last year's revenue`.
+    the stock ticker you are interested in followed by one or more
+    questions you have from it.
+    For example, `MSFT|what was last year's revenue` or
+    `MSFT|what was last year's revenue|what are the main risk factors`.
+    A question can be limited to one section of the filing by starting
+    it with the section, like `MSFT|Item 1A: what are the supply chain risks`.
     """
-    stock, ask = data.split("|")
-    queryApi = QueryApi(api_key=os.environ['SEC_API_API_KEY'])
-    query = {
-      "query": {
-        "query_string": {
-          "query": f"ticker:{stock} AND formType:\"10-K\""
-        }
-      },
-      "from": "0",
-      "size": "1",
-      "sort": [{ "filedAt": { "order": "desc" }}]
-    }
-
-    fillings = queryApi.get_filings(query)['filings']
-    if len(fillings) == 0:
-      return "Sorry, I couldn't find any filling for this stock, check if the ticker is correct."
-    link = fillings[0]['linkToFilingDetails']
-    answer = SECTools.__embedding_search(link, ask)
-    return answer
+    return SECTools.__search(data, "10-K")
 
-  def __embedding_search(url, ask):
-    text = SECTools.__download_form_html(url)
-    elements = partition_html(text=text)
-    content = "\n".join([str(el) for el in elements])
-    text_splitter = CharacterTextSplitter(
-        separator = "\n",
-        chunk_size = 3025,
-        chunk_overlap  = 300,
-        length_function = len,
-        is_separator_regex = False,
-    )
-    docs = text_splitter.create_documents([content])
-    retriever = FAISS.from_documents(
-      docs, OpenAIEmbeddings()
-    ).as_retriever()
-    answers = retriever.get_relevant_documents(ask, top_k=4)
-    answers = "\n\n".join([a.page_content for a in answers])
-    return answers
+  @staticmethod
+  def search_many(ticker, form, questions):
+    """
+    Passages from the latest `form` ("10-K" or "10-Q") filing of `ticker`
+    for each question, as {question: passages}, or None if there is no
+    such filing. The filing is fetched, parsed and indexed once and the
+    questions are embedded in one batch. Each question is searched in the
+    sections it names ("Item 7: ...", "Risk Factors: ...") or, failing
+    that, the sections its keywords route to (see tools.sections).
+    """
+    filing = get_filing_metadata().latest(ticker, form)
+    if filing is None:
+      return None
+    index = SECTools.filing_index(filing['linkToFilingDetails'])
+    scoped = [scope_question(question, form) for question in questions]
+    passages = index.search_many([query for _, query in scoped], k=4,
+                                 sections=[sections for sections, _ in scoped])
+    return {question: "\n\n".join(found) for question, found in zip(questions, passages)}
 
-  def __download_form_html(url):
-    headers = {
-      'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-      'Accept-Encoding': 'gzip, deflate, br',
-      'Accept-Language': 'en-US,en;q=0.9,pt-BR;q=0.8,pt;q=0.7',
-      'Cache-Control': 'max-age=0',
-      'Dnt': '1',
-      'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
-      'Sec-Ch-Ua-Mobile': '?0',
-      'Sec-Ch-Ua-Platform': '"macOS"',
-      'Sec-Fetch-Dest': 'document',
-      'Sec-Fetch-Mode': 'navigate',
-      'Sec-Fetch-Site': 'none',
-      'Sec-Fetch-User': '?1',
-      'Upgrade-Insecure-Requests': '1',
-      'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
+  def __search(data, form):
+    stock, *asks = [part.strip() for part in data.split("|")]
+    asks = [ask for ask in asks if ask]
+    if not asks:
+      return f"Please add a question after the ticker, for example `{stock}|what was the revenue`."
+    answers = SECTools.search_many(stock, form, asks)
+    if answers is None:
+      return "Sorry, I couldn't find any filling for this stock, check if the ticker is correct."
+    if len(answers) == 1:
+      return next(iter(answers.values()))
+    return "\n\n".join(f"Question: {ask}\n{answer}" for ask, answer in answers.items())
 
-    response = requests.get(url, headers=headers)
-    return response.text
-  
\ No newline at end of file
+  @staticmethod
+  def filing_index(url):
+    """The FilingIndex (sectioned chunks, BM25, lazy vectors) of the filing at `url`"""
+    chunk_config = {'splitter': 'tokens', 'encoding': 'cl100k_base', 'chunk_tokens': 750, 'overlap_tokens': 75}
+    def load_chunks():
+      # Streamed: the filing is never held in memory as one string
+      blocks = iter_text_blocks(get_filing_cache().iter_bytes(url, headers=HEADERS))
+      splitter = TokenSplitter(
+        chunk_tokens = chunk_config['chunk_tokens'],
+        overlap_tokens = chunk_config['overlap_tokens'],
+        encoding = chunk_config['encoding'],
+      )
+      return iter_section_chunks(blocks, splitter)
+    return get_index_cache().get_or_build(url, chunk_config, get_embeddings(), load_chunks)
@@ -0,0 +1,169 @@
+"""
+Standard Item sections of 10-K / 10-Q filings
+
+Headings ("Item 1A. Risk Factors", "ITEM 7. MANAGEMENT'S DISCUSSION ...") are
+mapped to canonical section keys by their title, so the same key covers a
+10-K and a 10-Q (e.g. Risk Factors is Item 1A of a 10-K and Part II Item 1A of
+a 10-Q). Text before the first Item is "cover"; an Item whose title isn't
+recognised gets "item_<number>". Table-of-contents rows, which also start with
+"Item", are not headings.
+
+Questions can name their sections explicitly ("Item 1A: ...", "Risk Factors:
+...") or are routed by keywords (see ROUTES).
+"""
+import re
+from itertools import groupby
+from operator import itemgetter
+
+ITEM = re.compile(r"\s*ITEM\s+(\d{1,2}[A-C]?)\b\s*([.:|\-–—]?)[.:|\s]*(.*)", re.I | re.S)
+TOC_ROW = re.compile(r"\|\s*[\divxlc\-–]+\s*$", re.I)
+
+# (key, phrase in the heading title); checked in order, most specific first
+SECTION_TITLES = (
+  ("market_risk", "disclosures about market risk"),
+  ("market_for_equity", "market for registrant"),
+  ("risk_factors", "risk factors"),
+  ("unresolved_staff_comments", "unresolved staff comments"),
+  ("cybersecurity", "cybersecurity"),
+  ("properties", "properties"),
+  ("legal_proceedings", "legal proceedings"),
+  ("mine_safety", "mine safety"),
+  ("mdna", "management's discussion"),
+  ("mdna", "management’s discussion"),
+  ("mdna", "md&a"),
+  ("accountant_changes", "disagreements with accountants"),
+  ("exhibits", "exhibits"),
+  ("financial_statements", "financial statements"),
+  ("controls", "controls and procedures"),
+  ("other_information", "other information"),
+  ("directors", "directors, executive officers"),
+  ("executive_compensation", "executive compensation"),
+  ("security_ownership", "security ownership"),
+  ("relationships", "certain relationships"),
+  ("accountant_fees", "accountant fees"),
+  ("form_summary", "summary"),
+  ("unregistered_sales", "unregistered sales"),
+  ("defaults", "defaults upon senior securities"),
+  ("selected_financial_data", "selected financial data"),
+  ("business", "business"),
+)
+SECTION_KEYS = tuple(dict.fromkeys(key for key, _ in SECTION_TITLES))
+
+# Item numbers of each form; a 10-Q number can be in Part I or Part II
+ITEMS = {
+  "10-K": {
+    "1": ("business",), "1A": ("risk_factors",), "1B": ("unresolved_staff_comments",),
+    "1C": ("cybersecurity",), "2": ("properties",), "3": ("legal_proceedings",),
+    "4": ("mine_safety",), "5": ("market_for_equity",), "6": ("selected_financial_data",),
+    "7": ("mdna",), "7A": ("market_risk",), "8": ("financial_statements",),
+    "9": ("accountant_changes",), "9A": ("controls",), "9B": ("other_information",),
+    "10": ("directors",), "11": ("executive_compensation",), "12": ("security_ownership",),
+    "13": ("relationships",), "14": ("accountant_fees",), "15": ("exhibits",), "16": ("form_summary",),
+  },
+  "10-Q": {
+    "1": ("financial_statements", "legal_proceedings"), "1A": ("risk_factors",),
+    "2": ("mdna", "unregistered_sales"), "3": ("market_risk", "defaults"),
+    "4": ("controls", "mine_safety"), "5": ("other_information",), "6": ("exhibits",),
+  },
+}
+
+# Chunks of these sections are searchable with BM25 but never embedded
+NOT_EMBEDDED = frozenset({"cover", "exhibits", "form_summary"})
+
+# Question keywords -> the sections that answer them (every matching route counts)
+ROUTES = (
+  (re.compile(r"\bmarket risk\b|\binterest rate risk\b|\bforeign (?:currency|exchange)\b|\bhedg", re.I), ("market_risk",)),
+  (re.compile(r"\brisk factors?\b|\brisks?\b", re.I), ("risk_factors",)),
+  (re.compile(r"\bmd&a\b|\bmanagement'?s discussion\b|\bresults of operations\b|\bliquidity\b", re.I), ("mdna",)),
+  (re.compile(r"\blegal proceedings\b|\blawsuits?\b|\blitigation\b", re.I), ("legal_proceedings",)),
+  (re.compile(r"\bbalance sheets?\b|\bcash flows? statements?\b|\bstatements? of (?:operations|income|cash flows)\b"
+              r"|\bnotes to (?:the )?(?:consolidated )?financial statements\b", re.I), ("financial_statements",)),
+  (re.compile(r"\bcybersecurity\b", re.I), ("cybersecurity", "risk_factors")),
+  (re.compile(r"\bexecutive compensation\b", re.I), ("executive_compensation",)),
+  (re.compile(r"\bcontrols and procedures\b|\binternal control\b", re.I), ("controls",)),
+  (re.compile(r"\bsegments?\b|\bproducts? and services\b|\bcompetition\b|\bemployees\b|\bheadcount\b", re.I),
+   ("business", "mdna")),
+)
+SCOPE = re.compile(r"\s*(?:ITEM\s+(\d{1,2}[A-C]?)|([A-Za-z&'’ _]{3,60}?))\s*:\s*(.+)", re.I | re.S)
+
+
+def title_key(title):
+  """Canonical key for an Item title, or None"""
+  title = title.lower()
+  for key, phrase in SECTION_TITLES:
+    if phrase in title:
+      return key
+  return None
+
+
+def heading(block):
+  """(item number, title) if `block` is an Item heading, else None
+
+  "Item 7." / "ITEM 7 | ..." / "ITEM 7 MANAGEMENT'S DISCUSSION" are headings;
+  a cross-reference ("Item 7 of this report ...") and a table-of-contents row
+  ending in a page number are not.
+  """
+  match = ITEM.match(block)
+  if match is None or len(block) > 200 or TOC_ROW.search(block):
+    return None
+  number, punctuation, title = match.groups()
+  title = title.strip(" |.")
+  if not punctuation and title and title_key(title) is None:
+    return None
+  return number.upper(), title
+
+
+def iter_section_blocks(blocks):
+  """(section key, block) for every block; a heading without a title takes the next block's"""
+  section = "cover"
+  pending = None  # (item number, heading block) whose title is the next block
+  for block in blocks:
+    if pending is not None:
+      number, held = pending
+      section = (title_key(block) if len(block) <= 200 else None) or f"item_{number.lower()}"
+      pending = None
+      yield section, held
+    else:
+      found = heading(block)
+      if found is not None:
+        number, title = found
+        if not title:
+          pending = number, block
+          continue
+        section = title_key(title) or f"item_{number.lower()}"
+    yield section, block
+  if pending is not None:
+    yield f"item_{pending[0].lower()}", pending[1]
+
+
+def iter_section_chunks(blocks, splitter):
+  """(section key, chunk text) of a block stream; every section is split on its own"""
+  for section, group in groupby(iter_section_blocks(blocks), key=itemgetter(0)):
+    for chunk in splitter.iter_chunks(block for _, block in group):
+      yield section, chunk
+
+
+def section_names(name, form="10-K"):
+  """Section keys for a scope name: "Item 1A", "Risk Factors", "MD&A" or a key; () if unknown"""
+  name = name.strip()
+  match = re.fullmatch(r"ITEM\s+(\d{1,2}[A-C]?)\.?", name, re.I)
+  if match:
+    number = match.group(1).upper()
+    return ITEMS.get(form, ITEMS["10-K"]).get(number, ()) + (f"item_{number.lower()}",)
+  key = name.lower().replace(" ", "_")
+  if key in SECTION_KEYS or key == "cover":
+    return (key,)
+  key = title_key(name)
+  return (key,) if key else ()
+
+
+def scope_question(question, form="10-K"):
+  """(sections or None, question): the sections a prefix names (which is cut off), else keyword routes"""
+  match = SCOPE.match(question)
+  if match:
+    number, name, rest = match.groups()
+    sections = section_names(f"Item {number}" if number else name, form)
+    if sections:
+      return sections, rest.strip()
+  routed = [key for pattern, sections in ROUTES if pattern.search(question) for key in sections]
+  return (tuple(dict.fromkeys(routed)) or None), question
@@ -0,0 +1,134 @@
+"""
+Token-sized chunking of filing text
+
+Chunks are sized in tokens of the embedding model's encoding (tiktoken;
+a regex estimate when tiktoken or its encoding file is unavailable), not
+characters. Chunk boundaries fall between lines and, inside over-long lines,
+between sentences. A new "PART ..." / "Item ..." heading starts a new chunk
+without overlap from the previous section.
+
+Segmentation and packing work on (start, end) offsets into one buffer; the
+only strings built are the unit texts handed to the tokenizer and one slice
+per emitted chunk.
+"""
+import re
+from collections import deque
+from functools import lru_cache
+
+LINE = re.compile(r"[^\n]+")
+SENTENCE = re.compile(r"\S.*?(?:[.!?][\"')\]]?(?=\s|$)|$)")
+SECTION = re.compile(r"\s*(?:PART\s+[IVX]+\b|ITEM\s+\d{1,2}[A-C]?\b)", re.I)
+# Rough cl100k shape: short letter runs, up to three digits, single punctuation
+ESTIMATE = re.compile(r"[A-Za-z]{1,8}|\d{1,3}|[^\sA-Za-z\d]")
+
+
+@lru_cache(maxsize=None)
+def token_counter(encoding="cl100k_base"):
+  """Function mapping a list of texts to their token counts"""
+  try:
+    import tiktoken
+    enc = tiktoken.get_encoding(encoding)
+  except Exception as e:
+    print(f"⚠️ tiktoken encoding {encoding} unavailable ({type(e).__name__}), estimating tokens")
+    return lambda texts: [len(ESTIMATE.findall(text)) for text in texts]
+  return lambda texts: [len(tokens) for tokens in enc.encode_ordinary_batch(texts)]
+
+
+class TokenSplitter():
+  """Split text into chunks of at most ~chunk_tokens with overlap_tokens of overlap"""
+
+  def __init__(self, chunk_tokens=750, overlap_tokens=75, encoding="cl100k_base",
+               min_section_fill=0.25, count_tokens=None):
+    self.chunk_tokens = chunk_tokens
+    self.overlap_tokens = overlap_tokens
+    self.min_fill = int(chunk_tokens * min_section_fill)
+    self.count_tokens = count_tokens or token_counter(encoding)
+
+  def split_text(self, text):
+    return [text[start:end] for start, end in self.split_offsets(text)]
+
+  def split_offsets(self, text):
+    """(start, end) of every chunk of `text`"""
+    spans, _ = self._pack(text, self._units(text), final=True)
+    return spans
+
+  def iter_chunks(self, blocks, batch_chars=1 << 16):
+    """Chunks of a stream of text blocks (lines), holding about batch_chars at a time"""
+    carry, batch, size = "", [], 0
+    for block in blocks:
+      batch.append(block)
+      size += len(block) + 1
+      if size >= batch_chars:
+        buffer = "\n".join([carry, *batch] if carry else batch)
+        spans, rest = self._pack(buffer, self._units(buffer), final=False)
+        for start, end in spans:
+          yield buffer[start:end]
+        # The open chunk (with its overlap) is carried into the next buffer
+        carry, batch, size = buffer[rest:], [], 0
+    buffer = "\n".join([carry, *batch] if carry else batch)
+    spans, _ = self._pack(buffer, self._units(buffer), final=True)
+    for start, end in spans:
+      yield buffer[start:end]
+
+  def _units(self, text):
+    """[(start, end, tokens, starts_section)] of lines, or sentences of over-long lines"""
+    lines = [match.span() for match in LINE.finditer(text)]
+    counts = self.count_tokens([text[start:end] for start, end in lines])
+    units = []
+    for (start, end), tokens in zip(lines, counts):
+      section = SECTION.match(text, start, end) is not None
+      if tokens <= self.chunk_tokens:
+        units.append((start, end, tokens, section))
+        continue
+      for i, (s, e, t) in enumerate(self._sentences(text, start, end)):
+        units.append((s, e, t, section and i == 0))
+    return units
+
+  def _sentences(self, text, start, end):
+    spans = [(start + m.start(), start + m.end()) for m in SENTENCE.finditer(text[start:end])]
+    counts = self.count_tokens([text[s:e] for s, e in spans])
+    for (s, e), tokens in zip(spans, counts):
+      if tokens <= self.chunk_tokens:
+        yield s, e, tokens
+      else:
+        yield from self._hard_split(text, s, e, tokens)
+
+  def _hard_split(self, text, start, end, tokens):
+    """Cut a run-on sentence at whitespace into pieces under the budget"""
+    step = max(1, int((end - start) * self.chunk_tokens / tokens * 0.9))
+    spans = []
+    while start < end:
+      cut = min(end, start + step)
+      if cut < end:
+        space = text.rfind(" ", start + step // 2, cut)
+        cut = space if space > start else cut
+      spans.append((start, cut))
+      start = cut
+      while start < end and text[start] == " ":
+        start += 1
+    counts = self.count_tokens([text[s:e] for s, e in spans])
+    for (s, e), t in zip(spans, counts):
+      yield s, e, t
+
+  def _pack(self, text, units, final):
+    """Chunk spans over units; when not final, also the offset the open chunk starts at"""
+    spans = []
+    window = deque()
+    total = 0
+    for unit in units:
+      _, _, tokens, section = unit
+      if window and (total + tokens > self.chunk_tokens or (section and total >= self.min_fill)):
+        spans.append((window[0][0], window[-1][1]))
+        if section:
+          window.clear()
+          total = 0
+        while window and (total > self.overlap_tokens or total + tokens > self.chunk_tokens):
+          total -= window.popleft()[2]
+      window.append(unit)
+      total += tokens
+    if not window:
+      return spans, len(text)
+    if final:
+      spans.append((window[0][0], window[-1][1]))
+      return spans, len(text)
+    return spans, window[0][0]
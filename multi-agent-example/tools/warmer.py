@@ -0,0 +1,138 @@
+"""
+Background warming of filings for the configured company universe
+
+For every form, FilingWarmer resolves the latest filings of all tickers in a
+few bulk queries (see tools.filing_metadata); for every ticker it then downloads
+the filing into the filing cache and builds its index (chunks, BM25 and, unless
+disabled, the embedded vector index), so the first tool call about a
+configured company hits warm data. Filings are processed by a pool of
+`workers` threads; at most `max_downloads` of them talk to SEC at once.
+
+Settings come from the `sec_warmer` section of the repository's config.yaml
+(FINANCE_CREW_CONFIG overrides the path); its `tickers` map the company names
+listed under `companies` to ticker symbols.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+from tools.filing_cache import HEADERS, get_filing_cache
+from tools.filing_metadata import get_filing_metadata
+from tools.sec_tools import SECTools
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent.parent / "config.yaml"
+
+
+@dataclass
+class WarmResult:
+  ticker: str
+  form: str
+  status: str  # warm, missing or failed
+  url: str = None
+  chunks: int = 0
+  seconds: float = 0.0
+  error: str = None
+
+
+def load_warmer_config(path=None):
+  """The `sec_warmer` settings plus the ticker list derived from `companies`"""
+  config_path = Path(path or os.getenv("FINANCE_CREW_CONFIG") or CONFIG_PATH)
+  try:
+    with open(config_path) as f:
+      config = yaml.safe_load(f) or {}
+  except FileNotFoundError:
+    config = {}
+  settings = dict(config.get('sec_warmer') or {})
+  mapping = settings.get('tickers') or {}
+  tickers = []
+  for names in (config.get('companies') or {}).values():
+    for name in names or []:
+      ticker = mapping.get(name)
+      if ticker is None:
+        print(f"⚠️ No ticker configured for {name} (sec_warmer.tickers), skipping")
+      elif ticker not in tickers:
+        tickers.append(ticker)
+  settings['tickers'] = tickers
+  return settings
+
+
+class FilingWarmer():
+  """Fetches and indexes the latest filings of a fixed set of tickers"""
+
+  def __init__(self, tickers, forms=("10-K", "10-Q"), workers=4, max_downloads=2, build_vectors=True):
+    self.tickers = list(tickers)
+    self.forms = list(forms)
+    self.workers = workers
+    self.build_vectors = build_vectors
+    self._downloads = threading.BoundedSemaphore(max_downloads)
+
+  @classmethod
+  def from_config(cls, path=None, settings=None, **overrides):
+    """A warmer from config.yaml (or already loaded `settings`); non-None keyword arguments override them"""
+    settings = dict(settings if settings is not None else load_warmer_config(path))
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return cls(settings['tickers'], **{key: settings[key] for key in
+                                       ("forms", "workers", "max_downloads", "build_vectors") if key in settings})
+
+  def warm_one(self, ticker, form):
+    start = time.perf_counter()
+    try:
+      with self._downloads:
+        filing = get_filing_metadata().latest(ticker, form)
+        if filing is None:
+          return WarmResult(ticker, form, "missing", seconds=time.perf_counter() - start)
+        url = filing['linkToFilingDetails']
+        get_filing_cache().prefetch(url, headers=HEADERS)
+      index = SECTools.filing_index(url)
+      if self.build_vectors:
+        index.vectors
+      return WarmResult(ticker, form, "warm", url, len(index.chunks), time.perf_counter() - start)
+    except Exception as e:
+      return WarmResult(ticker, form, "failed", seconds=time.perf_counter() - start,
+                        error=f"{type(e).__name__}: {e}")
+
+  def run(self, on_result=None):
+    """Warm every (ticker, form); returns the WarmResults in completion order"""
+    results = []
+    for form in self.forms:
+      try:
+        get_filing_metadata().refresh(self.tickers, form)
+      except Exception as e:
+        # warm_one resolves each ticker on its own instead
+        print(f"⚠️ Bulk filing lookup for {form} failed ({type(e).__name__}: {e})")
+    with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="filing-warmer") as pool:
+      futures = [pool.submit(self.warm_one, ticker, form) for ticker in self.tickers for form in self.forms]
+      for future in as_completed(futures):
+        result = future.result()
+        results.append(result)
+        if on_result is not None:
+          on_result(result)
+    return results
+
+  def start(self, on_result=None):
+    """run() in a daemon thread, so it never delays interactive work or shutdown"""
+    thread = threading.Thread(target=self.run, args=(on_result,), name="filing-warmer", daemon=True)
+    thread.start()
+    return thread
+
+
+def print_result(result):
+  if result.status == "warm":
+    print(f"🔥 {result.ticker} {result.form}: {result.chunks} chunks ready in {result.seconds:.1f}s")
+  elif result.status == "missing":
+    print(f"➖ {result.ticker} {result.form}: no filing found")
+  else:
+    print(f"❌ {result.ticker} {result.form}: {result.error}")
+
+
+def warm_in_background(path=None):
+  """Start the configured warmer if `sec_warmer.on_startup` (or SEC_WARM_ON_STARTUP=1) is set"""
+  settings = load_warmer_config(path)
+  if not (settings.get('on_startup') or os.environ.get("SEC_WARM_ON_STARTUP") == "1"):
+    return None
+  return FilingWarmer.from_config(settings=settings).start(print_result)
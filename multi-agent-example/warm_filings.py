@@ -0,0 +1,41 @@
+"""
+Warm the filing caches for the configured company universe
+
+Resolves the latest 10-K/10-Q of every company in config.yaml (see the
+sec_warmer section) and builds their text and index artifacts, so interactive
+runs start on warm data.
+
+Usage: python warm_filings.py [--tickers MSFT,AAPL] [--forms 10-K,10-Q] [--workers 4] [--no-vectors]
+"""
+import argparse
+import time
+
+from tools.warmer import FilingWarmer, print_result
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument("--tickers", help="comma-separated tickers (default: the configured companies)")
+  parser.add_argument("--forms", help="comma-separated form types (default: sec_warmer.forms)")
+  parser.add_argument("--workers", type=int, help="filings processed in parallel")
+  parser.add_argument("--max-downloads", type=int, help="concurrent SEC requests")
+  parser.add_argument("--no-vectors", action="store_true", help="skip embedding; build text and BM25 only")
+  args = parser.parse_args()
+
+  warmer = FilingWarmer.from_config(
+    tickers=args.tickers.split(",") if args.tickers else None,
+    forms=args.forms.split(",") if args.forms else None,
+    workers=args.workers,
+    max_downloads=args.max_downloads,
+    build_vectors=False if args.no_vectors else None,
+  )
+  print(f"🚀 Warming {len(warmer.tickers)} tickers x {len(warmer.forms)} forms with {warmer.workers} workers")
+  start = time.perf_counter()
+  results = warmer.run(print_result)
+  counts = {status: sum(1 for r in results if r.status == status) for status in ("warm", "missing", "failed")}
+  print(f"✅ {counts['warm']} warm, {counts['missing']} missing, {counts['failed']} failed "
+        f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+  main()
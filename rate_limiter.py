@@ -0,0 +1,176 @@
+"""
+Process-wide LLM rate limiting shared by every crew in the process
+
+One scheduler holds a requests-per-minute and a tokens-per-minute token bucket
+(configured in config.yaml `rate_limits`). Every LLM call reserves capacity before
+it is sent. Waiting callers are grouped into flows (one per analysis) and served
+round-robin, so a long analysis can't starve the others running alongside it.
+"""
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+import contextvars
+import itertools
+import threading
+import time
+
+from config_loader import get_setting
+
+_current_flow = contextvars.ContextVar("llm_flow", default="default")
+_flow_ids = itertools.count(1)
+
+
+class TokenBucket:
+    """Continuously refilling bucket; `level` may go negative to record debt"""
+
+    def __init__(self, per_minute: float, capacity: float = None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = clock()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)"""
+        self._refill(now)
+        missing = amount - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+    def refund(self, amount: float, now: float):
+        """Give back (or, if negative, additionally charge) capacity"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Reservation:
+    """Capacity granted to one LLM call"""
+    tokens: int
+    wait_seconds: float
+
+
+class LLMScheduler:
+    """Fair FIFO-per-flow admission control over RPM and TPM buckets"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, clock=time.monotonic):
+        self.clock = clock
+        self.rpm = TokenBucket(requests_per_minute, clock=clock)
+        self.tpm = TokenBucket(tokens_per_minute, clock=clock)
+        self._cond = threading.Condition()
+        self._queues = {}          # flow -> deque of waiter tokens
+        self._rotation = deque()   # flows with waiters, in service order
+        self._stats = {'requests': 0, 'total_wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+                       'reserved_tokens': 0, 'used_tokens': 0}
+
+    @contextmanager
+    def flow(self, name: str = "analysis"):
+        """Attribute LLM calls made inside the block to one fair-queuing flow"""
+        token = _current_flow.set(f"{name}#{next(_flow_ids)}")
+        try:
+            yield
+        finally:
+            _current_flow.reset(token)
+
+    def acquire(self, tokens: int, flow: str = None) -> Reservation:
+        """Block until one request and `tokens` tokens can be spent, in fair order"""
+        flow = flow or _current_flow.get()
+        tokens = int(min(tokens, self.tpm.capacity))
+        waiter = object()
+        start = self.clock()
+
+        with self._cond:
+            queue = self._queues.get(flow)
+            if queue is None:
+                queue = self._queues[flow] = deque()
+                self._rotation.append(flow)
+            queue.append(waiter)
+
+            try:
+                while True:
+                    delay = None
+                    if self._rotation[0] == flow and queue[0] is waiter:
+                        now = self.clock()
+                        delay = max(self.rpm.time_until(1, now), self.tpm.time_until(tokens, now))
+                        if delay <= 0:
+                            self.rpm.consume(1, now)
+                            self.tpm.consume(tokens, now)
+                            break
+                    self._cond.wait(delay)
+            finally:
+                self._leave(flow, queue, waiter)
+                self._cond.notify_all()
+
+            waited = self.clock() - start
+            self._stats['requests'] += 1
+            self._stats['total_wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            self._stats['reserved_tokens'] += tokens
+
+        return Reservation(tokens=tokens, wait_seconds=waited)
+
+    def settle(self, reservation: Reservation, actual_tokens: int = None):
+        """Correct the TPM bucket once the real token usage of a call is known"""
+        if actual_tokens is None:
+            return
+        with self._cond:
+            self.tpm.refund(reservation.tokens - actual_tokens, self.clock())
+            self._stats['used_tokens'] += actual_tokens
+            self._cond.notify_all()
+
+    def _leave(self, flow, queue, waiter):
+        # Caller holds the lock. The served flow moves to the back of the rotation.
+        was_head = queue[0] is waiter and self._rotation[0] == flow
+        queue.remove(waiter)
+        if was_head:
+            self._rotation.popleft()
+            if queue:
+                self._rotation.append(flow)
+        elif not queue:
+            self._rotation.remove(flow)
+        if not queue:
+            del self._queues[flow]
+
+    def stats(self) -> dict:
+        """Queue depth, wait times and remaining bucket capacity"""
+        with self._cond:
+            now = self.clock()
+            self.rpm._refill(now)
+            self.tpm._refill(now)
+            stats = dict(self._stats)
+            stats.update({
+                'queue_depth': sum(len(q) for q in self._queues.values()),
+                'flows_waiting': len(self._queues),
+                'requests_available': self.rpm.level,
+                'tokens_available': self.tpm.level,
+            })
+        stats['avg_wait_seconds'] = (
+            stats['total_wait_seconds'] / stats['requests'] if stats['requests'] else 0.0)
+        return stats
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap prompt-size estimate (~4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """The single scheduler every LLM call in this process goes through"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                requests_per_minute=get_setting("rate_limits.requests_per_minute", 60),
+                tokens_per_minute=get_setting("rate_limits.tokens_per_minute", 60000),
+            )
+        return _scheduler
@@ -0,0 +1,82 @@
+"""
+Whole-analysis result cache - a hit skips the crew kickoff entirely
+
+Results are keyed by normalized company name, user query and a prompt version, so
+editing any agent/task prompt automatically invalidates previously stored analyses.
+"""
+import hashlib
+import inspect
+import json
+import threading
+
+from cache_store import ResponseCache, cache_directory
+from config_loader import get_setting
+
+
+def normalize_company(company_name: str) -> str:
+    """'  apple ' and 'Apple' share cache entries"""
+    return " ".join(company_name.lower().split())
+
+
+def prompt_version(*prompt_builders) -> str:
+    """Short hash of the agent/task prompts
+
+    Functions are hashed by their source; prompt templates (e.g. frozen
+    dataclasses) by their repr.
+    """
+    digest = hashlib.sha256()
+    for builder in prompt_builders:
+        text = inspect.getsource(builder) if callable(builder) else repr(builder)
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class AnalysisResultCache:
+    """Stores successful analysis result dicts in a ResponseCache"""
+
+    def __init__(self, store: ResponseCache):
+        self.store = store
+
+    @staticmethod
+    def make_key(company_name: str, user_query: str, version: str) -> str:
+        payload = json.dumps([normalize_company(company_name), (user_query or "").strip(), version])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, company_name: str, user_query: str, version: str):
+        """Return (result, age_seconds), or (None, None) when missing or stale"""
+        value, age = self.store.get_with_age(self.make_key(company_name, user_query, version))
+        if value is None:
+            return None, None
+        return json.loads(value), age
+
+    def put(self, company_name: str, user_query: str, version: str, result: dict):
+        self.store.set(self.make_key(company_name, user_query, version), json.dumps(result))
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide analysis result cache, or None when disabled in config.yaml"""
+    global _result_cache
+    if not get_setting("result_cache.enabled", True):
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            ttl_hours = get_setting("result_cache.ttl_hours", 24)
+            store = ResponseCache(
+                cache_directory() / "analysis_results.sqlite",
+                ttl_seconds=ttl_hours * 3600 if ttl_hours else None,
+                max_entries=get_setting("result_cache.max_entries", 1000),
+                max_bytes=get_setting("result_cache.max_mb", 64) * 1024 * 1024,
+                memory_entries=get_setting("result_cache.memory_entries", 64),
+            )
+            _result_cache = AnalysisResultCache(store)
+        return _result_cache
@@ -0,0 +1,83 @@
+import pytest
+
+from cache_store import ResponseCache
+from result_cache import AnalysisResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_entry_expires_from_the_memory_layer(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl_seconds=60, clock=clock)
+    cache.set("key", "value")
+    clock.now += 59
+    assert cache.get("key") == "value"
+    assert cache.stats()['memory_hits'] == 1
+    clock.now += 2
+    assert cache.get("key") is None
+    stats = cache.stats()
+    assert (stats['expired'], stats['misses'], stats['entries']) == (1, 1, 0)
+
+
+def test_entry_expires_from_the_disk_layer(tmp_path, clock):
+    ResponseCache(tmp_path / "cache.sqlite", ttl_seconds=60, clock=clock).set("key", "value")
+    # A new instance has an empty memory layer, so lookups read the file
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl_seconds=60, clock=clock)
+    clock.now += 30
+    assert cache.get_with_age("key") == ("value", 30)
+    assert cache.stats()['disk_hits'] == 1
+    reopened = ResponseCache(tmp_path / "cache.sqlite", ttl_seconds=60, clock=clock)
+    clock.now += 31
+    assert reopened.get("key") is None
+    assert reopened.stats()['expired'] == 1
+    # The expired row is gone for every reader
+    assert cache.stats()['entries'] == 0
+
+
+def test_expired_rows_are_dropped_when_writing(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl_seconds=60, clock=clock)
+    cache.set("old", "value")
+    clock.now += 61
+    cache.set("new", "value")
+    assert cache.stats()['entries'] == 1
+
+
+def test_eviction_keeps_the_store_under_max_bytes(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=1000, clock=clock)
+    for i in range(10):
+        clock.now += 1
+        cache.set(f"key{i}", "x" * 300)
+        assert cache.stats()['bytes'] <= 1000
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (3, 7)
+    assert cache.get("key9") is not None and cache.get("key6") is None
+
+
+def test_eviction_spares_recently_read_entries(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_entries=3, clock=clock)
+    for i in range(3):
+        clock.now += 1
+        cache.set(f"key{i}", "value")
+    clock.now += 1
+    assert cache.get("key0") == "value"  # served from memory
+    clock.now += 1
+    cache.set("key3", "value")
+    assert [key for key in ("key0", "key1", "key2", "key3") if cache.get(key)] == ["key0", "key2", "key3"]
+
+
+def test_result_cache_round_trip(tmp_path, clock):
+    results = AnalysisResultCache(ResponseCache(tmp_path / "results.sqlite", ttl_seconds=3600, clock=clock))
+    results.put("  apple ", "risks", "v1", {'analysis': "..."})
+    clock.now += 10
+    assert results.get("Apple", "risks", "v1") == ({'analysis': "..."}, 10)
+    assert results.get("Apple", "risks", "v2") == (None, None)
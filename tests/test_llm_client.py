@@ -0,0 +1,75 @@
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+from analysis_events import TaskTracker
+from analysis_metrics import MetricsRecorder
+from cache_store import ResponseCache
+from llm_cache import LLMResponseCache
+from llm_client import MetricsForwarder, ScheduledChatOpenAI, copy_for_run, create_llm
+from rate_limiter import estimate_tokens
+
+PROMPT = [HumanMessage(content="What was Microsoft's revenue in fiscal 2023?")]
+ANSWER = "Revenue was $211.9 billion."
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    """Stands in for the OpenAI API; lists the calls that reached it"""
+    calls = []
+
+    def fake_stream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append("stream")
+        for word in ANSWER.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+    def fake_generate(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append("generate")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=ANSWER))])
+
+    monkeypatch.setattr(ChatOpenAI, "_stream", fake_stream)
+    monkeypatch.setattr(ChatOpenAI, "_generate", fake_generate)
+    return calls
+
+
+@pytest.fixture
+def llm(tmp_path):
+    cache = LLMResponseCache(ResponseCache(tmp_path / "responses.sqlite"))
+    return create_llm(model="gpt-3.5-turbo", temperature=0.1, api_key="test", cache=cache)
+
+
+def streamed(llm):
+    return "".join(chunk.content for chunk in llm.stream(PROMPT))
+
+
+def test_repeated_stream_is_served_from_the_cache(api_calls, llm):
+    assert isinstance(llm, ScheduledChatOpenAI)
+    first = streamed(llm)
+    assert streamed(llm) == first
+    assert api_calls == ["stream"]
+    assert llm.cache.stats()['hits'] == 1
+
+
+def metrics_of(llm, call):
+    """Task 0's metrics after running `call(llm)` as one analysis run"""
+    recorder = MetricsRecorder("Microsoft")
+    run_llm = copy_for_run(llm, MetricsForwarder())
+    with recorder.activate(), TaskTracker([]).task_scope(0):
+        recorder.task_started(0, "Financial Analyst", None)
+        call(run_llm)
+    return recorder.tasks[0]
+
+
+def test_invoked_cache_hit_is_not_counted_as_a_call(api_calls, llm):
+    metrics = metrics_of(llm, lambda run_llm: [run_llm.invoke(PROMPT) for _ in range(2)])
+    assert api_calls == ["generate"]
+    assert (metrics.llm_calls, metrics.cached_calls) == (1, 1)
+    # Tokens are only estimated for the call that reached the API
+    assert metrics.completion_tokens == estimate_tokens(ANSWER)
+
+
+def test_streamed_cache_hit_is_not_counted_as_a_call(api_calls, llm):
+    metrics = metrics_of(llm, lambda run_llm: [streamed(run_llm) for _ in range(2)])
+    assert api_calls == ["stream"]
+    assert (metrics.llm_calls, metrics.cached_calls) == (1, 1)
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import LLMScheduler, TokenBucket
+
+# 64 requests a second: a power of two, so clock steps of 1/64 s refill exactly one request
+RPM = 64 * 60
+STEP = 1 / 64
+
+
+class Clock:
+    """Manually advanced clock; raises once after fail_next is set"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.fail_next = False
+
+    def __call__(self):
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("clock failure")
+        return self.now
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def drained_scheduler(clock):
+    """Scheduler with no request capacity left until the clock moves"""
+    scheduler = LLMScheduler(requests_per_minute=RPM, tokens_per_minute=10 ** 9, clock=clock)
+    scheduler.rpm.consume(scheduler.rpm.level, clock())
+    return scheduler
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    clock = Clock()
+    bucket = TokenBucket(per_minute=60, clock=clock)
+    # A full bucket allows a burst of its whole capacity, and no more
+    assert bucket.time_until(60, clock.now) == 0
+    bucket.consume(60, clock.now)
+    assert bucket.time_until(1, clock.now) == pytest.approx(1.0)
+    clock.now += 30
+    assert bucket.time_until(30, clock.now) == 0
+    assert bucket.time_until(31, clock.now) == pytest.approx(1.0)
+    clock.now += 3600
+    assert bucket.time_until(60, clock.now) == 0
+    assert bucket.time_until(61, clock.now) == pytest.approx(1.0)
+
+
+def test_refund_and_debt():
+    clock = Clock()
+    bucket = TokenBucket(per_minute=600, clock=clock)
+    bucket.consume(600, clock.now)
+    bucket.refund(-60, clock.now)  # a call that used more than it reserved
+    assert bucket.time_until(1, clock.now) == pytest.approx(6.1)
+    bucket.refund(10_000, clock.now)
+    assert bucket.level == 600
+
+
+def test_scheduler_burst_then_waits_for_refill():
+    clock = Clock()
+    scheduler = LLMScheduler(requests_per_minute=RPM, tokens_per_minute=RPM, clock=clock)
+    # Reservations above the TPM capacity are capped, so they can be granted at all
+    assert scheduler.acquire(10 ** 6).tokens == RPM
+    assert scheduler.stats()['tokens_available'] == 0
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (scheduler.acquire(2), done.set()))
+    thread.start()
+    wait_for(lambda: scheduler.stats()['queue_depth'] == 1)
+    clock.now += STEP  # one of the two tokens
+    assert not done.wait(0.1)
+    clock.now += STEP
+    thread.join(5)
+    assert done.is_set()
+    assert scheduler.stats()['requests'] == 2
+
+
+def test_flows_are_served_round_robin():
+    clock = Clock()
+    scheduler = drained_scheduler(clock)
+    served = []
+    threads = [threading.Thread(target=lambda flow=flow: served.append(scheduler.acquire(10, flow=flow) and flow))
+               for flow in ["long"] * 4 + ["short"] * 2]
+    for thread in threads[:4]:
+        thread.start()
+    wait_for(lambda: scheduler.stats()['queue_depth'] == 4)
+    for thread in threads[4:]:
+        thread.start()
+    wait_for(lambda: scheduler.stats()['queue_depth'] == 6)
+    # One request of capacity at a time, so the grant order is observable
+    for count in range(1, 7):
+        clock.now += STEP
+        wait_for(lambda: len(served) == count)
+    for thread in threads:
+        thread.join(5)
+    assert served == ["long", "short", "long", "short", "long", "long"]
+
+
+def test_waiter_that_raises_leaves_the_queue():
+    clock = Clock()
+    scheduler = drained_scheduler(clock)
+    errors, served = [], []
+
+    def acquire(flow, out):
+        try:
+            out.append(scheduler.acquire(10, flow=flow))
+        except RuntimeError as e:
+            errors.append(e)
+
+    head = threading.Thread(target=acquire, args=("a", served))
+    head.start()
+    wait_for(lambda: scheduler.stats()['queue_depth'] == 1)
+    behind = threading.Thread(target=acquire, args=("b", served))
+    behind.start()
+    wait_for(lambda: scheduler.stats()['queue_depth'] == 2)
+    clock.fail_next = True  # the head's next capacity check raises
+    head.join(5)
+    assert len(errors) == 1 and not served
+    assert scheduler.stats()['flows_waiting'] == 1
+    clock.now += STEP
+    behind.join(5)
+    assert len(served) == 1
+    stats = scheduler.stats()
+    assert (stats['queue_depth'], stats['flows_waiting'], stats['requests']) == (0, 0, 1)
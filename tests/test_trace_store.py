@@ -0,0 +1,84 @@
+import pytest
+
+from agent_trace import TraceEvent
+from trace_store import TraceStore
+
+DAY = 86400
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def record_run(store, run_id, company, steps=3):
+    store.begin_run(run_id, company, "risks")
+    for i in range(steps):
+        store.append(TraceEvent(run_id, "thought", agent="Financial Analyst", task_index=0,
+                                text=f"{run_id} step {i}"), company)
+
+
+def texts(records):
+    return [record['text'] for record in records]
+
+
+def test_replay_after_compaction(tmp_path, clock):
+    # Small segments, so runs span several of them
+    store = TraceStore(tmp_path, segment_bytes=600, clock=clock)
+    for run_id, company in (("a", "Apple"), ("b", "Microsoft"), ("c", "Apple")):
+        record_run(store, run_id, company, steps=5)
+    before = {run_id: store.replay(run_id) for run_id in "abc"}
+    store.delete_run("b")
+    result = store.compact()
+    assert result['reclaimed_bytes'] > 0 and result['runs'] == 2
+    assert store.replay("a") == before["a"] and store.replay("c") == before["c"]
+    assert store.replay("b") == []
+    assert texts(store.find(company="apple", limit=2)) == ["c step 3", "c step 4"]
+    # Appending after compaction goes to a fresh segment
+    record_run(store, "d", "Apple", steps=1)
+    assert texts(store.replay("d")) == ["d step 0"]
+    assert store.replay("a") == before["a"]
+
+
+def test_reopened_store_reads_old_segments_and_appends_to_a_new_one(tmp_path, clock):
+    store = TraceStore(tmp_path, clock=clock)
+    record_run(store, "a", "Apple")
+    store.close()
+
+    store = TraceStore(tmp_path, clock=clock)
+    assert texts(store.replay("a")) == ["a step 0", "a step 1", "a step 2"]
+    clock.now += 60
+    record_run(store, "b", "Apple")
+    assert store.stats()['segments'] == 2
+    assert [run['run_id'] for run in store.runs(company="APPLE")] == ["b", "a"]
+    assert texts(store.find(agent="Financial Analyst"))[-1] == "b step 2"
+
+
+def test_retention_applies_when_a_run_begins(tmp_path, clock):
+    # Segments never roll over here, so rollover alone would never drop anything
+    store = TraceStore(tmp_path, retention_days=30, clock=clock)
+    record_run(store, "old", "Apple")
+    clock.now += 31 * DAY
+    record_run(store, "new", "Apple")
+    assert store.replay("old") == []
+    assert texts(store.replay("new")) == ["new step 0", "new step 1", "new step 2"]
+    assert store.stats()['runs'] == 1
+
+
+def test_retention_by_size_drops_the_oldest_runs(tmp_path, clock):
+    store = TraceStore(tmp_path, clock=clock)
+    for run_id in "abc":
+        clock.now += 1
+        record_run(store, run_id, "Apple")
+    run_bytes = store.runs()[0]['bytes']
+    store.max_bytes = 2 * run_bytes
+    assert store.apply_retention() == 1
+    assert store.replay("a") == [] and len(store.replay("c")) == 3
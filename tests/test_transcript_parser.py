@@ -0,0 +1,50 @@
+import random
+
+from transcript_parser import TranscriptParser, iter_messages
+from utils.bench_transcript_parser import legacy_parse
+
+AGENTS = ("Research Analyst", "Financial Analyst", "Investment Advisor")
+LINES = (
+    "🔍 Research Analyst here. I'm researching Apple...",
+    "📊 Financial Analyst here. Based on the research...",
+    "💡 Investment Advisor here. After reviewing the analysis...",
+    "🔍 Research Analyst here; Financial Analyst here will follow",
+    "Financial Analyst here, then Research Analyst here",
+    "Investment Advisor here and Financial Analyst here",
+    "> Entering new CrewAgentExecutor chain...",
+    "Thought: I now can give a great answer",
+    "",
+    "   ",
+    "Revenue grew steadily across the main business segments.",
+)
+
+
+def parse(text, chunk_size):
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    return list(iter_messages(chunks, agents=AGENTS, max_message_chars=1 << 20))
+
+
+def test_two_headers_on_one_line_go_to_the_first_agent():
+    text = ("intro\n🔍 Research Analyst here; Financial Analyst here will follow\nfacts\n"
+            "📊 Financial Analyst here.\nnumbers\n")
+    expected = [
+        {'agent': "Research Analyst",
+         'message': "🔍 Research Analyst here; Financial Analyst here will follow\nfacts"},
+        {'agent': "Financial Analyst", 'message': "📊 Financial Analyst here.\nnumbers"},
+    ]
+    assert parse(text, 1 << 16) == expected
+    assert legacy_parse(text) == expected
+
+
+def test_matches_legacy_parser_on_random_transcripts():
+    rng = random.Random(7)
+    for _ in range(500):
+        text = "\n".join(rng.choice(LINES) for _ in range(rng.randint(1, 40)))
+        assert parse(text, rng.randint(1, 200)) == legacy_parse(text), text
+
+
+def test_message_cap_truncates():
+    parser = TranscriptParser(agents=AGENTS, max_message_chars=40)
+    messages = parser.feed("Research Analyst here\n" + "x" * 100 + "\n") + parser.close()
+    assert len(messages) == 1 and len(messages[0]['message']) <= 40
+    assert parser.truncated == 1
@@ -0,0 +1,290 @@
+"""
+Append-only store for agent traces with an offset index
+
+Every TraceEvent of a run is appended as one JSON line to the active segment file
+(traces/segment-000001.jsonl, ...). A SQLite index records the segment, offset and
+length of each line by run id, company and agent, so replaying or auditing a run
+is a handful of seeks rather than a scan. Segments roll over at
+`trace_store.segment_mb`; retention drops runs past `retention_days` / `max_mb`
+(checked as each run begins and at every rollover) and compaction rewrites
+segments without the dropped records.
+
+One process writes a store at a time (the app or a script); readers in other
+processes are fine.
+"""
+from dataclasses import asdict
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+
+from cache_store import cache_directory
+from config_loader import get_setting
+from result_cache import normalize_company
+
+
+class TraceStore:
+    """Segmented JSONL trace log plus its SQLite index"""
+
+    def __init__(self, directory, segment_bytes: int = 16 * 1024 * 1024,
+                 retention_days: float = None, max_bytes: int = None, clock=time.time):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.directory / "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                company TEXT,
+                query TEXT,
+                started_at REAL NOT NULL,
+                bytes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                company TEXT,
+                agent TEXT,
+                kind TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS records_run ON records (run_id, id);
+            CREATE INDEX IF NOT EXISTS records_company ON records (company, id);
+            CREATE INDEX IF NOT EXISTS records_agent ON records (agent, id);
+            CREATE INDEX IF NOT EXISTS records_segment ON records (segment, offset);
+            CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+        """)
+        self._conn.commit()
+
+        # Always append to a fresh segment so sealed ones are never modified
+        segments = self._segments()
+        self._segment = (segments[-1] + 1) if segments else 1
+        self._file = None
+
+    def _path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:06d}.jsonl"
+
+    def _segments(self):
+        return sorted(int(path.stem.split("-")[1]) for path in self.directory.glob("segment-*.jsonl"))
+
+    # Writing
+
+    def begin_run(self, run_id: str, company: str = None, query: str = None):
+        # Low-volume stores may never roll a segment, so retention is applied here too
+        self.apply_retention()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, company, query, started_at) VALUES (?, ?, ?, ?)",
+                (run_id, normalize_company(company) if company else None, query, self.clock()))
+            self._conn.commit()
+
+    def append(self, event, company: str = None):
+        """Append one TraceEvent and index it"""
+        record = asdict(event)
+        record['company'] = company
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        company_key = normalize_company(company) if company else None
+
+        rolled = False
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._path(self._segment), "ab")
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self._conn.execute(
+                "INSERT INTO records (run_id, company, agent, kind, segment, offset, length, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (event.run_id, company_key, event.agent, event.kind,
+                 self._segment, offset, len(line), self.clock()))
+            self._conn.execute(
+                "UPDATE runs SET bytes = bytes + ? WHERE run_id = ?", (len(line), event.run_id))
+            self._conn.commit()
+            if offset + len(line) >= self.segment_bytes:
+                self._roll()
+                rolled = True
+
+        if rolled:
+            self.apply_retention()
+
+    def listener(self, run_id: str, company: str = None, query: str = None):
+        """A callable for AgentTrace listeners that records the run here"""
+        self.begin_run(run_id, company, query)
+        return lambda event: self.append(event, company)
+
+    def _roll(self):
+        # Caller holds the lock
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._segment += 1
+
+    # Reading
+
+    def _read(self, rows):
+        """Records for index rows of (segment, offset, length), in the given order"""
+        files = {}
+        try:
+            for segment, offset, length in rows:
+                f = files.get(segment)
+                if f is None:
+                    f = files[segment] = open(self._path(segment), "rb")
+                f.seek(offset)
+                yield json.loads(f.read(length))
+        finally:
+            for f in files.values():
+                f.close()
+
+    def replay(self, run_id: str) -> list:
+        """Every record of one run, in the order it was written"""
+        with self._lock:  # compaction may move records otherwise
+            rows = self._conn.execute(
+                "SELECT segment, offset, length FROM records WHERE run_id = ? ORDER BY id",
+                (run_id,)).fetchall()
+            return list(self._read(rows))
+
+    def find(self, company: str = None, agent: str = None, kind: str = None, limit: int = 1000) -> list:
+        """Most recent records matching the given company / agent / kind, oldest first"""
+        clauses, params = [], []
+        if company:
+            clauses.append("company = ?")
+            params.append(normalize_company(company))
+        if agent:
+            clauses.append("agent = ?")
+            params.append(agent)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT segment, offset, length FROM records {where} ORDER BY id DESC LIMIT ?",
+                (*params, limit)).fetchall()
+            return list(self._read(reversed(rows)))
+
+    def runs(self, company: str = None, limit: int = 50) -> list:
+        """Recent runs (newest first) as dicts"""
+        query = "SELECT run_id, company, query, started_at, bytes FROM runs"
+        params = ()
+        if company:
+            query += " WHERE company = ?"
+            params = (normalize_company(company),)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY started_at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [dict(zip(('run_id', 'company', 'query', 'started_at', 'bytes'), row)) for row in rows]
+
+    # Retention and compaction
+
+    def delete_run(self, run_id: str):
+        """Drop a run from the index; compact() reclaims its bytes"""
+        with self._lock:
+            self._conn.execute("DELETE FROM records WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+    def apply_retention(self, compact: bool = True) -> int:
+        """Drop runs older than retention_days, then the oldest runs beyond max_bytes"""
+        expired = []
+        with self._lock:
+            if self.retention_days:
+                cutoff = self.clock() - self.retention_days * 86400
+                expired += [row[0] for row in self._conn.execute(
+                    "SELECT run_id FROM runs WHERE started_at < ?", (cutoff,))]
+            if self.max_bytes:
+                total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM runs").fetchone()[0]
+                for run_id, size in self._conn.execute(
+                        "SELECT run_id, bytes FROM runs ORDER BY started_at"):
+                    if total <= self.max_bytes:
+                        break
+                    if run_id not in expired:
+                        expired.append(run_id)
+                    total -= size
+        for run_id in expired:
+            self.delete_run(run_id)
+        if expired and compact:
+            self.compact()
+        return len(expired)
+
+    def compact(self) -> dict:
+        """Rewrite sealed segments that contain dropped records; delete empty ones"""
+        reclaimed = 0
+        with self._lock:
+            self._roll()
+            for segment in self._segments():
+                if segment >= self._segment:
+                    continue
+                path = self._path(segment)
+                rows = self._conn.execute(
+                    "SELECT id, offset, length FROM records WHERE segment = ? ORDER BY offset",
+                    (segment,)).fetchall()
+                size = path.stat().st_size
+                live = sum(length for _, _, length in rows)
+                if rows and live == size:
+                    continue
+
+                if rows:
+                    # Copy live records into the next segment number, repoint the
+                    # index, and only then remove the old file
+                    target = self._segment
+                    self._segment += 1
+                    updates = []
+                    with open(path, "rb") as source, open(self._path(target), "wb") as out:
+                        for record_id, offset, length in rows:
+                            source.seek(offset)
+                            updates.append((target, out.tell(), record_id))
+                            out.write(source.read(length))
+                    self._conn.executemany(
+                        "UPDATE records SET segment = ?, offset = ? WHERE id = ?", updates)
+                    self._conn.commit()
+                path.unlink()
+                reclaimed += size - live
+        return {'reclaimed_bytes': reclaimed, **self.stats()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            segments = self._segments()
+            return {
+                'segments': len(segments),
+                'disk_bytes': sum(self._path(segment).stat().st_size for segment in segments),
+                'runs': self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0],
+                'records': self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0],
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._conn.close()
+
+
+_trace_store = None
+_trace_store_lock = threading.Lock()
+
+
+def get_trace_store():
+    """Process-wide trace store, or None when disabled in config.yaml"""
+    global _trace_store
+    if not get_setting("trace_store.enabled", True):
+        return None
+    with _trace_store_lock:
+        if _trace_store is None:
+            max_mb = get_setting("trace_store.max_mb", 512)
+            _trace_store = TraceStore(
+                cache_directory() / get_setting("trace_store.directory", "traces"),
+                segment_bytes=get_setting("trace_store.segment_mb", 16) * 1024 * 1024,
+                retention_days=get_setting("trace_store.retention_days", 30),
+                max_bytes=max_mb * 1024 * 1024 if max_mb else None,
+            )
+        return _trace_store
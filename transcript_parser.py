@@ -0,0 +1,144 @@
+"""
+Incremental parser for verbose crew transcripts
+
+Agents announce themselves with a "<Agent> here" line (see the task prompts in
+crew_with_logging.py). TranscriptParser consumes the transcript in chunks as it
+is written, and emits each agent message as soon as the next header
+(or the end of the transcript) completes it. Memory stays bounded by the size of
+one message, which is capped at `transcript.max_message_kb` in config.yaml.
+"""
+import re
+
+from config_loader import get_setting
+
+DEFAULT_AGENTS = ("Research Analyst", "Financial Analyst", "Investment Advisor")
+
+
+HEADER_SUFFIX = " here"
+
+
+def header_pattern(agents) -> re.Pattern:
+    """One compiled regex matching any of `agents` at the end of the searched span
+
+    Used on the few characters before each " here": scanning for the literal
+    suffix with str.find is several times faster than running an alternation
+    over the whole transcript.
+    """
+    names = sorted(agents, key=len, reverse=True)  # longest first: "Senior X" before "X"
+    return re.compile(r"(%s)\Z" % "|".join(re.escape(name) for name in names))
+
+
+class TranscriptParser:
+    """Splits a transcript into {'agent', 'message'} dicts without holding all of it
+
+    feed() returns the messages completed by the chunk; close() returns the
+    last one. Blank lines are dropped and text before the first header is ignored.
+    A line naming several agents starts one message, for whichever of them
+    comes first in `agents`.
+    """
+
+    def __init__(self, agents=None, max_message_chars: int = None, on_message=None):
+        agents = agents or get_setting("transcript.agents") or DEFAULT_AGENTS
+        self.header = header_pattern(agents)
+        self._rank = {name: i for i, name in enumerate(agents)}
+        self._longest = max(len(name) for name in agents)
+        self.max_message_chars = max_message_chars or get_setting("transcript.max_message_kb", 256) * 1024
+        self.on_message = on_message
+        self.truncated = 0
+        self._pending = []       # text after the last newline seen
+        self._pending_size = 0
+        self._agent = None
+        self._parts = []         # text of the current message
+        self._size = 0
+
+    def feed(self, chunk: str) -> list:
+        end = chunk.rfind("\n")
+        if end < 0:
+            self._pending.append(chunk)
+            self._pending_size += len(chunk)
+            # A newline-free run is still bounded by the message cap
+            if self._pending_size > self.max_message_chars:
+                return self._process(self._take_pending())
+            return []
+        block = self._take_pending() + chunk[:end + 1]
+        if end + 1 < len(chunk):
+            self._pending.append(chunk[end + 1:])
+            self._pending_size = len(chunk) - end - 1
+        return self._process(block)
+
+    def close(self) -> list:
+        """Flush the final message"""
+        block = self._take_pending()
+        completed = self._process(block) if block else []
+        if self._agent is not None:
+            completed.append(self._finish())
+        return completed
+
+    def _take_pending(self) -> str:
+        text = "".join(self._pending)
+        self._pending, self._pending_size = [], 0
+        return text
+
+    def _process(self, block: str) -> list:
+        completed = []
+        position = 0
+        header_line = -1  # line start of the last header accepted in this block
+        for start, agent in self._headers(block):
+            line_start = block.rfind("\n", 0, start) + 1
+            if line_start == header_line:
+                # Another header on the same line: the earlier agent in `agents` wins
+                if self._rank[agent] < self._rank[self._agent]:
+                    self._agent = agent
+                continue
+            header_line = line_start
+            self._append(block[position:line_start])
+            if self._agent is not None:
+                completed.append(self._finish())
+            self._agent = agent
+            position = line_start
+        self._append(block[position:])
+        return completed
+
+    def _headers(self, block: str):
+        """(start, agent) of every header in block, in order"""
+        found = block.find(HEADER_SUFFIX)
+        while found >= 0:
+            match = self.header.search(block, max(0, found - self._longest), found)
+            if match:
+                yield match.start(), match.group(1)
+            found = block.find(HEADER_SUFFIX, found + 1)
+
+    def _append(self, text: str):
+        if self._agent is None or not text:
+            return
+        room = self.max_message_chars - self._size
+        if room <= 0:
+            return
+        if len(text) > room:
+            text = text[:room]
+            self.truncated += 1
+        self._parts.append(text)
+        self._size += len(text)
+
+    def _finish(self) -> dict:
+        lines = "".join(self._parts).split("\n")
+        message = {
+            'agent': self._agent,
+            'message': "\n".join(filter(str.strip, lines))
+        }
+        self._agent, self._parts, self._size = None, [], 0
+        if self.on_message is not None:
+            self.on_message(message)
+        return message
+
+
+def iter_messages(source, chunk_size: int = 1 << 16, **parser_options):
+    """Yield agent messages from a text file object (or an iterable of chunks)"""
+    parser = TranscriptParser(**parser_options)
+    if hasattr(source, "read"):
+        chunks = iter(lambda: source.read(chunk_size), "")
+    else:
+        chunks = source
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
@@ -0,0 +1,72 @@
+"""
+Sequential vs DAG process benchmark
+
+Runs the FinancialAnalysisCrew tasks with a fake LLM that answers after a fixed
+latency, once with the sequential process and once with the DAG process, and
+compares wall-clock time. No API key or network access is needed.
+
+Usage: python utils/bench_dag_process.py [--latency SECONDS] [--runs N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from crew import FinancialAnalysisCrew
+
+
+class FixedLatencyChatModel(BaseChatModel):
+    """Chat model that sleeps for `latency` seconds, then gives a final answer"""
+
+    latency: float = 1.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fixed-latency-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        text = "Thought: I now can give a great answer\nFinal Answer: Benchmark output."
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+def time_process(process: str, latency: float, runs: int) -> float:
+    crew = FinancialAnalysisCrew(llm=FixedLatencyChatModel(latency=latency), process=process)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = crew.analyze("Benchmark Corp", use_cache=False)
+        timings.append(time.perf_counter() - start)
+        if result['status'] != 'success':
+            raise RuntimeError(result['analysis'])
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per LLM call")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"⏱️  Fake LLM latency {args.latency:.2f}s, {args.runs} runs per process\n")
+    sequential = time_process("sequential", args.latency, args.runs)
+    print(f"   sequential: {sequential:6.2f}s")
+    dag = time_process("dag", args.latency, args.runs)
+    print(f"   dag:        {dag:6.2f}s")
+    print(f"\n🚀 DAG speedup: {sequential / dag:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
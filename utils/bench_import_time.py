@@ -0,0 +1,94 @@
+"""
+Import-time benchmark - catches cold-start regressions in crew.py
+
+Runs `python -X importtime -c "import crew"` in a fresh interpreter several times,
+reports the slowest modules, and fails if the median exceeds the recorded budget or
+if a heavy dependency (crewai, LangChain, OpenAI) is imported eagerly again.
+
+Usage: python utils/bench_import_time.py [--runs N] [--budget-ms MS]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Recorded on a laptop-class machine: ~70 ms after lazy construction, ~2.8 s before.
+# The budget leaves headroom for slower CI hosts.
+BUDGET_MS = 250
+
+# Modules that must only load on the first analyze() call
+LAZY_MODULES = ("crewai", "langchain", "langchain_core", "langchain_openai", "openai")
+
+CHECK_LAZY = (
+    "import sys, crew; "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure_once(module: str):
+    """Return (cumulative_us for `module`, {module: self_us}) from one cold import"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    total_us = None
+    self_times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        self_times[name.strip()] = int(self_us)
+        if name.strip() == module:
+            total_us = int(cumulative_us)
+    return total_us, self_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="crew")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    print(f"⏱️  Measuring cold import of '{args.module}' ({args.runs} runs)...")
+    totals = []
+    self_times = {}
+    for _ in range(args.runs):
+        total_us, self_times = measure_once(args.module)
+        totals.append(total_us / 1000)
+
+    median_ms = statistics.median(totals)
+    print(f"   median {median_ms:.1f} ms | min {min(totals):.1f} ms | max {max(totals):.1f} ms")
+
+    print("\n🐢 Slowest modules (self time, last run):")
+    for name, self_us in sorted(self_times.items(), key=lambda kv: -kv[1])[:10]:
+        print(f"   {self_us / 1000:8.1f} ms  {name.strip()}")
+
+    failed = False
+    if median_ms > args.budget_ms:
+        print(f"\n❌ Import time {median_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+    else:
+        print(f"\n✅ Within budget of {args.budget_ms:.0f} ms")
+
+    if args.module == "crew":
+        proc = subprocess.run([sys.executable, "-c", CHECK_LAZY],
+                              cwd=REPO_ROOT, capture_output=True, text=True)
+        eager = proc.stdout.strip()
+        if eager:
+            print(f"❌ Imported eagerly by 'import crew': {eager}")
+            failed = True
+        else:
+            print("✅ crewai/LangChain/OpenAI stay unloaded until the first analysis")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
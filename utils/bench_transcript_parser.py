@@ -0,0 +1,126 @@
+"""
+Transcript parser benchmark
+
+Feeds synthetic verbose crew transcripts (agent headers, chain noise and long
+tool output) of increasing size through TranscriptParser in 64 KB chunks, and
+reports throughput and peak traced memory. Time should grow linearly with size
+while peak memory stays flat. The previous whole-string parser is timed on the
+smallest size for reference.
+
+Usage: python utils/bench_transcript_parser.py [--sizes 10,25,50]  (MB)
+"""
+import argparse
+import itertools
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from transcript_parser import TranscriptParser
+
+CHUNK = 1 << 16
+HEADERS = (
+    "🔍 Research Analyst here. I'm researching Apple...",
+    "📊 Financial Analyst here. Based on the research...",
+    "💡 Investment Advisor here. After reviewing the analysis...",
+)
+FILLER = (
+    "> Entering new CrewAgentExecutor chain...",
+    "Thought: I now can give a great answer",
+    "",
+    "- Revenue grew steadily across the main business segments over the period.",
+    "Observation: " + "tool output " * 40,
+    "   ",
+    "> Finished chain.",
+)
+
+
+def synthetic_chunks(total_bytes: int):
+    """Yield CHUNK-sized pieces of a transcript without building it in memory"""
+    lines = itertools.cycle(
+        [HEADERS[i % 3]] + [FILLER[(i + j) % len(FILLER)] for j in range(40)]
+        for i in range(3)
+    )
+    buffer, size, produced = [], 0, 0
+    for block in lines:
+        for line in block:
+            buffer.append(line + "\n")
+            size += len(line) + 1
+        if size >= CHUNK:
+            text = "".join(buffer)
+            for start in range(0, len(text), CHUNK):
+                piece = text[start:start + CHUNK]
+                yield piece
+                produced += len(piece)
+                if produced >= total_bytes:
+                    return
+            buffer, size = [], 0
+
+
+def legacy_parse(text: str):
+    """The previous capture_agent_output: split everything, test every line"""
+    messages, agent, current = [], None, []
+    for line in text.split("\n"):
+        for header, name in (("Research Analyst here", "Research Analyst"),
+                             ("Financial Analyst here", "Financial Analyst"),
+                             ("Investment Advisor here", "Investment Advisor")):
+            if header in line:
+                if agent and current:
+                    messages.append({'agent': agent, 'message': "\n".join(current)})
+                agent, current = name, [line]
+                break
+        else:
+            if agent and line.strip():
+                current.append(line)
+    if agent and current:
+        messages.append({'agent': agent, 'message': "\n".join(current)})
+    return messages
+
+
+def run_parser(chunks, trace_memory: bool):
+    parser = TranscriptParser(agents=("Research Analyst", "Financial Analyst", "Investment Advisor"),
+                              max_message_chars=256 * 1024)
+    count = 0
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for chunk in chunks:
+        count += len(parser.feed(chunk))
+    count += len(parser.close())
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,25,50", help="transcript sizes in MB")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(f"{'size':>7} {'time':>8} {'MB/s':>8} {'s/MB':>7} {'peak memory':>12} {'messages':>9}")
+    for size in sizes:
+        # Time pre-generated chunks; trace memory while generating them lazily
+        chunks = list(synthetic_chunks(size << 20))
+        elapsed, _, count = run_parser(chunks, trace_memory=False)
+        del chunks
+        _, peak, _ = run_parser(synthetic_chunks(size << 20), trace_memory=True)
+        print(f"{size:>5}MB {elapsed:>7.2f}s {size / elapsed:>8.1f} {elapsed / size:>7.3f} "
+              f"{peak / 1024:>9.0f} KB {count:>9}")
+
+    smallest = sizes[0] << 20
+    text = "".join(synthetic_chunks(smallest))
+    start = time.perf_counter()
+    legacy_parse(text)
+    elapsed = time.perf_counter() - start
+    print(f"\n📎 Previous parser on {sizes[0]}MB (whole transcript in memory): "
+          f"{elapsed:.2f}s, {sizes[0] / elapsed:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,28 @@ Simple Financial Analysis Crew - No memory/embeddings to avoid compatibility iss
 """
 from crewai import Agent, Crew, Task, Process
 from crewai_tools import SerperDevTool
-from langchain_openai import ChatOpenAI
 import os
+import sys
 from datetime import datetime
 import json
+from pathlib import Path
 from dotenv import load_dotenv
 
+# llm_client lives at the repository root, which isn't on sys.path when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm_client import create_llm
+
 # Load environment variables
 load_dotenv()
 
 # Initialize tools
 search_tool = SerperDevTool()
 
-# Initialize LLM
+# Initialize LLM (response-cached and rate-limited; agents call llm.stream(),
+# which only create_llm's client answers from the cache)
 try:
-    llm = ChatOpenAI(
+    llm = create_llm(
         model="gpt-3.5-turbo",
         temperature=0.1,
         api_key=os.getenv("OPENAI_API_KEY")